@@ -0,0 +1,92 @@
+"""
+Compares the row-wise JFrog name normalization of the SoftwareCompositionAnalysis
+notebook with normalize_artifact_names and build_name_version.
+
+Run from the repository root:
+    PYTHONPATH=src python benchmarks/jar_name_normalization.py
+"""
+import time
+
+import numpy as np
+import pandas as pd
+from sbom_normalization import build_name_version, normalize_artifact_names
+
+
+def process_string(s):
+    # Custom function of the notebook for the transformation of JFrog artifact names
+    if s.endswith(".jar"):
+        s = s[:-4]  # Remove ".jar"
+        parts = s.split("-")
+        new_name = "-".join(parts[:])
+        new_version = None 
+        for i in range(0, len(parts) - 1, 1):
+            if parts[i+1].replace(".", "").replace("_","").isdigit():
+                new_version = "-".join(parts[i+1:])
+                new_name = "-".join(parts[:i+1])   
+                break
+        return new_name, new_version 
+    else:
+        return None, None
+
+def transform_row(row):
+    if row['new_name'] is not None:
+        row['name'] = row['new_name']
+    if row['new_version'] is not None:
+        row['version'] = row['new_version']
+    return row
+
+def row_wise(df):
+    # The notebook's per-scanner loop
+    data_frames = []
+    for scanner, scanner_df in df.groupby('scanner_name', sort=False):
+        scanner_df = scanner_df.copy()
+        if scanner in ['jfrog_advanced_security_cont', 'jfrog_cont']:
+            scanner_df['new_name'], scanner_df['new_version'] = zip(
+                *scanner_df['name'].apply(process_string))
+            scanner_df = scanner_df.apply(transform_row, axis=1)
+            scanner_df.drop(columns=['new_name', 'new_version'], inplace=True)
+        scanner_df['name_version'] = (scanner_df['name'].apply(lambda x: x.split(':')[-1])
+                                      .astype(str) + ':' + 
+                                      scanner_df['version'].fillna('').astype(str))
+        data_frames.append(scanner_df)
+    return pd.concat(data_frames).sort_index()
+
+def vectorized(df):
+    df = normalize_artifact_names(df)
+    return df.assign(name_version=build_name_version(df['name'], df['version']))
+
+def scanner_data(n_rows, seed=0):
+    # JFrog rows with '.jar' file names, the other scanners with maven names
+    rng = np.random.default_rng(seed)
+    artifacts = [(f'lib{i}-core', f'{i % 7}.{i % 13}.{i % 5}') for i in range(5000)]
+    picks = rng.integers(0, len(artifacts), n_rows)
+    scanners = rng.choice(['gitlab_cont', 'jfrog_advanced_security_cont', 'jfrog_cont', 
+                           'syft_cont', 'trivy_cont'], n_rows)
+    is_jfrog = np.char.startswith(scanners.astype(str), 'jfrog')
+    names = [f'{artifacts[p][0]}-{artifacts[p][1]}.jar' if jfrog else 
+             f'org.example:{artifacts[p][0]}' for p, jfrog in zip(picks, is_jfrog)]
+    versions = [None if jfrog else artifacts[p][1] for p, jfrog in zip(picks, is_jfrog)]
+    return pd.DataFrame({'scanner_name': scanners, 
+                         'name': pd.Series(names, dtype=object),
+                         'version': pd.Series(versions, dtype=object)})
+
+def main():
+    for n_rows in (10_000, 100_000, 500_000):
+        df = scanner_data(n_rows)
+
+        start = time.perf_counter()
+        expected = row_wise(df)
+        row_wise_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        result = vectorized(df)
+        vectorized_time = time.perf_counter() - start
+
+        assert result['name_version'].tolist() == expected['name_version'].tolist()
+        print(f"{n_rows:>8} rows: row-wise {row_wise_time:7.2f}s, "
+              f"vectorized {vectorized_time:6.3f}s "
+              f"({row_wise_time / vectorized_time:5.0f}x)")
+
+
+if __name__ == '__main__':
+    main()
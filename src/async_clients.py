@@ -0,0 +1,155 @@
+import asyncio
+import copy
+import functools
+import threading
+from concurrent.futures import Future
+
+from defectdojo import DefectDojoAnalyzer
+from dependency_track import DependencyTrack
+from http_session import GatedSession, RequestGate, request_cancel_event
+
+
+class _AsyncClient:
+    """
+    Asyncio front end of a blocking API client.
+
+    Every public method of the wrapped client is available as a coroutine that runs
+    the blocking call in a worker thread, so several crawls can run concurrently in
+    one event loop (e.g. with top-level await in Jupyter). All requests of the
+    client pass through a RequestGate, which can be shared with other clients to
+    limit the number of connections of all of them together.
+
+    The client is wrapped as a shallow copy whose session passes through the gate;
+    the client that is passed in keeps its own session and can still be used on
+    its own. Results such as fetch_errors are those of the wrapped copy (the
+    attribute client). A catalogue warm-up of the client that is still running
+    (prefetch=True) is carried over to the copy when it finishes.
+
+    The catalogue (CATALOGUE_ATTRIBUTE, e.g. project_info) is fetched with 
+    `await warm_up()`. Reading the attribute never fetches it, so the event loop is
+    not blocked; it is None until the catalogue is loaded.
+
+    Cancelling a call makes the pending requests of this call fail fast with
+    RequestCancelled and waits until the blocking call has returned. Other calls of
+    the same client keep running.
+    """
+
+    # Set the lazily fetched catalogue property of the wrapped client
+    CATALOGUE_ATTRIBUTE = None
+
+    def __init__(self, client, gate=None):
+        self.gate = gate or RequestGate()
+        self.client = copy.copy(client)
+        self.client.session = GatedSession(client.session, self.gate)
+
+        # The copy fetches its catalogue on its own, except for a running warm-up 
+        # of the client
+        self.client._catalogue_lock = threading.Lock()
+        self.client._catalogue_future = None
+        with client._catalogue_lock:
+            warm_up_future = client._catalogue_future
+        if warm_up_future is not None:
+            self._carry_over_catalogue(client, warm_up_future)
+
+    def _carry_over_catalogue(self, client, warm_up_future):
+        # The warm-up future of the copy is done once the catalogue of the client 
+        # has been copied
+        attribute = f'_{self.CATALOGUE_ATTRIBUTE}'
+        future = Future()
+        self.client._catalogue_future = future
+
+        def copy_catalogue(done):
+            catalogue = getattr(client, attribute)
+            if getattr(self.client, attribute) is None:
+                setattr(self.client, attribute, catalogue)
+            if catalogue is None:
+                # Forget the failed warm-up, the next warm_up fetches again
+                with self.client._catalogue_lock:
+                    if self.client._catalogue_future is future:
+                        self.client._catalogue_future = None
+            if done.exception() is not None:
+                future.set_exception(done.exception())
+            else:
+                future.set_result(None)
+        warm_up_future.add_done_callback(copy_catalogue)
+
+    def __getattr__(self, name):
+        if name == self.CATALOGUE_ATTRIBUTE:
+            # Do not fetch the catalogue on the event loop (see warm_up)
+            return getattr(self.client, f'_{name}')
+        attribute = getattr(self.client, name)
+        if name.startswith('_') or not callable(attribute):
+            return attribute
+
+        @functools.wraps(attribute)
+        async def method(*args, **kwargs):
+            return await self._run(attribute, *args, **kwargs)
+        return method
+
+    async def _run(self, function, *args, **kwargs):
+        # The worker thread runs in a copy of the current context, which holds the
+        # cancel event of this call
+        cancel_event = threading.Event()
+        token = request_cancel_event.set(cancel_event)
+        try:
+            future = asyncio.ensure_future(asyncio.to_thread(function, *args, **kwargs))
+        finally:
+            request_cancel_event.reset(token)
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            # Let the remaining requests of this call fail and wait for the worker 
+            # thread
+            cancel_event.set()
+            try:
+                await future
+            except Exception:
+                pass
+            raise
+
+
+class AsyncDependencyTrack(_AsyncClient):
+    """
+    DependencyTrack with awaitable methods.
+
+    Example:
+        ```python
+        gate = RequestGate(limit=16)
+        dt_instance = AsyncDependencyTrack(gate=gate)
+        dd_instance = AsyncDefectDojoAnalyzer(gate=gate)
+        sbom_df, (engagement_df, tests_df, findings_df) = await asyncio.gather(
+            dt_instance.collect_portfolio_scanner_data(projects),
+            dd_instance.collect_findings(in_scope=in_scope))
+        project_info = await dt_instance.warm_up()
+        ```
+    """
+
+    CATALOGUE_ATTRIBUTE = 'project_info'
+
+    def __init__(self, client=None, gate=None, **kwargs):
+        """
+        Args:
+            client (DependencyTrack, optional): The client to wrap. Defaults to a new
+                                                DependencyTrack(**kwargs).
+            gate (RequestGate, optional): Limit of the requests in flight, shared
+                                          with other clients. Defaults to a new gate.
+        """
+        super().__init__(client or DependencyTrack(**kwargs), gate)
+
+
+class AsyncDefectDojoAnalyzer(_AsyncClient):
+    """
+    DefectDojoAnalyzer with awaitable methods (see AsyncDependencyTrack).
+    """
+
+    CATALOGUE_ATTRIBUTE = 'product_info'
+
+    def __init__(self, client=None, gate=None, **kwargs):
+        """
+        Args:
+            client (DefectDojoAnalyzer, optional): The client to wrap. Defaults to a
+                                                   new DefectDojoAnalyzer(**kwargs).
+            gate (RequestGate, optional): Limit of the requests in flight, shared
+                                          with other clients. Defaults to a new gate.
+        """
+        super().__init__(client or DefectDojoAnalyzer(**kwargs), gate)
@@ -3,5 +3,26 @@ from logging_config import configure_logging
 # Set magic values
 SUCCESS_STATUS_CODE = 200
 
+# HTTP transport settings shared by all API clients
+REQUEST_TIMEOUT = (10, 300)       # (connect, read) timeout in seconds
+HTTP_POOL_SIZE = 16               # keep-alive connections per host
+HTTP_RETRIES = 5                  # retries on connection errors, 429 and 5xx
+HTTP_BACKOFF_FACTOR = 0.5         # exponential backoff: 0.5s, 1s, 2s, ...
+HTTP_RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+# Local SBOM cache (relative to the notebooks folder like ../output)
+SBOM_CACHE_DIR = "../cache/sbom"
+SBOM_CACHE_MAX_SIZE = 2 * 1024**3  # bytes of compressed BOMs
+NOT_MODIFIED_STATUS_CODE = 304
+
+# Local store of the DefectDojo engagements, tests and findings
+FINDINGS_STORE_PATH = "../cache/defectdojo/findings.sqlite"
+
+# Parquet snapshots of the aggregated frames (see snapshot_store)
+SNAPSHOT_DIR = "../cache/snapshots"
+
+# Data hashes of the rendered project plots (see report_renderer)
+RENDER_MANIFEST_PATH = "../output/render_manifest.json"
+
 # Configure logging
 configure_logging()
@@ -0,0 +1,174 @@
+import codecs
+import json
+import re
+
+import pandas as pd
+
+# Component fields that are used downstream of the SBOM download
+COMPONENT_FIELDS = ('name', 'version', 'purl', 'bom-ref', 'hashes')
+
+# Characters that change the nesting level or start a string
+_STRUCTURE_PATTERN = re.compile(r'["{}\[\]]')
+_WHITESPACE_PATTERN = re.compile(r'[ \t\n\r]*')
+
+
+class _ComponentStreamParser:
+    """
+    Incremental parser that yields the top-level components of a CycloneDX JSON BOM.
+
+    The text of the BOM is fed in chunks. Everything in front of the top-level
+    "components" array is skipped without building objects, every element of the
+    array is decoded on its own, and parsing stops at the end of the array.
+    """
+
+    def __init__(self):
+        self._decoder = json.JSONDecoder()
+        self._buffer = ''
+        self._pos = 0
+        self._depth = 0
+        self._in_components = False
+        self.found_components = False
+        self.done = False
+
+    def feed(self, text):
+        """
+        Adds text to the parser and yields all components that are complete.
+
+        Args:
+            text (str): The next chunk of the BOM.
+
+        Yields:
+            dict: The decoded components.
+        """
+        self._buffer = self._buffer[self._pos:] + text
+        self._pos = 0
+
+        if not self._in_components:
+            self._find_components()
+        if self._in_components:
+            yield from self._decode_components()
+
+    def close(self):
+        """
+        Checks that the BOM ended in a consistent state.
+
+        Raises:
+            ValueError: If the components array is truncated.
+        """
+        if self._in_components and not self.done:
+            raise ValueError("Truncated CycloneDX BOM: components array is not closed")
+
+    def _skip_whitespace(self):
+        self._pos = _WHITESPACE_PATTERN.match(self._buffer, self._pos).end()
+        return self._pos < len(self._buffer)
+
+    def _find_components(self):
+        # Scan the structure until the key "components" of the top-level object
+        buffer = self._buffer
+        while not self.done:
+            match = _STRUCTURE_PATTERN.search(buffer, self._pos)
+            if match is None:
+                self._pos = len(buffer)
+                return
+            char = match.group()
+            start = match.start()
+
+            if char in '{[':
+                self._depth += 1
+                self._pos = start + 1
+            elif char in '}]':
+                self._depth -= 1
+                self._pos = start + 1
+                if self._depth == 0:
+                    # End of the document without components
+                    self.done = True
+            else:
+                try:
+                    key, end = json.decoder.scanstring(buffer, start + 1)
+                except ValueError:
+                    # Incomplete string, wait for more data
+                    self._pos = start
+                    return
+                self._pos = end
+                if self._depth != 1 or key != 'components':
+                    continue
+
+                # Only a key followed by ':' and '[' starts the components array
+                if not self._skip_whitespace():
+                    self._pos = start
+                    return
+                if buffer[self._pos] != ':':
+                    continue
+                self._pos += 1
+                if not self._skip_whitespace():
+                    self._pos = start
+                    return
+                if buffer[self._pos] != '[':
+                    continue
+                self._pos += 1
+                self._in_components = True
+                self.found_components = True
+                return
+
+    def _decode_components(self):
+        buffer = self._buffer
+        while not self.done:
+            if not self._skip_whitespace():
+                return
+            char = buffer[self._pos]
+            if char == ']':
+                self.done = True
+                return
+            if char == ',':
+                self._pos += 1
+                continue
+            try:
+                component, end = self._decoder.raw_decode(buffer, self._pos)
+            except ValueError:
+                # Incomplete component, wait for more data
+                return
+            self._pos = end
+            yield component
+
+
+def read_cyclonedx_components(chunks, fields=COMPONENT_FIELDS, encoding='utf-8'):
+    """
+    Reads the components of a CycloneDX JSON BOM from a stream of byte chunks.
+
+    Only the requested fields are kept. They are collected in one buffer per column
+    while the chunks arrive and are turned into a DataFrame at the end, so neither
+    the complete BOM nor a list of component dictionaries is held in memory.
+    Reading stops at the end of the top-level components array.
+
+    Args:
+        chunks (iterable): Iterable of bytes with the BOM payload.
+        fields (tuple): The component fields to extract.
+        encoding (str): The encoding of the payload.
+
+    Returns:
+        pd.DataFrame or None: A DataFrame with one column per field and one row per
+                              component, or None if the BOM has no components.
+
+    Raises:
+        ValueError: If the BOM is not valid JSON or truncated.
+    """
+    parser = _ComponentStreamParser()
+    decoder = codecs.getincrementaldecoder(encoding)()
+    columns = {field: [] for field in fields}
+    buffers = list(columns.items())
+
+    for chunk in chunks:
+        for component in parser.feed(decoder.decode(chunk)):
+            for field, buffer in buffers:
+                buffer.append(component.get(field))
+        if parser.done:
+            break
+    else:
+        for component in parser.feed(decoder.decode(b'', final=True)):
+            for field, buffer in buffers:
+                buffer.append(component.get(field))
+    parser.close()
+
+    if not parser.found_components:
+        return None
+    return pd.DataFrame(columns)
@@ -1,4 +1,7 @@
+import numpy as np
 import pandas as pd
+from indexed_frame import IndexedFrame
+from presence_matrix import PresenceMatrix
 
 
 def filter_by_project_name_version(df, project_name_version):
@@ -6,7 +9,7 @@ def filter_by_project_name_version(df, project_name_version):
     Filters the DataFrame based on the specified 'project_name_version'.
 
     Args:
-        df (DataFrame): The input DataFrame.
+        df (DataFrame or IndexedFrame): The input DataFrame.
         project_name_version (str): The project name and version to filter by.
 
     Returns:
@@ -15,6 +18,8 @@ def filter_by_project_name_version(df, project_name_version):
     if not isinstance(project_name_version, str):
         raise ValueError("'project_name_version' must be a string")
     
+    if isinstance(df, IndexedFrame):
+        return df.select(project_name_version=project_name_version)
     return df[df['project_name_version'] == project_name_version]
 
 
@@ -23,7 +28,7 @@ def filter_by_project_name_version_and_scanner(df, project_name_version, scanner
     Filters the DataFrame based on the specified 'project_name_version' and 'scanner_name'.
 
     Args:
-        df (DataFrame): The input DataFrame.
+        df (DataFrame or IndexedFrame): The input DataFrame.
         project_name_version (str): The project name and version to filter by.
         scanner_name (str): The scanner name to filter by.
 
@@ -33,6 +38,9 @@ def filter_by_project_name_version_and_scanner(df, project_name_version, scanner
     if not isinstance(project_name_version, str) or not isinstance(scanner_name, str):
         raise ValueError("'project_name_version' and 'scanner_name' must be strings")
     
+    if isinstance(df, IndexedFrame):
+        return df.select(project_name_version=project_name_version, 
+                         scanner_name=scanner_name)
     return df[((df['project_name_version'] == project_name_version) & 
                (df['scanner_name'] == scanner_name))]
 
@@ -42,7 +50,7 @@ def filter_by_flag_and_label(df, flag, label):
     Filters the DataFrame based on the specified 'flag' and 'label'.
 
     Args:
-        df (DataFrame): The input DataFrame.
+        df (DataFrame or IndexedFrame): The input DataFrame.
         flag (int): The flag value to filter by.
         label (int): The label value to filter by.
 
@@ -52,17 +60,23 @@ def filter_by_flag_and_label(df, flag, label):
     if not isinstance(flag, int) or not isinstance(label, int):
         raise ValueError("'flag' and 'label' must be integer types")
     
+    if isinstance(df, IndexedFrame):
+        return df.select(flag=flag, label=label)
     return df[(df['flag'] == flag) & (df['label'] == label)]
 
 
-def filter_rows_with_string_in_column(df, column, string):
+def filter_rows_with_string_in_column(df, column, string, regex=True):
     """
     Filters the DataFrame based on the specified column containing the specified string.
 
+    With an IndexedFrame, the rows are searched with the trigram index of the column.
+
     Args:
-        df (DataFrame): The input DataFrame.
+        df (DataFrame or IndexedFrame): The input DataFrame.
         column (str): The column to filter by.
         string (str): The string to search for in the specified column.
+        regex (bool): Treat the string as a regular expression, with False the
+                      string is searched literally.
 
     Returns:
         DataFrame: The filtered DataFrame.
@@ -76,7 +90,40 @@ def filter_rows_with_string_in_column(df, column, string):
     if column not in df.columns:
         raise ValueError(f"'{column}' is not a column of the DataFrame")
     
-    return df[df[column].str.contains(string)]
+    if isinstance(df, IndexedFrame):
+        return df.frame.iloc[df.text_index(column).search(string, regex=regex)]
+    return df[df[column].str.contains(string, regex=regex)]
+
+
+def filter_rows_with_strings_in_column(df, column, strings, regex=False):
+    """
+    Filters the DataFrame for each of several strings in the specified column, e.g.
+    for a keyword sweep ('secret', 'token', 'credential') over finding titles.
+
+    Args:
+        df (DataFrame or IndexedFrame): The input DataFrame.
+        column (str): The column to filter by.
+        strings (list): The strings to search for in the specified column.
+        regex (bool): Treat the strings as regular expressions.
+
+    Returns:
+        dict: The filtered DataFrame of every string.
+
+    Raises:
+        ValueError: If the specified column does not exist in the DataFrame.
+    """
+    if not isinstance(column, str) or not all(isinstance(string, str) 
+                                              for string in strings):
+        raise ValueError("'column' and 'strings' must be strings")
+
+    if column not in df.columns:
+        raise ValueError(f"'{column}' is not a column of the DataFrame")
+
+    if isinstance(df, IndexedFrame):
+        rows = df.text_index(column).search_many(strings, regex=regex)
+        return {string: df.frame.iloc[rows[string]] for string in strings}
+    return {string: df[df[column].str.contains(string, regex=regex)] 
+            for string in strings}
 
 def get_difference_between_scanners(df, project_name_version, 
                                     scanner_name1, scanner_name2, flag1, label1):
@@ -85,7 +132,7 @@ def get_difference_between_scanners(df, project_name_version,
     Returns the difference between the two resulting subsets.
 
     Args:
-        df (DataFrame): The input DataFrame.
+        df (DataFrame or IndexedFrame): The input DataFrame.
         project_name_version1 (str): The project name and version to filter by.
         scanner_name1 (str): The first scanner name to filter by.
         scanner_name2 (str): The second scanner name to filter by.
@@ -105,16 +152,119 @@ def get_difference_between_scanners(df, project_name_version,
     if not isinstance(flag1, int) or not isinstance(label1, int):
         raise ValueError("'flag1' and 'label1' must be integers")
 
-    df1_filtered = filter_by_project_name_version_and_scanner(df, project_name_version, scanner_name1)
+    if isinstance(df, IndexedFrame):
+        df_FL = df.select(project_name_version=project_name_version, flag=flag1, 
+                          label=label1)
+    else:
+        df_FL = filter_by_flag_and_label(
+            filter_by_project_name_version(df, project_name_version), flag1, label1)
+
+    # Artifacts of scanner 1 that scanner 2 does not have
+    presence_matrix = PresenceMatrix.from_frame(df_FL, 'name_version', 
+                                                scanner_names=[scanner_name1, scanner_name2])
+    data_set = presence_matrix.difference(scanner_name1, scanner_name2)
+
+    return pd.DataFrame({'artifacts': data_set})
+
 
-    df1_FL = filter_by_flag_and_label(df1_filtered, flag1, label1)
+class ScannerDifferences:
+    """
+    Artifact differences of all ordered scanner pairs per project, flag and label.
+
+    self.counts holds the number of artifacts of every difference. The artifacts
+    themselves are only materialized by artifacts(), from the presence matrix of all
+    projects.
+    """
+
+    def __init__(self, presence_matrix, group_keys, counts):
+        self.presence_matrix = presence_matrix
+        self.group_keys = group_keys
+        self.counts = counts
+
+    def artifacts(self, project_name_version, scanner_name1, scanner_name2, flag1, label1):
+        """
+        Returns the artifacts of scanner 1 that scanner 2 does not have.
+
+        Args:
+            project_name_version (str): The project name and version.
+            scanner_name1 (str): The first scanner name.
+            scanner_name2 (str): The second scanner name.
+            flag1 (int): The flag value.
+            label1 (int): The label value.
+
+        Returns:
+            DataFrame: The artifacts like get_difference_between_scanners.
+        """
+        # The groups of the presence matrix are the positions in group_keys
+        try:
+            group = self.group_keys.get_loc((project_name_version, flag1, label1))
+        except KeyError:
+            return pd.DataFrame({'artifacts': []}, dtype=object)
+        presence_matrix = self.presence_matrix.subset(group)
+        if scanner_name1 not in presence_matrix.scanner_names:
+            return pd.DataFrame({'artifacts': []}, dtype=object)
+        others = [scanner_name2] if scanner_name2 in presence_matrix.scanner_names else []
+        return pd.DataFrame({'artifacts': presence_matrix.difference(scanner_name1, 
+                                                                     *others)})
+
+
+def get_differences_between_all_scanners(df, project_name_version=None, 
+                                         scanner_names=None):
+    """
+    Evaluates the differences between all ordered pairs of scanners at once.
+
+    The rows of every combination of project, flag and label are one group of a
+    single presence matrix, so all differences that get_difference_between_scanners
+    returns one at a time are counted in one pass.
+
+    Args:
+        df (DataFrame or IndexedFrame): The confusion matrix data with the columns
+                                        'project_name_version', 'scanner_name',
+                                        'name_version', 'flag' and 'label'.
+        project_name_version (str, optional): The project to evaluate. Defaults to
+                                              all projects.
+        scanner_names (list, optional): The scanners to compare. Defaults to all
+                                        scanners in df.
+
+    Returns:
+        ScannerDifferences: The counts in the DataFrame 'counts' with the columns
+                            'project_name_version', 'flag', 'label',
+                            'scanner_name1', 'scanner_name2' and 'count', and the
+                            artifacts on demand.
+
+    Raises:
+        ValueError: If the input arguments are of the wrong type.
+    """
+    if project_name_version is not None and not isinstance(project_name_version, str):
+        raise ValueError("'project_name_version' must be a string")
 
-    df2_filtered = filter_by_project_name_version_and_scanner(df, project_name_version, scanner_name2)
+    if project_name_version is not None:
+        df = filter_by_project_name_version(df, project_name_version)
+    elif isinstance(df, IndexedFrame):
+        df = df.frame
+    if scanner_names is None:
+        scanner_names = sorted(pd.unique(df['scanner_name'].dropna()))
 
-    df2_FL = filter_by_flag_and_label(df2_filtered, flag1, label1)
+    # One group per project, flag and label
+    keys = ['project_name_version', 'flag', 'label']
+    grouped = df.groupby(keys, observed=True, dropna=False, sort=True)
+    group_keys = grouped.size().index
+    presence_matrix = PresenceMatrix.from_frame(
+        df.assign(difference_group=grouped.ngroup()), 'name_version', 
+        scanner_names=scanner_names, group_by='difference_group')
 
-    data_set = set(df1_FL['name_version']) - set(df2_FL['name_version'])
-    # Convert the set to a list of tuples
-    data_list = [(value,) for value in data_set]
+    # Ordered pairs of different scanners of every group
+    n = len(scanner_names)
+    counts = presence_matrix.difference_counts(by_group=True)
+    groups, first, second = np.nonzero(~np.eye(n, dtype=bool)[np.newaxis].repeat(
+        len(counts), axis=0))
+    group_positions = presence_matrix.groups.to_numpy(dtype=np.int64)[groups]
+    counts_df = pd.DataFrame({
+        column: group_keys.get_level_values(column)[group_positions]
+        for column in keys})
+    counts_df['scanner_name1'] = pd.Categorical.from_codes(first, scanner_names)
+    counts_df['scanner_name2'] = pd.Categorical.from_codes(second, scanner_names)
+    counts_df['count'] = counts[groups, first, second]
+    counts_df = counts_df.sort_values(keys, kind='stable', ignore_index=True)
 
-    return pd.DataFrame(data_list, columns=['artifacts'])
\ No newline at end of file
+    return ScannerDifferences(presence_matrix, group_keys, counts_df)
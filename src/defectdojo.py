@@ -1,10 +1,18 @@
 import logging
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 import pandas as pd
 import requests
-from config import SUCCESS_STATUS_CODE
+from config import FINDINGS_STORE_PATH, SUCCESS_STATUS_CODE
 from dotenv import find_dotenv, load_dotenv
+from findings_store import FindingsStore
+from http_session import (
+    ContextThreadPoolExecutor,
+    RequestCancelled,
+    get_shared_session,
+)
 
 
 class DefectDojoAnalyzer:
@@ -14,16 +22,85 @@ class DefectDojoAnalyzer:
     API_VERSION = "v2"  
     # Set the API URL of your Dependency Track instance 
     DEFECT_DOJO_API_URL = f"{DEFECT_DOJO_BASE_URL}/api/{API_VERSION}"
-
-    def __init__(self):
-        # Set DefectDojo instance base URL
-        self.producte_info = None
-
-        # Load API_KEY
-        load_dotenv(find_dotenv(raise_error_if_not_found=True, usecwd=False))
+    # Set number of results per page (limit) of the list endpoints
+    PAGE_SIZE = 1000
+    # Set column renames of the engagements, tests and findings
+    ENGAGEMENT_COLUMNS = {'product': 'product_id', 'id': 'engagement_id', 
+                          'name': 'engagement_name'}
+    TEST_COLUMNS = {'engagement': 'engagement_id', 'id': 'test_id', 
+                    'test_type': 'test_type_id'}
+    FINDING_COLUMNS = {'title': 'finding_title', 'id': 'finding_id', 'test': 'test_id'}
+    # Set schema (column: dtype) of the engagements, tests and findings frames.
+    # Repeated strings are categoricals, ids nullable integers and free text strings.
+    # Fields of the API that are not in the schema are kept with inferred dtypes
+    ENGAGEMENT_SCHEMA = {
+        'engagement_id': 'Int64', 'engagement_name': 'category', 
+        'product_id': 'Int64', 'product_name': 'category', 'status': 'category', 
+        'engagement_type': 'category', 'version': 'string', 'branch_tag': 'string', 
+        'build_id': 'string', 'commit_hash': 'string', 'target_start': 'string', 
+        'target_end': 'string', 'reason': 'string', 'active': 'boolean', 
+        'deduplication_on_engagement': 'boolean', 'lead': 'Int64'}
+    TEST_SCHEMA = {
+        'test_id': 'Int64', 'engagement_id': 'Int64', 'test_type_id': 'Int32', 
+        'test_type_name': 'category', 'scan_type': 'category', 'title': 'string', 
+        'version': 'string', 'target_start': 'string', 'target_end': 'string'}
+    FINDING_SCHEMA = {
+        'finding_id': 'Int64', 'test_id': 'Int64', 'finding_title': 'string', 
+        'severity': 'category', 'numerical_severity': 'category', 
+        'display_status': 'category', 'cwe': 'Int32', 'cvssv3': 'category', 
+        'cvssv3_score': 'Float32', 'vulnerability_ids': object, 
+        'vuln_id_from_tool': 'string', 'unique_id_from_tool': 'string', 
+        'component_name': 'category', 'component_version': 'category', 
+        'file_path': 'string', 'line': 'Int32', 'url': 'string', 
+        'description': 'string', 'mitigation': 'string', 'hash_code': 'string', 
+        'scanner_confidence': 'Int32', 'active': 'boolean', 'verified': 'boolean', 
+        'false_p': 'boolean', 'duplicate': 'boolean', 'out_of_scope': 'boolean', 
+        'is_mitigated': 'boolean', 'date': 'string', 'tags': object,
+        'last_status_update': 'datetime64[ns, UTC]', 'steps_to_reproduce': 'string', 
+        'references': 'string', 'risk_accepted': 'boolean', 'under_review': 'boolean', 
+        'thread_id': 'Int64', 'mitigated': 'datetime64[ns, UTC]', 'param': 'string', 
+        'payload': 'string', 'static_finding': 'boolean', 'dynamic_finding': 'boolean', 
+        'sast_source_line': 'Int32', 'sast_source_file_path': 'string'}
+    # Set list filters (comma separated ids) used to query many parents at once, 
+    # keyed by (endpoint, single id filter)
+    BULK_FILTERS = {('engagements', 'product'): 'product__in',
+                    ('tests', 'engagement'): 'engagement__in',
+                    ('findings', 'test'): 'test__in',
+                    ('findings', 'test__engagement'): 'test__engagement',
+                    ('findings', 'test__engagement__product'): 'test__engagement__product'}
+    # Set maximum number of ids per list filter (keeps the URL short)
+    BULK_BATCH_SIZE = 100
+    # Set finding field and query filter used for the incremental sync
+    MODIFIED_FIELD = 'last_status_update'
+    MODIFIED_FILTER = 'last_status_update__gte'
+
+    def __init__(self, max_workers=5, session=None, api_key=None, product_info=None, 
+                 prefetch=False, store_path=FINDINGS_STORE_PATH):
+        # Product catalogue (Name, ID). It is fetched on first use, by warm_up() or
+        # in the background with prefetch=True, unless a pre-loaded catalogue is
+        # injected.
+        self._product_info = product_info
+        self._catalogue_lock = threading.Lock()
+        self._catalogue_future = None
+
+        # HTTP session (keep-alive pool with retries) shared with other API clients
+        self.session = session or get_shared_session()
+        # Maximum number of concurrent requests
+        self.max_workers = max_workers
+        # Failed requests of the last crawl, keyed by (endpoint, filter value)
+        self.fetch_errors = {}
+        # List filters that the DefectDojo instance ignores
+        self._unsupported_bulk_filters = set()
+        # Local store of the synced engagements, tests and findings (None disables 
+        # sync_findings)
+        self.findings_store = FindingsStore(store_path) if store_path else None
+
+        # Load API_KEY (from .env unless given or already set in the environment)
+        if api_key is None and os.getenv('DEFECT_DOJO_API_KEY') is None:
+            load_dotenv(find_dotenv(raise_error_if_not_found=True, usecwd=False))
 
         # Set API key
-        self.API_KEY = os.getenv('DEFECT_DOJO_API_KEY')
+        self.API_KEY = api_key or os.getenv('DEFECT_DOJO_API_KEY')
 
         # Set header
         self.headers = {
@@ -31,17 +108,72 @@ class DefectDojoAnalyzer:
             "content-type": "application/json",
         }
 
-        self._get_products()
-        if self.product_info is None:
-            print("Initialization failed: Project information not available")  
+        if product_info is None and prefetch:
+            self.warm_up(wait=False)
+
+    @property
+    def product_info(self):
+        """
+        DataFrame with the product catalogue, fetched on first access.
+        """
+        if self._product_info is None:
+            self.warm_up()
+        return self._product_info
+
+    @product_info.setter
+    def product_info(self, product_info):
+        self._product_info = product_info
 
-    def _get_products(self, page_size=50):
+    def warm_up(self, wait=True):
         """
-        Retrieves products from the DefectDojo API.
+        Fetches the product catalogue from DefectDojo if it is not loaded yet.
+
+        The catalogue is only fetched once, also when warm_up is called from several
+        threads. A fetch that fails is repeated by the next call. Use _get_products
+        to reload it.
+
+        Args:
+            wait (bool): Wait for the catalogue. With False the catalogue is fetched
+                         in the background.
+
+        Returns:
+            DataFrame or None: The product catalogue (None if wait is False or the
+                               catalogue is not available).
+        """
+        with self._catalogue_lock:
+            if self._product_info is not None:
+                return self._product_info
+            if self._catalogue_future is None:
+                executor = ThreadPoolExecutor(max_workers=1)
+                self._catalogue_future = executor.submit(self._load_catalogue)
+                executor.shutdown(wait=False)
+            future = self._catalogue_future
+
+        if not wait:
+            return None
+        future.result()
+        return self._product_info
+
+    def _load_catalogue(self):
+        # Fetch the product catalogue once (runs in the warm-up thread)
+        try:
+            self._get_products()
+        finally:
+            if self._product_info is None:
+                # Forget the failed attempt, the next warm_up fetches again
+                with self._catalogue_lock:
+                    self._catalogue_future = None
+        if self._product_info is None:
+            print("Initialization failed: Project information not available")
+
+    def _get_products(self, page_size=None):
+        """
+        Retrieves all products from the DefectDojo API, following the pagination.
 
         Args:
             self: The DefectDojo instance.
-            page_size: The number of products to retrieve per page.
+            page_size: The number of products to retrieve per page. Defaults to 
+                       PAGE_SIZE.
 
         Returns:
             A DataFrame containing the product information if the request is successful, otherwise None.
@@ -57,17 +189,10 @@ class DefectDojoAnalyzer:
             ```
         """
 
-        params = {'limit': str(page_size)}  # Set the limit parameter to retrieve the first 50 products
-        url = f"{self.DEFECT_DOJO_API_URL}/products/?page_size={page_size}"
-        response = self._make_request(method='GET', 
-                                      url=url, 
-                                      verify=False, 
-                                      headers=self.headers, 
-                                      params=params)
-
-        if response and response.status_code == SUCCESS_STATUS_CODE:
-            products = (response.json())['results']
+        # Get all pages of the product list
+        products = self._get_all_results('products', page_size=page_size)[0]
 
+        if products is not None:
             data = {
                 'Name': [],
                 'ID': []}
@@ -78,8 +203,7 @@ class DefectDojoAnalyzer:
             self.product_info = pd.DataFrame(data)
             return pd.DataFrame(data)
 
-        logging.error(f"Failed to get projects. Status code: {response.status_code}" 
-                      if response else "Failed to get projects.")
+        logging.error("Failed to get products.")
         return None
         
     # Function to get product information by ID
@@ -124,16 +248,21 @@ class DefectDojoAnalyzer:
         return None
       
     # Function to get engagements for a product by ID
-    def get_engagements_for_product(self, product_id):
+    def get_engagements_for_product(self, product_id, columns=None):
         """
-        Gets engagements for a product by its ID from the DefectDojo API.
+        Gets all engagements of a product by its ID from the DefectDojo API.
 
         Args:
             self: The DefectDojo instance.
             product_id: The ID of the product to retrieve engagements for.
+            columns (list, optional): The columns to return (ENGAGEMENT_SCHEMA or
+                                      other API fields). The id columns are always
+                                      included. Defaults to all columns.
 
         Returns:
-            The response from the API call.
+            A DataFrame with one row per engagement (columns 'product_id', 
+            'engagement_id', 'engagement_name', ...) if the request is successful, 
+            otherwise None.
 
         Example:
             ```python
@@ -143,139 +272,507 @@ class DefectDojoAnalyzer:
             print(result)
             ```
         """
-        headers =  {                     
-            "accept": "application/json",
-            "Authorization": f"Token {self.API_KEY}"
-        }      
-        url = f"{self.DEFECT_DOJO_API_URL}/engagements/"
-        params = {"product": product_id}
+        results = self._get_all_results('engagements', 'product', [product_id])[0]
+        if results is None:
+            logging.error(f"Failed to get engagements for product {product_id}.")
+            return None
+        return self._results_frame(results, self.ENGAGEMENT_COLUMNS, 
+                                   self.ENGAGEMENT_SCHEMA, columns)
 
-        response = self._make_request(method='GET', 
-                                      url=url,
-                                      params=params,
-                                      headers=headers,
-                                      verify=False)
-        
-       # Check the response status
-        if response is not None and response.status_code == SUCCESS_STATUS_CODE:
-            engagements = (response.json())['results']
-            data = {
-                "Name": [],
-                "ID": []
-            }
-            for engagement in engagements:
-                data["Name"].append(engagement["name"])
-                # Check if the "version" key exists in the current project dictionary
-                engagement.get("version", "None")  # Use "None" as the default value
-                data["ID"].append(engagement["id"])       
+    def get_tests_for_engaggement(self, engagement_id, columns=None):
+        """
+        Gets all tests of an engagement by its ID from the DefectDojo API.
 
+        Args:
+            self: The DefectDojo instance.
+            engagement_id: The ID of the engagement to retrieve tests for.
+            columns (list, optional): The columns to return (TEST_SCHEMA or
+                                      other API fields). The id columns are always
+                                      included. Defaults to all columns.
 
+        Returns:
+            A DataFrame with one row per test (columns 'test_id', 'engagement_id', 
+            'test_type_id', ...) if the request is successful, otherwise None.
+        """
+        results = self._get_all_results('tests', 'engagement', [engagement_id])[0]
+        if results is None:
+            logging.error(f"Failed to get tests for engagement {engagement_id}.")
+            return None
+        return self._results_frame(results, self.TEST_COLUMNS, self.TEST_SCHEMA, 
+                                   columns)
 
-            self.project_info = pd.DataFrame(data)
-            return pd.DataFrame(data)
-        else:
-            logging.error("Failed to get projects.")
+    def get_findings_for_test(self, test_id, columns=None):
+        """
+        Gets all findings of a test by its ID from the DefectDojo API.
+
+        Args:
+            self: The DefectDojo instance.
+            test_id: The ID of the test to retrieve findings for.
+            columns (list, optional): The columns to return (FINDING_SCHEMA or
+                                      other API fields). The id columns are always
+                                      included. Defaults to all columns.
+
+        Returns:
+            A DataFrame with one row per finding (columns 'test_id', 'finding_id', 
+            'finding_title', ...) if the request is successful, otherwise None.
+        """
+        results = self._get_all_results('findings', 'test', [test_id])[0]
+        if results is None:
+            logging.error(f"Failed to get findings for test {test_id}.")
             return None
-  
-    def get_tests_for_engaggement(self, engagement_id):
- 
-        headers =  {                     
-            "accept": "application/json",
-            "Authorization": f"Token {self.API_KEY}"
-        }      
-        url = f"{self.DEFECT_DOJO_API_URL}/tests/"
-        params = {"engagement": engagement_id}
+        return self._results_frame(results, self.FINDING_COLUMNS, self.FINDING_SCHEMA, 
+                                   columns)
 
-        response = self._make_request(method='GET', 
-                                      url=url,
-                                      params=params,
-                                      headers=headers,
-                                      verify=False)
-        
-       # Check the response status
-        if response is not None and response.status_code == SUCCESS_STATUS_CODE:
-            tests = (response.json())['results']
-            data = {
-                "Test_Name": [],
-                "Test_ID": [],
-                "Test_Type_Name": [],
-                "Scan_Type": [],
-                "Test_Type_ID": [],
-                "Engagement_ID": [],
-                "Test_Title": [],
+    def get_findings_for_tests(self, test_ids, max_workers=None, columns=None):
+        """
+        Gets all findings of several tests from the DefectDojo API.
 
-            }
-            for test in tests:
-                data["Name"].append(engagement["name"])
+        The tests are queried in batches with one list filter per batch, so the 
+        number of requests depends on the number of pages rather than the number 
+        of tests. If the list filter is not supported, every test is queried on 
+        its own.
 
-                # Check if the "version" key exists in the current project dictionary
-                engagement.get("version", "None")  # Use "None" as the default value
-                data["ID"].append(engagement["id"])       
+        Args:
+            self: The DefectDojo instance.
+            test_ids: The IDs of the tests to retrieve findings for.
+            max_workers (int, optional): Maximum number of concurrent requests.
+                                         Defaults to self.max_workers.
+            columns (list, optional): The columns to return (FINDING_SCHEMA or
+                                      other API fields). The id columns are always
+                                      included. Defaults to all columns.
 
+        Returns:
+            A DataFrame with one row per finding (columns 'test_id', 'finding_id', 
+            'finding_title', ...). Tests whose findings could not be retrieved are 
+            listed in self.fetch_errors.
+        """
+        test_ids = list(dict.fromkeys(test_ids))
+        results = self._get_all_results('findings', 'test', test_ids, max_workers)
+        findings = [finding for test_findings in results if test_findings 
+                    for finding in test_findings]
+        return self._results_frame(findings, self.FINDING_COLUMNS, self.FINDING_SCHEMA, 
+                                   columns)
+
+    def collect_findings(self, in_scope=None, max_workers=None, columns=None):
+        """
+        Crawls the engagements, tests and findings of all products.
 
+        Every level (engagements of the products, tests of the engagements, 
+        findings of the engagements) is fetched in one concurrent batch: first the 
+        first page of every query, then all remaining pages of all queries. Many 
+        parents are queried at once with the list filters in BULK_FILTERS, so the 
+        number of requests depends on the number of pages rather than the number of 
+        parents. Filters whose pages could not be retrieved are listed in 
+        self.fetch_errors.
 
-            self.project_info = pd.DataFrame(data)
-            return pd.DataFrame(data)
-        else:
-            logging.error("Failed to get projects.")
-            return None
+        Args:
+            in_scope (dict, optional): Products and engagements to crawl as 
+                                       {product name: [engagement names]}. Defaults 
+                                       to all engagements of all products.
+            max_workers (int, optional): Maximum number of concurrent requests.
+                                         Defaults to self.max_workers.
+            columns (list, optional): The columns to return (FINDING_SCHEMA or
+                                      other API fields). The id columns are always
+                                      included. Defaults to all columns.
 
-    def get_findings_for_test(self, test_id):
- 
-        headers =  {                     
-            "accept": "application/json",
-            "Authorization": f"Token {self.API_KEY}"
-        }      
-        url = f"{self.DEFECT_DOJO_API_URL}/findings/"
-        params = {"test": test_id}
+        Returns:
+            tuple: The engagements, tests and findings DataFrames with the dtypes of 
+                   ENGAGEMENT_SCHEMA, TEST_SCHEMA and FINDING_SCHEMA.
 
-        response = self._make_request(method='GET', 
-                                      url=url,
-                                      params=params,
-                                      headers=headers,
-                                      verify=False)
-        
-       # Check the response status
-        if response is not None and response.status_code == SUCCESS_STATUS_CODE:
-            tests = (response.json())['results']
-            data = {
-                "Test_Name": [],
-                "Test_ID": [],
-                "Test_Type_Name": [],
-                "Scan_Type": [],
-                "Test_Type_ID": [],
-                "Engagement_ID": [],
-                "Test_Title": [],
+        Example:
+            ```python
+            defect_dojo = DefectDojoAnalyzer()
+            engagement_df, tests_df, findings_df = defect_dojo.collect_findings(
+                in_scope={'Floodlight': ['DevSecOps-Pilot']})
+            ```
+        """
+        self.fetch_errors = {}
+        engagement_df, tests_df = self._collect_engagements_and_tests(in_scope, 
+                                                                      max_workers)
+        findings_df = self._collect_findings(tests_df, max_workers=max_workers, 
+                                             columns=columns)
 
-            }
-            for test in tests:
-                data["Name"].append(engagement["name"])
+        if self.fetch_errors:
+            print(f"Error: {len(self.fetch_errors)} requests failed, see fetch_errors")
+        return engagement_df, tests_df, findings_df
 
-                # Check if the "version" key exists in the current project dictionary
-                engagement.get("version", "None")  # Use "None" as the default value
-                data["ID"].append(engagement["id"])       
+    def sync_findings(self, in_scope=None, full=False, max_workers=None, columns=None):
+        """
+        Updates the local findings store and returns its content.
 
+        Engagements and tests are crawled completely (they are few pages) and 
+        upserted by 'engagement_id' and 'test_id'. Every engagement has its own 
+        watermark: its findings are only requested if they were modified since the 
+        last sync of this engagement (MODIFIED_FILTER), and are upserted by 
+        'finding_id'. Engagements that were not synced before are crawled 
+        completely, so scopes can be synced one after the other. The watermark of an 
+        engagement only advances if all its requests succeeded.
 
+        Args:
+            in_scope (dict, optional): Products and engagements to sync as 
+                                       {product name: [engagement names]}. Defaults 
+                                       to all engagements of all products.
+            full (bool): Crawl the engagements in scope completely and replace their 
+                         tests and findings, e.g. to drop findings that were deleted 
+                         in DefectDojo.
+            max_workers (int, optional): Maximum number of concurrent requests.
+                                         Defaults to self.max_workers.
+            columns (list, optional): The columns of the findings to load from the 
+                                      store. All columns are synced.
 
-            self.project_info = pd.DataFrame(data)
-            return pd.DataFrame(data)
-        else:
-            logging.error("Failed to get projects.")
+        Returns:
+            tuple: The engagements, tests and findings DataFrames of the store, 
+                   restricted to the synced tests (None if no store is configured).
+        """
+        store = self.findings_store
+        if store is None:
+            logging.error("Failed to sync findings: no findings store configured.")
             return None
 
+        self.fetch_errors = {}
+        # Watermarks are stored as {engagement id (str): ISO timestamp}
+        watermarks = store.get_state('engagement_watermarks', {})
+
+        engagement_df, tests_df = self._collect_engagements_and_tests(in_scope, 
+                                                                      max_workers)
+        engagement_ids = list(dict.fromkeys(tests_df['engagement_id'].tolist()))
+        if full:
+            for engagement_id in engagement_ids:
+                watermarks.pop(str(engagement_id), None)
+
+        # Engagements without a watermark are crawled completely, the others are 
+        # queried in one batch per watermark
+        batches = {}
+        for engagement_id in engagement_ids:
+            batches.setdefault(watermarks.get(str(engagement_id)), []).append(
+                engagement_id)
+        findings_dfs = [self._collect_findings(
+            tests_df, batch_ids, max_workers, 
+            params=None if watermark is None else {self.MODIFIED_FILTER: watermark})
+            for watermark, batch_ids in batches.items()]
+        findings_dfs = findings_dfs or [self._collect_findings(tests_df, [], max_workers)]
+        # Empty frames would turn the integer columns into float
+        findings_df = pd.concat([df for df in findings_dfs if len(df)] or findings_dfs[:1], 
+                                ignore_index=True)
+
+        if full:
+            # Drop the stored tests and findings of the engagements in scope
+            stored_tests = store.load('tests', ['test_id', 'engagement_id'])
+            test_ids = set(tests_df['test_id'].tolist())
+            if stored_tests is not None and 'engagement_id' in stored_tests:
+                test_ids.update(stored_tests.loc[
+                    stored_tests['engagement_id'].isin(engagement_ids), 'test_id'].tolist())
+            store.delete('findings', 'test_id', sorted(test_ids))
+            store.delete('tests', 'engagement_id', engagement_ids)
+        store.upsert('engagements', engagement_df, key='engagement_id')
+        store.upsert('tests', tests_df, key='test_id')
+        store.upsert('findings', findings_df, key='finding_id')
+
+        # Engagements whose findings could not be retrieved keep their watermark. If
+        # the engagements or tests are incomplete, no watermark is advanced.
+        failed = {value for endpoint, value in self.fetch_errors if endpoint == 'findings'}
+        if any(endpoint != 'findings' for endpoint, _ in self.fetch_errors):
+            failed = set(engagement_ids)
+        if self.fetch_errors:
+            print(f"Error: {len(self.fetch_errors)} requests failed, see fetch_errors. "
+                  f"The sync watermark of {len(failed)} engagements was not advanced.")
+
+        # Advance the watermarks to the latest modification seen by the server
+        modified = pd.to_datetime(
+            findings_df.get(self.MODIFIED_FIELD, pd.Series(dtype=object)), utc=True)
+        test_engagements = dict(zip(tests_df['test_id'], tests_df['engagement_id']))
+        latest = modified.groupby(
+            findings_df['test_id'].map(test_engagements).to_numpy()).max() \
+            if len(findings_df) else pd.Series(dtype=object)
+        for engagement_id in engagement_ids:
+            if engagement_id in failed:
+                continue
+            candidates = [pd.Timestamp(timestamp) for timestamp in 
+                          (latest.get(engagement_id), watermarks.get(str(engagement_id)))
+                          if timestamp is not None and not pd.isna(timestamp)]
+            if candidates:
+                watermarks[str(engagement_id)] = max(candidates).isoformat()
+        store.set_state('engagement_watermarks', watermarks)
+
+        engagement_df, tests_df, findings_df = self.load_findings(
+            test_ids=tests_df['test_id'], columns=columns)
+        engagement_df = engagement_df[engagement_df['engagement_id'].isin(
+            engagement_ids)].reset_index(drop=True)
+        return engagement_df, tests_df, findings_df
+
+    def load_findings(self, test_ids=None, columns=None):
+        """
+        Loads the engagements, tests and findings from the local findings store.
+
+        Only the projected columns of the findings are read from the store.
+
+        Args:
+            test_ids (list, optional): Only load these tests and their findings.
+                                       Defaults to all stored tests.
+            columns (list, optional): The columns to load (FINDING_SCHEMA or
+                                      other API fields). The id columns are always
+                                      included. Defaults to all columns.
+
+        Returns:
+            tuple: The engagements, tests and findings DataFrames (None if nothing 
+                   was synced yet).
+        """
+        if self.findings_store is None:
+            return None, None, None
+        engagement_df = self.findings_store.load('engagements')
+        tests_df = self.findings_store.load('tests')
+        findings_df = self.findings_store.load(
+            'findings', self._project_columns(self.FINDING_SCHEMA, columns, 
+                                              self.FINDING_COLUMNS))
+        if test_ids is not None and tests_df is not None and findings_df is not None:
+            test_ids = set(test_ids)
+            tests_df = tests_df[tests_df['test_id'].isin(test_ids)].reset_index(drop=True)
+            findings_df = findings_df[findings_df['test_id'].isin(test_ids)].reset_index(
+                drop=True)
+        return engagement_df, tests_df, findings_df
+
+    def _collect_engagements_and_tests(self, in_scope=None, max_workers=None):
+        # Crawl the engagements of the products in scope and their tests
+        product_df = self.product_info
+        if product_df is None:
+            product_df = pd.DataFrame({'Name': [], 'ID': []})
+        if in_scope is not None:
+            product_df = product_df[product_df['Name'].isin(list(in_scope))]
+
+        # Engagements of the products
+        product_ids = product_df['ID'].tolist()
+        results = self._get_all_results('engagements', 'product', product_ids, 
+                                        max_workers)
+        engagement_df = self._results_frame(
+            [engagement for engagements in results if engagements 
+             for engagement in engagements], self.ENGAGEMENT_COLUMNS, 
+            self.ENGAGEMENT_SCHEMA)
+        product_names = dict(zip(product_df['ID'], product_df['Name']))
+        engagement_df['product_name'] = engagement_df['product_id'].map(
+            product_names).astype(self.ENGAGEMENT_SCHEMA['product_name'])
+        if in_scope is not None:
+            in_scope_pairs = {(product_name, engagement_name) 
+                              for product_name, engagement_names in in_scope.items()
+                              for engagement_name in engagement_names}
+            ind_mask = [pair in in_scope_pairs for pair in 
+                        zip(engagement_df['product_name'], engagement_df['engagement_name'])]
+            engagement_df = engagement_df[ind_mask].reset_index(drop=True)
+
+        # Tests of the engagements
+        engagement_ids = engagement_df['engagement_id'].tolist()
+        results = self._get_all_results('tests', 'engagement', engagement_ids, 
+                                        max_workers)
+        tests_df = self._results_frame(
+            [test for tests in results if tests for test in tests], self.TEST_COLUMNS, 
+            self.TEST_SCHEMA)
+        return engagement_df, tests_df
+
+    def _collect_findings(self, tests_df, engagement_ids=None, max_workers=None, 
+                          params=None, columns=None):
+        # Findings of the tests, queried by engagement (one list filter for many 
+        # engagements instead of one query per test)
+        test_ids = set(tests_df['test_id'].tolist())
+        test_engagements = dict(zip(tests_df['test_id'], tests_df['engagement_id']))
+        if engagement_ids is None:
+            engagement_ids = list(dict.fromkeys(tests_df['engagement_id'].tolist()))
+        results = self._get_all_results(
+            'findings', 'test__engagement', engagement_ids, max_workers,
+            key=lambda finding: test_engagements.get(finding.get('test')), 
+            params=params)
+        findings = [finding for engagement_findings in results if engagement_findings
+                    for finding in engagement_findings if finding.get('test') in test_ids]
+        return self._results_frame(findings, self.FINDING_COLUMNS, self.FINDING_SCHEMA,
+                                   columns)
+
+    def _get_all_results(self, endpoint, filter_name=None, filter_values=(None,),
+                         max_workers=None, page_size=None, key=None, params=None):
+        """
+        Retrieves all results of a paginated list endpoint for several filter values.
+
+        If BULK_FILTERS has a list filter for the endpoint, the filter values are 
+        queried in batches of BULK_BATCH_SIZE values. The first page of every batch 
+        is checked: if it contains results of other filter values, the API ignored 
+        the list filter, it is disabled for this instance and the values are queried 
+        one by one. Values of failed batches are queried one by one as well.
+
+        Args:
+            endpoint (str): The list endpoint, e.g. 'findings'.
+            filter_name (str, optional): The query parameter to filter by, e.g. 'test'.
+            filter_values (list): The values of the filter, one result list each.
+            max_workers (int, optional): Maximum number of concurrent requests.
+                                         Defaults to self.max_workers.
+            page_size (int, optional): Number of results per page. Defaults to 
+                                       self.PAGE_SIZE.
+            key (callable, optional): Returns the filter value of a result. Defaults 
+                                      to the field filter_name of the result.
+            params (dict, optional): Additional query parameters of every request.
+
+        Returns:
+            list: One list of result dictionaries per filter value (None for filter 
+                  values whose pages could not be retrieved).
+        """
+        url = f"{self.DEFECT_DOJO_API_URL}/{endpoint}/"
+        params = {name: value for name, value in (params or {}).items() 
+                  if value is not None}
+        filter_values = list(filter_values)
+        all_results = [None] * len(filter_values)
+        remaining = list(range(len(filter_values)))
+
+        bulk_filter = self.BULK_FILTERS.get((endpoint, filter_name))
+        if (bulk_filter is not None and len(filter_values) > 1 and 
+                bulk_filter not in self._unsupported_bulk_filters):
+            key = key or (lambda result: result.get(filter_name))
+            positions = {value: index for index, value in enumerate(filter_values)}
+            batches = [filter_values[i:i + self.BULK_BATCH_SIZE] 
+                       for i in range(0, len(filter_values), self.BULK_BATCH_SIZE)]
+            batch_sets = [set(batch) for batch in batches]
+
+            def validate(index, results):
+                return all(key(result) in batch_sets[index] for result in results)
+
+            params_list = [{**params, bulk_filter: ','.join(str(value) for value in batch)} 
+                           for batch in batches]
+            batch_results, invalid = self._get_pages(url, params_list, max_workers, 
+                                                     page_size, validate)
+            if invalid:
+                logging.error(f"List filter {bulk_filter} of {endpoint} is not "
+                              f"supported, querying {filter_name} values one by one.")
+                self._unsupported_bulk_filters.add(bulk_filter)
+            else:
+                remaining = []
+                for batch, results in zip(batches, batch_results):
+                    if results is None:
+                        remaining.extend(positions[value] for value in batch)
+                        continue
+                    for value in batch:
+                        all_results[positions[value]] = []
+                    for result in results:
+                        all_results[positions[key(result)]].append(result)
+
+        # Query the remaining filter values one by one
+        params_list = [params if filter_name is None else 
+                       {**params, filter_name: filter_values[index]} 
+                       for index in remaining]
+        single_results, _ = self._get_pages(url, params_list, max_workers, page_size)
+        for index, results in zip(remaining, single_results):
+            all_results[index] = results
+            if results is None:
+                self.fetch_errors[(endpoint, filter_values[index])] = \
+                    f"Failed to get {endpoint} for {filter_name} {filter_values[index]}"
+        return all_results
+
+    def _get_pages(self, url, params_list, max_workers=None, page_size=None, 
+                   validate=None):
+        """
+        Retrieves all pages of a list endpoint for several sets of query parameters.
 
+        The first page of every set is fetched concurrently. It tells the total 
+        number of results, the remaining pages of all sets are then fetched 
+        concurrently as well.
 
+        Args:
+            url (str): The URL of the list endpoint.
+            params_list (list): The query parameters, one result list each.
+            max_workers (int, optional): Maximum number of concurrent requests.
+                                         Defaults to self.max_workers.
+            page_size (int, optional): Number of results per page. Defaults to 
+                                       self.PAGE_SIZE.
+            validate (callable, optional): Called with the position in params_list 
+                                           and the results of the first page. The 
+                                           remaining pages are not fetched if it 
+                                           returns False.
 
+        Returns:
+            tuple: One list of result dictionaries per set of query parameters (None 
+                   if a page could not be retrieved or is invalid) and the positions 
+                   of the invalid sets.
+        """
+        page_size = page_size or self.PAGE_SIZE
+
+        def get_page(job):
+            index, offset = job
+            params = {**params_list[index], 'limit': page_size, 'offset': offset}
+            response = self._make_request(method='GET', 
+                                          url=url, 
+                                          headers=self.headers, 
+                                          params=params, 
+                                          verify=False)
+            if response is None or response.status_code != SUCCESS_STATUS_CODE:
+                return None
+            page = response.json()
+            results = page.get('results', [])
+            return results, page.get('count', len(results))
+
+        max_workers = max_workers or self.max_workers
+        with ContextThreadPoolExecutor(max_workers=max_workers) as executor:
+            first_pages = list(executor.map(
+                get_page, [(index, 0) for index in range(len(params_list))]))
+
+            invalid = []
+            if validate is not None:
+                for index, page in enumerate(first_pages):
+                    if page is not None and not validate(index, page[0]):
+                        invalid.append(index)
+                        first_pages[index] = None
+
+            jobs = [(index, offset) for index, page in enumerate(first_pages) 
+                    if page is not None 
+                    for offset in range(page_size, page[1], page_size)]
+            pages = list(executor.map(get_page, jobs))
+
+        all_results = [None if page is None else list(page[0]) for page in first_pages]
+        for (index, _), page in zip(jobs, pages):
+            if page is None:
+                all_results[index] = None
+            elif all_results[index] is not None:
+                all_results[index].extend(page[0])
+        return all_results, invalid
+
+    @staticmethod
+    def _project_columns(schema, columns, renames):
+        # Requested columns, the columns of the schema in schema order first; the id 
+        # columns (renamed API ids) are always included. None keeps all columns
+        if columns is None:
+            return None
+        columns = list(dict.fromkeys(columns))
+        id_columns = {column for column in renames.values() if column.endswith('_id')}
+        projected = [column for column in schema 
+                     if column in columns or column in id_columns]
+        return projected + [column for column in columns if column not in projected]
+
+    @staticmethod
+    def _results_frame(results, renames, schema, columns=None):
+        # Build a DataFrame from API results, the schema columns first and typed, then
+        # the other API fields in the order they appear; renames maps API fields to 
+        # the column names of the VulnerabilityAnalysis notebook
+        fields = {column: field for field, column in renames.items()}
+        extra = [renames.get(field, field) for field in 
+                 dict.fromkeys(field for result in results for field in result)]
+        columns = DefectDojoAnalyzer._project_columns(schema, columns, renames)
+        if columns is None:
+            columns = list(schema) + [column for column in extra if column not in schema]
+        results_df = pd.DataFrame(
+            {column: pd.Series([result.get(fields.get(column, column)) 
+                                for result in results], dtype=object)
+             for column in columns}, columns=columns)
+        results_df = apply_schema(results_df, schema)
+        # Infer the dtypes of the fields that are not in the schema
+        for column in results_df.columns.difference(list(schema), sort=False):
+            results_df[column] = results_df[column].infer_objects()
+        return results_df
 
     def get_engagements(self):
-        url = f"{self.base_url}/api/v2/engagements/"
-        response = requests.get(url, headers=self.headers)
+        url = f"{self.DEFECT_DOJO_API_URL}/engagements/"
+        response = self._make_request(method='GET', 
+                                      url=url, 
+                                      headers=self.headers, 
+                                      verify=False)
 
-        if response.status_code == 200:
+        if response is not None and response.status_code == SUCCESS_STATUS_CODE:
             engagements = response.json()
             return engagements
         else:
-            print(f"Failed to retrieve engagements. Status code: {response.status_code}")
+            print("Failed to retrieve engagements.")
             return None
 
     def get_findings_for_engagement(self, engagement_id):
@@ -292,12 +789,45 @@ class DefectDojoAnalyzer:
 
     def _make_request(self, method, url, verify=True, **kwargs):
         try:
-            session = requests.Session()
-            response = session.request(method=method, url=url, verify=verify, **kwargs)
+            # Reuse the pooled, retrying session shared by all API clients
+            response = self.session.request(method=method, url=url, verify=verify, 
+                                            **kwargs)
             response.raise_for_status()  # Raises an HTTPError for non-2xx responses
             return response
+        except RequestCancelled:
+            # The call was cancelled, stop instead of reporting a failed request
+            raise
         except requests.exceptions.RequestException as e:
             print(f"An error occurred while making the request:{e}")
             return None
 
 
+def apply_schema(df, schema):
+    """
+    Converts the columns of a DataFrame to the dtypes of a schema.
+
+    Numbers and dates that cannot be parsed become missing values. Columns that are
+    not in the schema are left unchanged, columns of the schema that are missing in
+    df are skipped.
+
+    Args:
+        df (DataFrame): The data, e.g. findings read from a CSV file.
+        schema (dict): The dtype of every column, e.g. 
+                       DefectDojoAnalyzer.FINDING_SCHEMA.
+
+    Returns:
+        DataFrame: df with converted columns.
+    """
+    df = df.copy()
+    for column, dtype in schema.items():
+        if column not in df or dtype is object:
+            continue
+        values = df[column]
+        if dtype in ('Int32', 'Int64', 'Float32', 'Float64'):
+            values = pd.to_numeric(values, errors='coerce')
+        elif str(dtype).startswith('datetime64'):
+            values = pd.to_datetime(values, utc=True, errors='coerce')
+        elif dtype == 'boolean':
+            values = values.astype(object).where(values.notna(), None)
+        df[column] = values.astype(dtype)
+    return df
@@ -1,13 +1,27 @@
+import difflib
 import logging
 import os
-import warnings
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
-import numpy as np
 import pandas as pd
 import requests
-from config import SUCCESS_STATUS_CODE
+from config import (
+    NOT_MODIFIED_STATUS_CODE,
+    SBOM_CACHE_DIR,
+    SBOM_CACHE_MAX_SIZE,
+    SUCCESS_STATUS_CODE,
+)
+from cyclonedx_stream import read_cyclonedx_components
 from dotenv import find_dotenv, load_dotenv
-from packageurl import PackageURL
+from http_session import (
+    ContextThreadPoolExecutor,
+    RequestCancelled,
+    get_shared_session,
+)
+from sbom_cache import SBOMCache
+from sbom_normalization import (build_name_version, normalize_artifact_names,
+                                normalize_hashes, parse_purls)
 
 
 class DependencyTrack:
@@ -17,15 +31,48 @@ class DependencyTrack:
     API_VERSION = "v1"  
     # Set the API URL of your Dependency Track instance 
     DEPENDENCY_TRACK_API_URL = f"{DEPENDENCY_TRACK_BASE_URL}/api/{API_VERSION}"
-
-    def __init__(self):
-        self.project_info = None
-
-        # Load API_KEY
-        load_dotenv(find_dotenv(raise_error_if_not_found=True, usecwd=False))
+    # Number of projects requested per page
+    PROJECT_PAGE_SIZE = 500
+    # Number of bytes read per chunk when streaming a BOM
+    BOM_CHUNK_SIZE = 64 * 1024
+    # Component fields kept from the SBOMs
+    COMPONENT_COLUMNS = ['scanner_name', 'name', 'version', 'purl', 'bom-ref', 'hashes']
+    # Project columns of the portfolio data
+    PROJECT_COLUMNS = ['project_name', 'project_version', 'project_name_version']
+
+    def __init__(self, max_workers=5, session=None, cache_dir=SBOM_CACHE_DIR, 
+                 offline=False, api_key=None, project_info=None, prefetch=False):
+        # Project catalogue (Name, Version, UUID, LastBomImport). It is fetched on
+        # first use, by warm_up() or in the background with prefetch=True, unless a
+        # pre-loaded catalogue is injected.
+        self._project_info = None
+        self._catalogue_lock = threading.Lock()
+        self._catalogue_future = None
+
+        # Local cache of the raw BOMs (disabled with cache_dir=None). In offline mode
+        # BOMs are served from the cache only and never downloaded.
+        self.sbom_cache = (SBOMCache(cache_dir, SBOM_CACHE_MAX_SIZE) 
+                           if cache_dir is not None else None)
+        self.offline = offline
+
+        # HTTP session (keep-alive pool with retries) shared with other API clients
+        self.session = session or get_shared_session()
+
+        # Maximum number of SBOM downloads in flight at the same time
+        self.max_workers = max_workers
+
+        # Errors of the last SBOM fetch, keyed by project UUID
+        self.fetch_errors = {}
+
+        # Newest lastBomImport seen in project_info, used by refresh_projects
+        self.last_project_sync = None
+
+        # Load API_KEY (from .env unless given or already set in the environment)
+        if api_key is None and os.getenv('DEPENDENCY_TRACK_API_KEY') is None:
+            load_dotenv(find_dotenv(raise_error_if_not_found=True, usecwd=False))
 
         # Set API key
-        self.API_KEY = os.getenv('DEPENDENCY_TRACK_API_KEY')
+        self.API_KEY = api_key or os.getenv('DEPENDENCY_TRACK_API_KEY')
 
         # Add list with all scanner names
         self.scanner_names = ['gitlab_cont', 
@@ -33,16 +80,84 @@ class DependencyTrack:
                               'jfrog_cont', 
                               'syft_cont', 'trivy_cont']
 
-        self._get_all_projects()
-        if self.project_info is None:
-            print("Initialization failed: Project information not available")   
-    
+        if project_info is not None:
+            self.project_info = project_info
+            if 'LastBomImport' in project_info:
+                self.last_project_sync = project_info['LastBomImport'].max()
+        elif prefetch and not offline:
+            self.warm_up(wait=False)
+
+    @property
+    def project_info(self):
+        """
+        DataFrame with the project catalogue, fetched on first access. In offline 
+        mode the catalogue stored in the SBOM cache is used.
+        """
+        if self._project_info is None:
+            if not self.offline:
+                self.warm_up()
+            elif self.sbom_cache is not None:
+                self._project_info = self.sbom_cache.load_catalogue()
+        return self._project_info
+
+    @project_info.setter
+    def project_info(self, project_info):
+        self._project_info = project_info
+        # Keep the catalogue with the cached BOMs for the offline mode
+        if project_info is not None and self.sbom_cache is not None and not self.offline:
+            self.sbom_cache.store_catalogue(project_info)
+
+    def warm_up(self, wait=True):
+        """
+        Fetches the project catalogue from Dependency Track if it is not loaded yet.
+
+        The catalogue is only fetched once, also when warm_up is called from several
+        threads. A fetch that fails is repeated by the next call. Use
+        _get_all_projects or refresh_projects to reload it.
+
+        Args:
+            wait (bool): Wait for the catalogue. With False the catalogue is fetched
+                         in the background.
+
+        Returns:
+            pandas.DataFrame or None: The project catalogue (None if wait is False or
+                                      the catalogue is not available).
+        """
+        with self._catalogue_lock:
+            if self._project_info is not None:
+                return self._project_info
+            if self._catalogue_future is None:
+                executor = ThreadPoolExecutor(max_workers=1)
+                self._catalogue_future = executor.submit(self._load_catalogue)
+                executor.shutdown(wait=False)
+            future = self._catalogue_future
+
+        if not wait:
+            return None
+        future.result()
+        return self._project_info
+
+    def _load_catalogue(self):
+        # Fetch the project catalogue once (runs in the warm-up thread)
+        try:
+            self._get_all_projects()
+        finally:
+            if self._project_info is None:
+                # Forget the failed attempt, the next warm_up fetches again
+                with self._catalogue_lock:
+                    self._catalogue_future = None
+        if self._project_info is None:
+            print("Initialization failed: Project information not available")
+
     def _get_all_projects(self):
         # sourcery skip: extract-method, remove-unnecessary-else
         # Code to retrieve project names and UUIDs
         # Store the data in self.projects attribute
         """
         Retrieve all projects and their versions from the Dependency Track API.
+
+        The project list is paginated. The first page reports the total number of
+        projects, the remaining pages are then fetched concurrently.
     
         Returns:
             pandas.DataFrame or None:
@@ -64,41 +179,171 @@ class DependencyTrack:
             indicates a successful response from the Dependency Track API. By default, 
             it is set to 200.
         """  
+        # Get the first page, it tells the total number of projects
+        first_page = self._get_projects_page(page_number=1)
+        if first_page is None:
+            logging.error("Failed to get projects.")
+            return None
+        projects, total_count = first_page
+
+        data = self._new_project_buffers()
+        self._append_projects(data, projects)
+
+        if total_count is not None:
+            # Fetch the remaining pages concurrently
+            n_pages = -(-total_count // self.PROJECT_PAGE_SIZE)
+            page_numbers = range(2, n_pages + 1)
+            with ContextThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                pages = list(executor.map(self._get_projects_page, page_numbers))
+            if any(page is None for page in pages):
+                logging.error("Failed to get projects.")
+                return None
+            for page_projects, _ in pages:
+                self._append_projects(data, page_projects)
+        else:
+            # No total count known, read pages until a page is not full
+            page_number = 1
+            while len(projects) == self.PROJECT_PAGE_SIZE:
+                page_number += 1
+                page = self._get_projects_page(page_number)
+                if page is None:
+                    logging.error("Failed to get projects.")
+                    return None
+                projects, _ = page
+                self._append_projects(data, projects)
+
+        project_info_df = pd.DataFrame(data).drop_duplicates(subset=['UUID'], 
+                                                             ignore_index=True)
+        self.project_info = project_info_df
+        self.last_project_sync = project_info_df['LastBomImport'].max()
+        return project_info_df.copy()
+
+    def refresh_projects(self):
+        """
+        Incrementally refreshes project_info with the projects that received a new BOM
+        since the last sync.
+
+        The projects are requested sorted by lastBomImport (newest first) and pages
+        are read until a project with a BOM that is not newer than the last sync is
+        reached. Changed projects replace their rows in project_info, new projects
+        are appended. New projects without a BOM can be sorted after the last sync:
+        if the server reports more projects than are known, the catalogue is 
+        reloaded with _get_all_projects. Deleted projects are only removed by a full
+        reload.
+
+        Returns:
+            pandas.DataFrame or None: The projects that changed since the last sync, 
+                                      or None if the request fails.
+        """
+        # Accessing project_info loads the catalogue on first use
+        project_info_df = self.project_info
+        last_sync = self.last_project_sync
+        if project_info_df is None or last_sync is None or pd.isna(last_sync):
+            return self._get_all_projects()
+
+        known_uuids = set(project_info_df['UUID'])
+        data = self._new_project_buffers()
+        total_count = None
+        page_number = 0
+        while True:
+            page_number += 1
+            page = self._get_projects_page(page_number, sort_name='lastBomImport', 
+                                           sort_order='desc')
+            if page is None:
+                logging.error("Failed to refresh projects.")
+                return None
+            projects, page_total_count = page
+            if page_number == 1:
+                total_count = page_total_count
+            changed = [project for project in projects 
+                       if project['uuid'] not in known_uuids or 
+                       (project.get('lastBomImport') or 0) > last_sync]
+            self._append_projects(data, changed)
+            # Projects without a BOM may be sorted anywhere, only a BOM that is not 
+            # newer than the last sync ends the refresh
+            reached_last_sync = any(
+                project.get('lastBomImport') is not None and 
+                project['lastBomImport'] <= last_sync for project in projects)
+            if reached_last_sync or len(projects) < self.PROJECT_PAGE_SIZE:
+                break
+
+        changed_df = pd.DataFrame(data).drop_duplicates(subset=['UUID'], 
+                                                        ignore_index=True)
+        if total_count is not None and total_count > len(known_uuids | set(data['UUID'])):
+            # New projects without a BOM were not reached, reload the catalogue
+            reloaded_df = self._get_all_projects()
+            if reloaded_df is None:
+                return None
+            known_imports = dict(zip(project_info_df['UUID'], 
+                                     project_info_df['LastBomImport']))
+            is_changed = [uuid not in known_imports or 
+                          (pd.notna(last_bom_import) and 
+                           not last_bom_import == known_imports[uuid])
+                          for uuid, last_bom_import in 
+                          zip(reloaded_df['UUID'], reloaded_df['LastBomImport'])]
+            return reloaded_df[is_changed].reset_index(drop=True)
+
+        if not changed_df.empty:
+            unchanged_df = project_info_df[
+                ~project_info_df['UUID'].isin(changed_df['UUID'])]
+            self.project_info = pd.concat([unchanged_df, changed_df], ignore_index=True)
+            self.last_project_sync = max(last_sync, changed_df['LastBomImport'].max())
+        return changed_df
+
+    def _get_projects_page(self, page_number, sort_name=None, sort_order=None):
+        """
+        Retrieve one page of the project list from the Dependency Track API.
+
+        Args:
+            page_number (int): The page to retrieve, starting at 1.
+            sort_name (str, optional): The project field to sort by.
+            sort_order (str, optional): 'asc' or 'desc'.
+
+        Returns:
+            tuple or None: The list of projects and the total number of projects
+                           (None if the server does not report it), or None if the
+                           request fails.
+        """
         # Set the headers with the API key
         headers =  {                     
             "accept": "application/json",
             "X-Api-Key": self.API_KEY
         }      
+        params = {"pageNumber": page_number, "pageSize": self.PROJECT_PAGE_SIZE}
+        if sort_name is not None:
+            params.update({"sortName": sort_name, "sortOrder": sort_order or "asc"})
 
-        # Make the request to get all projects
+        # Make the request to get the page of projects
         url = f"{self.DEPENDENCY_TRACK_API_URL}/project"
         response = self._make_request(method='GET', 
                                       url=url, 
                                       verify=False, 
-                                      headers=headers)
+                                      headers=headers,
+                                      params=params)
 
         # Check the response status
-        if response is not None and response.status_code == SUCCESS_STATUS_CODE:
-            projects = response.json()
-            data = {
-                "Name": [],
-                "Version": [],
-                "UUID": []
-            }
-            for project in projects:
-                data["Name"].append(project["name"])
-                # Check if the "version" key exists in the current project dictionary
-                version = project.get("version", "None")  # Use "None" as the default value
-                data["Version"].append(version)
-                data["UUID"].append(project["uuid"])                                                                                                
-
-            self.project_info = pd.DataFrame(data)
-            return pd.DataFrame(data)
-        else:
-            logging.error("Failed to get projects.")
+        if response is None or response.status_code != SUCCESS_STATUS_CODE:
             return None
+
+        total_count = response.headers.get('X-Total-Count')
+        return response.json(), int(total_count) if total_count is not None else None
+
+    @staticmethod
+    def _new_project_buffers():
+        # Column buffers for project_info
+        return {"Name": [], "Version": [], "UUID": [], "LastBomImport": []}
+
+    @staticmethod
+    def _append_projects(data, projects):
+        # Add the fields of a page of projects to the column buffers
+        data["Name"].extend(project["name"] for project in projects)
+        # Use "None" as the default value if there is no "version" key
+        data["Version"].extend(project.get("version", "None") for project in projects)
+        data["UUID"].extend(project["uuid"] for project in projects)
+        # Timestamp of the last BOM upload, used to validate the SBOM cache
+        data["LastBomImport"].extend(project.get("lastBomImport") for project in projects)
     
-    def _get_project_data(self, project_name, project_version:None):
+    def _get_project_data(self, project_name, project_version:None, max_workers=None):
         # Code to retrieve project data using project_name and scanner_names
         # Use self.project_info to access the project names and UUIDs
         """
@@ -107,7 +352,9 @@ class DependencyTrack:
 
         Parameters:
             project_name (str): The name of the project.
-            scanner_names (list): A list of scanner names.
+            project_version (str): The version of the project or None.
+            max_workers (int, optional): Maximum number of concurrent SBOM downloads.
+                                         Defaults to self.max_workers.
 
         Returns:
             pandas.DataFrame: The combined data frame containing the values of all 
@@ -121,44 +368,27 @@ class DependencyTrack:
             combined_df = get_project_data('project_name', ['scanner1', 'scanner2'])
         """
 
-        # Add list with UUID to every scanner project for the current project_name
-        project_list = [f"{project_name}_{scanner_name}" for scanner_name in self.scanner_names]  # noqa: E501
-
         if self.project_info is not None:
-            project_info_df = self.project_info
-
-            if project_version is None:
-                mask = project_info_df['Name'].isin(project_list) 
-            else:
-                mask = ((project_info_df['Name'].isin(project_list)) & 
-                        (project_info_df['Version'] == str(project_version)))
-            
-            matching_rows = project_info_df[mask]
-            nr, _ = matching_rows.shape
-            if nr > 0:
-                uuids = matching_rows['UUID'].tolist()
-            else:
-                print(f"Error: no project with {project_name} and version {project_version} known")
+            scanner_uuids = self._get_scanner_uuids(project_name, project_version)
+            if not scanner_uuids:
                 return
+            scanner_names, uuids = map(list, zip(*scanner_uuids))
 
-            try:
-                # Create a list of the data frames of every scanner
-                data_frames = [self._get_project_components(uuid)  
-                               for uuid in uuids]
-            except Exception as e:
-                # Handle the exception here
-                logging.error(f"An error occurred: {e}")
-                return
+            # Create a list of the data frames of every scanner (same order as uuids)
+            data_frames, self.fetch_errors = self._fetch_project_components(
+                uuids, max_workers)
 
             # Add scanner name and UUID columns to each data frame
             for i, df in enumerate(data_frames):
                 if df is not None:
-                    df['scanner_name'] = self.scanner_names[i]
+                    df['scanner_name'] = scanner_names[i]
                     df['UUID'] = uuids[i]
                 else:
                     message = (
                         f"No component information available for project {project_name} "
                         f"with project uuid {uuids[i]}")
+                    if uuids[i] in self.fetch_errors:
+                        message += f": {self.fetch_errors[uuids[i]]}"
                     print(message)
     
             # Filter out None values from the list
@@ -172,6 +402,145 @@ class DependencyTrack:
             logging.error("Project info is not available.")
             return None
    
+    def _build_project_index(self):
+        """
+        Builds hash indexes on project_info for O(1) project lookups.
+
+        Two indexes are built: (Name, Version) -> UUID and, based on the naming
+        convention <project>_<scanner>, project -> version -> [(scanner_name, UUID)].
+        """
+        project_info_df = self.project_info
+        names = project_info_df['Name'].astype(str)
+        versions = project_info_df['Version'].astype(str)
+        uuids = project_info_df['UUID']
+
+        self._project_index = dict(zip(zip(names, versions), uuids))
+        if 'LastBomImport' in project_info_df:
+            self._bom_import_index = dict(zip(uuids, project_info_df['LastBomImport']))
+        else:
+            self._bom_import_index = {}
+
+        # Match the longest scanner suffix first
+        scanner_order = {name: i for i, name in enumerate(self.scanner_names)}
+        base_names = pd.Series(None, index=names.index, dtype=object)
+        scanners = pd.Series(None, index=names.index, dtype=object)
+        for scanner_name in sorted(self.scanner_names, key=len, reverse=True):
+            suffix = f"_{scanner_name}"
+            mask = names.str.endswith(suffix) & scanners.isna()
+            base_names[mask] = names[mask].str[:-len(suffix)]
+            scanners[mask] = scanner_name
+
+        scanner_index = {}
+        matched = scanners.notna()
+        for base_name, version, scanner_name, uuid in zip(base_names[matched], 
+                                                          versions[matched],
+                                                          scanners[matched], 
+                                                          uuids[matched]):
+            scanner_index.setdefault(base_name, {}).setdefault(version, []).append(
+                (scanner_name, uuid))
+        for project_versions in scanner_index.values():
+            for scanner_uuids in project_versions.values():
+                scanner_uuids.sort(key=lambda item: scanner_order[item[0]])
+
+        self._scanner_index = scanner_index
+        self._indexed_project_info = project_info_df
+
+    def _get_scanner_uuids(self, project_name, project_version):
+        """
+        Looks up the UUIDs of the scanner projects <project_name>_<scanner_name>.
+
+        Args:
+            project_name (str): The name of the project.
+            project_version (str): The version of the project or None for all versions.
+
+        Returns:
+            list: (scanner_name, UUID) tuples or None if no scanner project is known.
+        """
+        if getattr(self, '_indexed_project_info', None) is not self.project_info:
+            self._build_project_index()
+
+        project_versions = self._scanner_index.get(project_name, {})
+        if project_version is None:
+            scanner_uuids = [item for version in project_versions 
+                             for item in project_versions[version]]
+        else:
+            scanner_uuids = project_versions.get(str(project_version), [])
+
+        if not scanner_uuids:
+            message = f"Error: no project with {project_name} and version {project_version} known"  # noqa: E501
+            suggestions = self._suggest_projects(project_name)
+            if project_versions:
+                message += f". Known versions: {sorted(project_versions)}"
+            elif suggestions:
+                message += f". Did you mean: {', '.join(suggestions)}?"
+            print(message)
+            return None
+
+        return scanner_uuids
+
+    def _suggest_projects(self, project_name, n=3):
+        # Suggest similar project names for a lookup miss
+        return difflib.get_close_matches(project_name, self._scanner_index.keys(), n=n)
+
+    def get_project_uuid(self, project_name, project_version=None):
+        """
+        Returns the UUID of a project in Dependency Track.
+
+        Args:
+            project_name (str): The full name of the project (e.g. 'WebGoat_syft_cont').
+            project_version (str): The version of the project or None.
+
+        Returns:
+            str or None: The UUID or None if the project is not known.
+        """
+        if getattr(self, '_indexed_project_info', None) is not self.project_info:
+            self._build_project_index()
+        return self._project_index.get((project_name, str(project_version)))
+
+    def _fetch_project_components(self, uuids, max_workers=None):
+        """
+        Retrieve the component data frames of several projects concurrently.
+
+        Args:
+            uuids (list): The UUIDs of the projects.
+            max_workers (int, optional): Maximum number of SBOM downloads in flight.
+                                         Defaults to self.max_workers.
+
+        Returns:
+            tuple: A list of data frames in the same order as uuids (None for
+                   projects without data) and a dictionary with the error of every
+                   UUID that failed: the exception raised, or a RuntimeError if the
+                   BOM could not be retrieved or has no components.
+
+        Raises:
+            RequestCancelled: If the call was cancelled (see async_clients).
+        """
+        data_frames = [None] * len(uuids)
+        errors = {}
+        if not uuids:
+            return data_frames, errors
+
+        max_workers = max_workers or self.max_workers
+        with ContextThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(self._get_project_components, uuid): i 
+                       for i, uuid in enumerate(uuids)}
+            for future in as_completed(futures):
+                i = futures[future]
+                try:
+                    data_frames[i] = future.result()
+                    if data_frames[i] is None:
+                        # Failed requests are reported as missing data, not raised
+                        errors[uuids[i]] = RuntimeError("No SBOM data retrieved")
+                except RequestCancelled:
+                    raise
+                except Exception as e:
+                    # A failed download must not abort the other scanners
+                    errors[uuids[i]] = e
+                    logging.error(f"An error occurred loading the SBOM of project uuid "
+                                  f"{uuids[i]}: {e}")
+
+        return data_frames, errors
+
     def _get_project_components(self, project_uuid):
         # Code to retrieve SBOM for a project with the given UUID
 
@@ -199,47 +568,118 @@ class DependencyTrack:
         DataFrame with component information or None
         """
 
+        chunks = self._get_project_bom(project_uuid)
+        if chunks is None:
+            print("Error: Failed to retrieve SBOM data.")
+            return None
+
+        try:
+            # Parse the components while the BOM is downloaded
+            df = read_cyclonedx_components(chunks)
+
+            # Consume the rest of the BOM so that it is cached completely and the 
+            # connection can be reused
+            for _ in chunks:
+                pass
+        finally:
+            chunks.close()
+        return df
+
+    def _get_project_bom(self, project_uuid):
+        """
+        Retrieve the raw CycloneDX BOM of a project, using the local SBOM cache.
+
+        The cached BOM is used as long as the lastBomImport timestamp of the project
+        is unchanged. Otherwise the BOM is requested with the cached ETag and only
+        downloaded if Dependency Track reports a modification. In offline mode the
+        cached BOM is returned without any request.
+
+        Args:
+            project_uuid (str): The UUID of the project.
+
+        Returns:
+            iterator or None: Iterator over the byte chunks of the BOM or None if it
+                              is not available.
+        """
+        cache = self.sbom_cache
+        last_bom_import = self._get_last_bom_import(project_uuid)
+
+        if cache is not None and (self.offline or 
+                                  cache.is_valid(project_uuid, last_bom_import)):
+            chunks = cache.iter_chunks(project_uuid)
+            if chunks is not None or self.offline:
+                return chunks
+        elif self.offline:
+            logging.error(f"Offline mode: no cached SBOM for project uuid {project_uuid}")
+            return None
+
         # Set the headers with the API key
         headers = {
                     "accept": "application/vnd.cyclonedx+xml",
                     "X-Api-Key": self.API_KEY
                     }
+
+        # Revalidate the cached BOM with its ETag
+        metadata = cache.get_metadata(project_uuid) if cache is not None else None
+        if metadata is not None and metadata.get('etag'):
+            headers["If-None-Match"] = metadata['etag']
         
         # Make the API request to retrieve the SBOM data
         url = f"{self.DEPENDENCY_TRACK_API_URL}/bom/cyclonedx/project/{project_uuid}"  
         response = self._make_request(method='GET', 
                                       url=url, 
                                       verify=False, 
-                                      headers=headers)
+                                      headers=headers,
+                                      stream=True)
 
         # Check the response status
-        if (response is not None and response.status_code is not None 
-            and response.status_code == SUCCESS_STATUS_CODE):
-     
-            sbom_data = response.json()
-            try:
-                # Process the SBOM data as 
-                df = pd.DataFrame(sbom_data['components'])
-            except KeyError:
-                df = None
-            return df
-        else:
-            print("Error: Failed to retrieve SBOM data.")
+        if response is None or response.status_code is None:
+            return None
+
+        if response.status_code == NOT_MODIFIED_STATUS_CODE and metadata is not None:
+            response.close()
+            chunks = cache.iter_chunks(project_uuid)
+            if chunks is not None:
+                # Remember the new lastBomImport to skip the next revalidation
+                cache.update_metadata(project_uuid, last_bom_import, metadata.get('etag'))
+            return chunks
+
+        if response.status_code != SUCCESS_STATUS_CODE:
+            response.close()
+            return None
+
+        chunks = response.iter_content(chunk_size=self.BOM_CHUNK_SIZE)
+        if cache is not None:
+            chunks = cache.store_stream(project_uuid, chunks, last_bom_import, 
+                                        response.headers.get('ETag'))
+        return chunks
+
+    def _get_last_bom_import(self, project_uuid):
+        # Look up the lastBomImport timestamp of a project in project_info
+        if self.project_info is None:
+            return None
+        if getattr(self, '_indexed_project_info', None) is not self.project_info:
+            self._build_project_index()
+        value = self._bom_import_index.get(project_uuid)
+        if value is None or pd.isna(value):
             return None
+        # Epoch milliseconds (the column is float if some projects have no BOM)
+        return int(value)
 
-    def collect_all_scanner_data(self, project_name, project_version:None):
+    def collect_all_scanner_data(self, project_name, project_version:None, max_workers=None,
+                                 rules=None):
         # Code to collect all scanner data for a project
         # Use self.get_project_data and self.get_project_components
-
-        def extract_value(x, key):
-            if isinstance(x, list) and len(x) > 0 and isinstance(x[0], dict):
-                return x[0][key]
-            else:
-                return np.nan
+        # rules: name/version normalization rules per scanner (see
+        # normalize_artifact_names), defaults to SCANNER_RULES, {} keeps the names 
+        # as reported
 
         try:
             # get data of all scanners in 'scanner_names' for project 'project_name'
-            project_data_df = self._get_project_data(project_name, project_version)
+            project_data_df = self._get_project_data(project_name, project_version, 
+                                                     max_workers)
+        except RequestCancelled:
+            raise
         except Exception as e:
             # Handle the exception here
             project_data_df = None
@@ -253,8 +693,7 @@ class DependencyTrack:
 
             # Create a data frame 'data_df' with all scanner data for one project 
             data_df = {
-                name: project_data_df.loc[mask, ['scanner_name', 'name', 'version', 
-                                                   'purl', 'bom-ref', 'hashes']] 
+                name: project_data_df.loc[mask, self.COMPONENT_COLUMNS] 
                                                    for name, mask in 
                                                    zip(self.scanner_names, 
                                                        scanner_masks)}
@@ -267,20 +706,9 @@ class DependencyTrack:
                 df = data_df[scanner_name]
                 df.reset_index(drop=True, inplace=True)
 
-                # Evaluate hash_algo and hash_sum
-                df['hash_sum'] = df['hashes'].apply(lambda x: extract_value(x, 'content'))
-                df['hash_algo'] = df['hashes'].apply(lambda x: extract_value(x, 'alg'))
-
-                # Apply the parse_url function to each element of the 'purl' column
-                df_parsed = df['purl'].apply(self._parse_purl)
-
-                # Convert the parsed_data Series of dictionaries into a DataFrame
-                df_parsed_df = pd.DataFrame(df_parsed.to_list())
-
-                # Concatenate the parsed_df DataFrame with the original df DataFrame
-                df = pd.concat([df, df_parsed_df], axis=1)
-
                 # Add data frame for scanner_name to dictionary
+                df = self._normalize_components(df)
+                df = normalize_artifact_names(df, rules)
                 scanner_data[scanner_name] = df
 
             return scanner_data
@@ -299,32 +727,112 @@ class DependencyTrack:
                 print("Data frame project_info is not initialized")
                 logging.error("Data frame project_info is not initialized")
     
-    def _parse_purl(self, purl_string):
-        # Code to parse the purl and extract information
-    
-        try:
-            purl = PackageURL.from_string(purl_string)
-            purl_components = purl.to_dict()
-        except Exception as e:
-        # Handle any exceptions that occurred during parsing
-            warnings.warn(f"Error parsing PURL: {e}")
-            purl_components = {
-                'type': None,
-                'namespace': None,
-                'name': None,
-                'version': None,
-                'qualifiers': None,
-                'subpath': None
-            }  
-
-        return {f'p_{key}': value for key, value in purl_components.items()}
+    def collect_portfolio_scanner_data(self, projects, max_workers=None, rules=None):
+        """
+        Collects the scanner data of several projects into one long-format DataFrame.
+
+        The BOMs of all scanner projects of all projects are fetched together through
+        one bounded thread pool, every UUID only once. Hashes and PURLs are normalized
+        in one pass over the whole portfolio. The names and versions are normalized
+        with the rules of the scanners (e.g. the JFrog '.jar' file names are split into
+        name and version) before the 'name_version' key is built.
+
+        Args:
+            projects (list): (project_name, project_version) tuples, the version may
+                             be None.
+            max_workers (int, optional): Maximum number of concurrent SBOM downloads.
+                                         Defaults to self.max_workers.
+            rules (dict, optional): Normalization rules of every scanner. Defaults to
+                                    SCANNER_RULES, {} keeps the names as reported.
+
+        Returns:
+            pd.DataFrame or None: The component data of all projects and scanners with
+                the additional columns 'project_name', 'project_version',
+                'project_name_version' and 'name_version', or None if no data is
+                available.
+
+        Example:
+            >>> dt_instance = DependencyTrack()
+            >>> df = dt_instance.collect_portfolio_scanner_data([('WebGoat', None),
+            ...                                                  ('NMP', None)])
+        """
+        if self.project_info is None:
+            print("Project info is not available.")
+            logging.error("Project info is not available.")
+            return None
+
+        # Resolve the scanner projects of every project
+        jobs = {column: [] for column in self.PROJECT_COLUMNS + ['scanner_name', 'UUID']}
+        for project_name, project_version in projects:
+            if pd.isna(project_version):
+                project_version, project_name_version = None, project_name
+            else:
+                project_version = str(project_version)
+                project_name_version = f"{project_name}_{project_version}"
+
+            scanner_uuids = self._get_scanner_uuids(project_name, project_version)
+            for scanner_name, uuid in scanner_uuids or []:
+                jobs['project_name'].append(project_name)
+                jobs['project_version'].append(project_version)
+                jobs['project_name_version'].append(project_name_version)
+                jobs['scanner_name'].append(scanner_name)
+                jobs['UUID'].append(uuid)
+        jobs_df = (pd.DataFrame(jobs).astype({'project_version': 'string'})
+                     .drop_duplicates(ignore_index=True))
+
+        # Download every BOM only once
+        uuids = jobs_df['UUID'].drop_duplicates().tolist()
+        data_frames, self.fetch_errors = self._fetch_project_components(uuids, max_workers)
+
+        components = []
+        for uuid, df in zip(uuids, data_frames):
+            if df is None:
+                message = f"No component information available for project uuid {uuid}"
+                if uuid in self.fetch_errors:
+                    message += f": {self.fetch_errors[uuid]}"
+                print(message)
+                continue
+            components.append(df.assign(UUID=uuid))
+        if not components:
+            return None
+
+        components_df = pd.concat(components, ignore_index=True)
+        components_df = jobs_df.merge(components_df, on='UUID', how='inner')
+
+        components_df = self._normalize_components(
+            components_df[self.PROJECT_COLUMNS + self.COMPONENT_COLUMNS + ['UUID']])
+        components_df = normalize_artifact_names(components_df, rules)
+        # Add the artifact key
+        components_df['name_version'] = build_name_version(components_df['name'], 
+                                                           components_df['version'])
+
+        for column in ['project_name', 'project_name_version', 'scanner_name']:
+            components_df[column] = components_df[column].astype('category')
+        return components_df
+
+    def _normalize_components(self, df):
+        # Add the hash and PURL columns to the component data of the scanners
+        df = df.reset_index(drop=True)
+
+        # Evaluate hash_sum, hash_algo and one hash_<alg> column per algorithm
+        df_hashes_df = normalize_hashes(df['hashes'])
+
+        # Split the 'purl' column into the p_* component columns
+        df_parsed_df = parse_purls(df['purl'])
+
+        # Concatenate the parsed DataFrames with the original df DataFrame
+        return pd.concat([df, df_hashes_df, df_parsed_df], axis=1)
 
     def _make_request(self, method, url, verify=True, **kwargs):
         try:
-            session = requests.Session()
-            response = session.request(method=method, url=url, verify=verify, **kwargs)
+            # Reuse the pooled, retrying session shared by all API clients
+            response = self.session.request(method=method, url=url, verify=verify, 
+                                            **kwargs)
             response.raise_for_status()  # Raises an HTTPError for non-2xx responses
             return response
+        except RequestCancelled:
+            # The call was cancelled, stop instead of reporting a failed request
+            raise
         except requests.exceptions.RequestException as e:
             print(f"An error occurred while making the request:{e}")
             return None
@@ -0,0 +1,208 @@
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+import pandas as pd
+
+
+class FindingsStore:
+    """
+    Local SQLite store of the DefectDojo engagements, tests and findings.
+
+    Every DataFrame is stored in a table of the same name. The pandas dtype of every
+    column is recorded next to the data, so the frames are loaded with the same
+    types (e.g. nullable Int32) they were stored with. Lists and dictionaries (tags,
+    vulnerability ids, ...) are stored as JSON text. Small values such as the sync
+    watermark are kept in the table 'sync_state'.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def _connect(self):
+        # Open the database in one transaction that is committed on success
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            connection = sqlite3.connect(self.path)
+            try:
+                with connection:
+                    connection.execute("CREATE TABLE IF NOT EXISTS sync_state "
+                                       "(key TEXT PRIMARY KEY, value TEXT)")
+                    connection.execute("CREATE TABLE IF NOT EXISTS column_types "
+                                       "(table_name TEXT, column_name TEXT, "
+                                       "dtype TEXT, is_json INTEGER, "
+                                       "PRIMARY KEY (table_name, column_name))")
+                    yield connection
+            finally:
+                connection.close()
+
+    def get_state(self, key, default=None):
+        """
+        Returns a value of the sync state.
+
+        Args:
+            key (str): The name of the value, e.g. 'findings_watermark'.
+            default: Returned if the value is not set.
+
+        Returns:
+            The stored value or default.
+        """
+        if not os.path.exists(self.path):
+            return default
+        with self._connect() as connection:
+            row = connection.execute("SELECT value FROM sync_state WHERE key = ?",
+                                     (key,)).fetchone()
+        return default if row is None else json.loads(row[0])
+
+    def set_state(self, key, value):
+        """
+        Sets a value of the sync state.
+
+        Args:
+            key (str): The name of the value.
+            value: A JSON serializable value.
+        """
+        with self._connect() as connection:
+            connection.execute("INSERT OR REPLACE INTO sync_state VALUES (?, ?)",
+                               (key, json.dumps(value)))
+
+    def replace(self, table, df, key=None):
+        """
+        Replaces the content of a table by a DataFrame.
+
+        Args:
+            table (str): The name of the table.
+            df (DataFrame): The new content.
+            key (str, optional): Column with unique values used by upsert.
+        """
+        with self._connect() as connection:
+            connection.execute(f'DROP TABLE IF EXISTS "{table}"')
+            connection.execute("DELETE FROM column_types WHERE table_name = ?", (table,))
+            self._write(connection, table, df, key)
+
+    def upsert(self, table, df, key):
+        """
+        Inserts the rows of a DataFrame and replaces rows with the same key.
+
+        Columns that are new are added to the table, columns of the table that are
+        missing in df are NULL for the new rows.
+
+        Args:
+            table (str): The name of the table.
+            df (DataFrame): The new and updated rows.
+            key (str): Column with unique values, e.g. 'finding_id'.
+        """
+        with self._connect() as connection:
+            self._write(connection, table, df, key)
+
+    def delete(self, table, column, values):
+        """
+        Deletes the rows of a table whose column has one of the given values.
+
+        Args:
+            table (str): The name of the table.
+            column (str): The column to match, e.g. 'test_id'.
+            values (list): The values of the rows to delete.
+        """
+        values = [value.item() if hasattr(value, 'item') else value for value in values]
+        if not values or not os.path.exists(self.path):
+            return
+        with self._connect() as connection:
+            existing = [row[1] for row in 
+                        connection.execute(f'PRAGMA table_info("{table}")')]
+            if column not in existing:
+                return
+            connection.executemany(f'DELETE FROM "{table}" WHERE "{column}" = ?', 
+                                   [(value,) for value in values])
+
+    def _write(self, connection, table, df, key):
+        df = df.reset_index(drop=True)
+        if key is not None:
+            df = df.drop_duplicates(subset=[key], keep='last')
+
+        # Record the dtypes and serialize nested values as JSON text
+        records = []
+        data = {}
+        for column in df.columns:
+            values = df[column]
+            is_json = values.dtype == object and values.map(
+                lambda x: isinstance(x, (list, dict))).any()
+            if is_json:
+                values = values.map(lambda x: None if x is None or x is pd.NA
+                                    else json.dumps(x))
+            elif isinstance(values.dtype, pd.CategoricalDtype):
+                values = values.astype(object)
+            elif pd.api.types.is_datetime64_any_dtype(values.dtype):
+                values = values.map(lambda x: None if pd.isna(x) else x.isoformat())
+            records.append((table, column, str(df[column].dtype), int(is_json)))
+            data[column] = values.astype(object).where(values.notna(), None).tolist()
+
+        # Create the table or add the missing columns
+        existing = [row[1] for row in connection.execute(f'PRAGMA table_info("{table}")')]
+        if not existing:
+            columns = ', '.join(f'"{column}"' for column in df.columns)
+            if key is not None:
+                columns += f', PRIMARY KEY ("{key}")'
+            connection.execute(f'CREATE TABLE "{table}" ({columns})')
+        else:
+            for column in df.columns:
+                if column not in existing:
+                    connection.execute(f'ALTER TABLE "{table}" ADD COLUMN "{column}"')
+        # A column stays JSON once it held lists or dictionaries
+        connection.executemany("INSERT INTO column_types VALUES (?, ?, ?, ?) "
+                               "ON CONFLICT (table_name, column_name) DO UPDATE SET "
+                               "dtype = excluded.dtype, "
+                               "is_json = max(is_json, excluded.is_json)", records)
+
+        if len(df.columns):
+            columns = ', '.join(f'"{column}"' for column in df.columns)
+            placeholders = ', '.join('?' * len(df.columns))
+            connection.executemany(
+                f'INSERT OR REPLACE INTO "{table}" ({columns}) VALUES ({placeholders})',
+                zip(*data.values()))
+
+    def load(self, table, columns=None):
+        """
+        Loads a table with the dtypes it was stored with.
+
+        Args:
+            table (str): The name of the table.
+            columns (list, optional): The columns to load. Defaults to all columns.
+
+        Returns:
+            DataFrame or None: The content of the table or None if it does not exist.
+        """
+        if not os.path.exists(self.path):
+            return None
+        with self._connect() as connection:
+            types = {column: (dtype, is_json) for column, dtype, is_json in
+                     connection.execute("SELECT column_name, dtype, is_json FROM "
+                                        "column_types WHERE table_name = ?", (table,))}
+            existing = [row[1] for row in
+                        connection.execute(f'PRAGMA table_info("{table}")')]
+            if not existing:
+                return None
+            columns = [column for column in (columns or existing) if column in existing]
+            query = 'SELECT {} FROM "{}"'.format(
+                ', '.join(f'"{column}"' for column in columns), table)
+            df = pd.DataFrame(connection.execute(query).fetchall(), columns=columns, 
+                              dtype=object)
+
+        for column in columns:
+            dtype, is_json = types.get(column, ('object', 0))
+            if is_json:
+                df[column] = df[column].map(lambda x: json.loads(x) if isinstance(x, str) 
+                                            else None)
+                continue
+            try:
+                df[column] = df[column].astype(dtype)
+            except (TypeError, ValueError):
+                # Keep the column as loaded if it does not fit the recorded dtype
+                pass
+        return df
@@ -0,0 +1,146 @@
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from config import (
+    HTTP_BACKOFF_FACTOR,
+    HTTP_POOL_SIZE,
+    HTTP_RETRIES,
+    HTTP_RETRY_STATUS_CODES,
+    REQUEST_TIMEOUT,
+)
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Session shared by all API clients (created on first use)
+_shared_session = None
+_shared_session_lock = threading.Lock()
+
+# Cancel event of the current call, set by the asyncio front ends (see 
+# async_clients) and checked by GatedSession
+request_cancel_event = contextvars.ContextVar('request_cancel_event', default=None)
+
+
+class TimeoutHTTPAdapter(HTTPAdapter):
+    """
+    HTTPAdapter that applies a default timeout to every request.
+    """
+
+    def __init__(self, *args, timeout=REQUEST_TIMEOUT, **kwargs):
+        self.timeout = timeout
+        super().__init__(*args, **kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = self.timeout
+        return super().send(request, **kwargs)
+
+
+def create_session(pool_size=HTTP_POOL_SIZE, retries=HTTP_RETRIES, 
+                   backoff_factor=HTTP_BACKOFF_FACTOR, timeout=REQUEST_TIMEOUT):
+    """
+    Creates a requests session with a keep-alive connection pool and retries.
+
+    Args:
+        pool_size (int): Number of connections kept alive per host. Should be at
+                         least the number of concurrent requests.
+        retries (int): Number of retries on connection errors, 429 and 5xx responses.
+        backoff_factor (float): Factor for the exponential backoff between retries.
+        timeout (float or tuple): Default (connect, read) timeout in seconds.
+
+    Returns:
+        requests.Session: The configured session.
+    """
+    retry = Retry(total=retries,
+                  backoff_factor=backoff_factor,
+                  status_forcelist=HTTP_RETRY_STATUS_CODES,
+                  allowed_methods=None,            # retry all methods
+                  respect_retry_after_header=True,
+                  raise_on_status=False)           # return last response instead
+    adapter = TimeoutHTTPAdapter(pool_connections=pool_size, 
+                                 pool_maxsize=pool_size, 
+                                 max_retries=retry, 
+                                 timeout=timeout)
+
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def get_shared_session():
+    """
+    Returns the process-wide session shared by DependencyTrack and DefectDojoAnalyzer.
+
+    Returns:
+        requests.Session: The shared session.
+    """
+    global _shared_session
+    with _shared_session_lock:
+        if _shared_session is None:
+            _shared_session = create_session()
+        return _shared_session
+
+
+class RequestCancelled(requests.exceptions.RequestException):
+    """
+    Raised for requests that are started after their call was cancelled.
+    """
+
+
+class ContextThreadPoolExecutor(ThreadPoolExecutor):
+    """
+    ThreadPoolExecutor that runs every task in a copy of the submitting thread's 
+    context, so the requests of the workers see the cancel event of their call.
+    """
+
+    def submit(self, fn, /, *args, **kwargs):
+        context = contextvars.copy_context()
+        return super().submit(context.run, fn, *args, **kwargs)
+
+
+class RequestGate:
+    """
+    Limits the number of requests in flight across threads and clients.
+
+    One gate can be shared by several sessions, e.g. of a DependencyTrack and a
+    DefectDojoAnalyzer instance, so both together never exceed the limit.
+    """
+
+    def __init__(self, limit=HTTP_POOL_SIZE):
+        self.limit = limit
+        self._semaphore = threading.BoundedSemaphore(limit)
+
+    def __enter__(self):
+        self._semaphore.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._semaphore.release()
+
+
+class GatedSession:
+    """
+    Session wrapper that passes every request through a RequestGate.
+
+    Requests fail fast with RequestCancelled while the cancel event of the current
+    call (request_cancel_event) is set. All other attributes are those of the 
+    wrapped session.
+    """
+
+    def __init__(self, session, gate):
+        self.session = session
+        self.gate = gate
+
+    def request(self, method, url, **kwargs):
+        cancel_event = request_cancel_event.get()
+        if cancel_event is not None and cancel_event.is_set():
+            raise RequestCancelled(f"Request cancelled: {method} {url}")
+        with self.gate:
+            if cancel_event is not None and cancel_event.is_set():
+                raise RequestCancelled(f"Request cancelled: {method} {url}")
+            return self.session.request(method=method, url=url, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.session, name)
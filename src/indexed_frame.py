@@ -0,0 +1,112 @@
+import numpy as np
+import pandas as pd
+from text_index import TrigramIndex
+
+# Columns the notebooks filter the confusion matrix data by
+KEY_COLUMNS = ('project_name_version', 'scanner_name', 'flag', 'label')
+
+
+class IndexedFrame:
+    """
+    DataFrame with a group-offset index for repeated equality filters.
+
+    The values of every key column are interned into integer codes once. For every
+    combination of key columns that is queried, the rows are sorted by the codes of
+    these columns a single time; the rows of one combination of values are then a
+    contiguous block of the sorted frame, found with a binary search. A filter call
+    is O(log n) and returns a slice of the sorted frame instead of scanning and
+    copying all rows.
+
+    The returned rows keep their original index labels and order, like a boolean
+    mask filter on the original DataFrame.
+
+    Substring searches in text columns (e.g. 'name_version', 'purl',
+    'finding_title' or 'description') use a TrigramIndex per column, which is built
+    on the first search in the column.
+    """
+
+    def __init__(self, df, key_columns=KEY_COLUMNS):
+        self.frame = df
+        self.key_columns = [column for column in key_columns if column in df.columns]
+        self._codes = {}
+        self._lookups = {}
+        for column in self.key_columns:
+            codes, uniques = pd.factorize(df[column], sort=True)
+            # Code 0 is kept for missing values, which never match a filter
+            self._codes[column] = codes.astype(np.int64) + 1
+            self._lookups[column] = {value: code + 1 for code, value in enumerate(uniques)}
+        self._indexes = {}
+        self._text_indexes = {}
+
+    def __len__(self):
+        return len(self.frame)
+
+    @property
+    def columns(self):
+        return self.frame.columns
+
+    def select(self, **values):
+        """
+        Returns the rows whose key columns have the given values.
+
+        Args:
+            **values: The value of every key column to filter by, e.g.
+                      project_name_version='NMP', scanner_name='syft_cont'.
+
+        Returns:
+            DataFrame: The matching rows.
+
+        Raises:
+            ValueError: If a column is not a key column.
+        """
+        unknown = [column for column in values if column not in self.key_columns]
+        if unknown:
+            raise ValueError(f"{unknown} are not key columns of the index")
+        if not values:
+            return self.frame
+
+        # Columns in the order of the key columns, so every combination has one index
+        columns = tuple(column for column in self.key_columns if column in values)
+        sorted_frame, keys, strides = self._index(columns)
+
+        key = 0
+        for column, stride in zip(columns, strides):
+            code = self._lookups[column].get(values[column])
+            if code is None:
+                return sorted_frame.iloc[:0]
+            key += code * stride
+        start, stop = np.searchsorted(keys, [key, key + 1])
+        return sorted_frame.iloc[start:stop]
+
+    def text_index(self, column):
+        """
+        Returns the trigram index of a text column (built on first use).
+
+        Args:
+            column (str): The column.
+
+        Returns:
+            TrigramIndex: The index of the column.
+        """
+        if column not in self._text_indexes:
+            self._text_indexes[column] = TrigramIndex(self.frame[column])
+        return self._text_indexes[column]
+
+    def _index(self, columns):
+        # Sort the rows by the codes of the columns (built on first use)
+        if columns not in self._indexes:
+            strides = []
+            stride = 1
+            for column in reversed(columns):
+                strides.append(stride)
+                stride *= len(self._lookups[column]) + 1
+            if stride > np.iinfo(np.int64).max:
+                raise ValueError(f"Too many distinct values to index {list(columns)}")
+            strides = strides[::-1]
+
+            keys = np.zeros(len(self.frame), dtype=np.int64)
+            for column, stride in zip(columns, strides):
+                keys += self._codes[column] * stride
+            order = np.argsort(keys, kind='stable')
+            self._indexes[columns] = (self.frame.take(order), keys[order], strides)
+        return self._indexes[columns]
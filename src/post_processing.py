@@ -1,45 +1,125 @@
-def label_sbom_data(scanner_data_df):
+import numpy as np
+import pandas as pd
+from presence_matrix import LABELS, PresenceMatrix
 
-    # Reduce the number of columns
-    col_names = ['name', 'version', 'name_proc1_version']
-    scanner_data_df = scanner_data_df[col_names]
+# Scanners whose votes decide whether an artifact is a true positive
+REFERENCE_SCANNERS = ('gitlab_cont', 'jfrog_advanced_security_cont', 'syft_cont')
+# Minimum number of reference scanners that have to report an artifact
+VOTE_THRESHOLD = 2
 
-    # These 
-    keys_to_extract = ['gitlab_cont', 'jfrog_advanced_security_cont', 'syft_cont']
-    #
-    labeling_data_frames = {key: project_scanner_data[key][target_field] for key in keys_to_extract}
 
-    # create list with the 3 data frames that are the reference 
-    labeling_data_frames_list = list(labeling_data_frames.values())
+def label_sbom_data(scanner_data, target_field='name_version',
+                    reference_scanners=REFERENCE_SCANNERS, threshold=VOTE_THRESHOLD,
+                    scanner_names=None, group_by=None):
+    """
+    Labels the artifacts found by the scanners with a majority vote.
 
-    # Apply the labeling function to scanner_data_df
-    scanner_data_df['labeling'] = scanner_data_df.apply(lambda row: label_data(row, labeling_data_frames_list), axis=1)
+    All scanner results are turned into one artifact x scanner presence matrix. An
+    artifact is labeled 'TP' if at least threshold of the reference scanners
+    report it, otherwise 'FP'. The prediction of every scanner is 'P' if the
+    scanner reports the artifact and 'N' otherwise, and it is labeled 'TP', 'FP',
+    'FN' or 'TN' by comparing it with the majority vote.
 
-    # Add predictions from all scanners (pred_<scanner_name>
-    for col, df in zip(scanner_names, data_frames):
-        scanner_data_df[f'pred_{col}'] = scanner_data_df.apply(lambda row: 'P' if (df[target_field] == row[target_field]).any() else 'N', axis=1)
+    Args:
+        scanner_data (DataFrame or dict): Long DataFrame with the columns
+                                          'scanner_name' and target_field, or a
+                                          dictionary {scanner name: DataFrame} as
+                                          returned by collect_all_scanner_data.
+        target_field (str): The column that identifies an artifact.
+        reference_scanners (iterable): The scanners that vote.
+        threshold (int): Minimum number of votes for a 'TP'.
+        scanner_names (list, optional): The scanners to evaluate (in this order).
+                                        Defaults to the scanners in scanner_data
+                                        and the reference scanners.
+        group_by (str, optional): Column whose values are labeled separately,
+                                  e.g. 'project_name_version'.
 
-    # label the predictions of the scanners
-    return scanner_data_df.apply(eval_labels, axis=1, args=(scanner_names, ))
+    Returns:
+        DataFrame: One row per artifact (and group) with the columns 'votes',
+                   'labeling', 'pred_<scanner>' and 'label_<scanner>'.
+    """
+    scanner_data_df = _long_scanner_data(scanner_data, target_field, group_by)
+
+    # Scanners in the requested order, the reference scanners are always present
+    if scanner_names is None:
+        scanner_names = list(dict.fromkeys(
+            [*pd.unique(scanner_data_df['scanner_name'].dropna()), *reference_scanners]))
+    presence = PresenceMatrix.from_frame(scanner_data_df, target_field, 
+                                         scanner_names=scanner_names, group_by=group_by)
+
+    reference = [scanner for scanner in reference_scanners if scanner in scanner_names]
+    votes = presence.votes(reference)
+
+    labeled_df = presence.to_frame(target_field, group_by)[
+        ([group_by] if group_by else []) + [target_field]]
+    labeled_df['votes'] = votes
+    labeled_df['labeling'] = np.where(votes >= threshold, 'TP', 'FP')
+    predictions = {}
+    for scanner in scanner_names:
+        predictions[f'pred_{scanner}'] = np.where(presence.has(scanner), 'P', 'N')
+    labeled_df = pd.concat([labeled_df, pd.DataFrame(predictions)], axis=1)
+
+    return eval_labels(labeled_df, scanner_names)
 
 
 # Label the predictions A, B and C in label_A, label_B and label_C
-def eval_labels(row, scanner_names):
-    for col in scanner_names:
-        if row[f'pred_{col}'] == 'P' and row['labeling'] == 'TP':
-            row[f'label_{col}'] = 'TP'
-        elif row[f'pred_{col}'] == 'P' and row['labeling'] == 'FP':
-            row[f'label_{col}'] = 'FP'
-        elif row[f'pred_{col}'] == 'N' and row['labeling'] == 'TP':
-            row[f'label_{col}'] = 'FN'
-        elif row[f'pred_{col}'] == 'N' and row['labeling'] == 'FP':
-            row[f'label_{col}'] = 'TN'
-    return row
-
-
-# Helper function to label data
-# if 2 of 3 data frames have the same value it is labeled as TP
-def label_data(row, data_frames):
-    count_sum = sum((df == row['name_proc1_version']).any() for df in data_frames)
-    return 'TP' if count_sum >= 2 else 'FP'
+def eval_labels(labeled_df, scanner_names):
+    """
+    Labels the predictions of the scanners by comparing them with the majority vote.
+
+    'P' and 'TP' give 'TP', 'P' and 'FP' give 'FP', 'N' and 'TP' give 'FN' and 'N'
+    and 'FP' give 'TN'.
+
+    Args:
+        labeled_df (DataFrame): DataFrame with the columns 'labeling' and
+                                'pred_<scanner>'.
+        scanner_names (list): The scanners to label.
+
+    Returns:
+        DataFrame: labeled_df with a categorical column 'label_<scanner>' per scanner.
+    """
+    is_false = (labeled_df['labeling'] != 'TP').to_numpy()
+    labels = {}
+    for scanner in scanner_names:
+        is_negative = (labeled_df[f'pred_{scanner}'] != 'P').to_numpy()
+        codes = 2 * is_negative + is_false
+        labels[f'label_{scanner}'] = pd.Categorical.from_codes(codes, LABELS)
+    return labeled_df.assign(**labels)
+
+
+def count_labels(labeled_df, scanner_names=None):
+    """
+    Counts the TP, FP, FN and TN labels of every scanner.
+
+    Args:
+        labeled_df (DataFrame): The result of label_sbom_data.
+        scanner_names (list, optional): The scanners to count. Defaults to all
+                                        scanners with a 'label_<scanner>' column.
+
+    Returns:
+        DataFrame: One row per scanner with the columns 'TP', 'FP', 'FN' and 'TN'.
+    """
+    if scanner_names is None:
+        scanner_names = [column[len('label_'):] for column in labeled_df.columns
+                         if column.startswith('label_')]
+    counts = [np.bincount(pd.Categorical(labeled_df[f'label_{scanner}'],
+                                         categories=LABELS).codes,
+                          minlength=len(LABELS))
+              for scanner in scanner_names]
+    return pd.DataFrame(np.array(counts, dtype=np.int64).reshape(-1, len(LABELS)),
+                        index=pd.Index(scanner_names, name='scanner_name'),
+                        columns=LABELS)
+
+
+def _long_scanner_data(scanner_data, target_field, group_by=None):
+    # Bring the scanner results into one long frame with 'scanner_name'
+    columns = ['scanner_name', target_field] + ([group_by] if group_by else [])
+    if isinstance(scanner_data, dict):
+        data_frames = [df[[column for column in columns if column != 'scanner_name']]
+                       .assign(scanner_name=scanner)
+                       for scanner, df in scanner_data.items() if df is not None]
+        if not data_frames:
+            return pd.DataFrame(columns=columns)
+        return pd.concat(data_frames, ignore_index=True)
+    return scanner_data[columns]
 
@@ -0,0 +1,419 @@
+import numpy as np
+import pandas as pd
+
+# Maximum number of scanners (bits of the masks)
+MAX_SCANNERS = 64
+# Maximum number of scanners whose exclusive regions are all counted at once
+MAX_REGION_SCANNERS = 20
+# Labels of the scanner predictions in the order of their codes
+LABELS = ['TP', 'FP', 'FN', 'TN']
+
+
+def _popcount(masks):
+    # Number of set bits of every mask
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(masks).astype(np.int64)
+    bits = np.unpackbits(masks.view(np.uint8).reshape(-1, 8), axis=1)
+    return bits.sum(axis=1, dtype=np.int64)
+
+
+def marginalize_regions(counts, positions):
+    """
+    Derives the region counts of a subset of the scanners from all region counts.
+
+    Args:
+        counts (numpy.ndarray): Counts of all 2**n regions (see region_counts) in
+                                the last axis.
+        positions (list): The positions of the subset's scanners in the bit order of
+                          counts.
+
+    Returns:
+        numpy.ndarray: The counts of the 2**len(positions) regions in the last axis.
+    """
+    counts = np.asarray(counts, dtype=np.int64)
+    patterns = np.arange(counts.shape[-1])
+    sub_patterns = np.zeros(len(patterns), dtype=np.int64)
+    for j, position in enumerate(positions):
+        sub_patterns |= ((patterns >> position) & 1) << j
+    sub_counts = np.zeros(counts.shape[:-1] + (2**len(positions),), dtype=np.int64)
+    np.add.at(sub_counts.T, sub_patterns, counts.T)
+    return sub_counts
+
+
+class PresenceMatrix:
+    """
+    Artifact x scanner presence matrix with one bitmask per artifact.
+
+    The artifacts (e.g. 'name_version' strings) are interned: every row holds the
+    integer id of an artifact in self.artifacts and a uint64 mask whose bit i is set
+    if self.scanner_names[i] reported the artifact. With group_by, every group (e.g.
+    project) has its own rows and self.group_ids refers to self.groups.
+
+    Set operations, vote counts and confusion counts are computed on the masks, so
+    the artifact strings are only touched when the matrix is built and when names
+    are returned.
+    """
+
+    def __init__(self, artifacts, scanner_names, artifact_ids, masks, groups=None,
+                 group_ids=None):
+        if len(scanner_names) > MAX_SCANNERS:
+            raise ValueError(f"At most {MAX_SCANNERS} scanners are supported")
+        self.artifacts = pd.Index(artifacts)
+        self.scanner_names = list(scanner_names)
+        self.artifact_ids = np.asarray(artifact_ids, dtype=np.int64)
+        self.masks = np.asarray(masks, dtype=np.uint64)
+        self.groups = None if groups is None else pd.Index(groups)
+        self.group_ids = None if group_ids is None else np.asarray(group_ids,
+                                                                   dtype=np.int64)
+
+    @classmethod
+    def from_frame(cls, df, artifact_field='name_version', scanner_field='scanner_name',
+                   scanner_names=None, group_by=None):
+        """
+        Builds the presence matrix from a long DataFrame of scanner results.
+
+        Rows without artifact and rows of scanners that are not in scanner_names are
+        ignored.
+
+        Args:
+            df (DataFrame): One row per artifact reported by a scanner.
+            artifact_field (str): The column that identifies an artifact.
+            scanner_field (str): The column with the scanner name.
+            scanner_names (list, optional): The scanners (bit order). Defaults to
+                                            the scanners in df.
+            group_by (str, optional): Column whose values get separate rows, e.g.
+                                      'project_name_version'.
+
+        Returns:
+            PresenceMatrix: The presence matrix.
+        """
+        df = df[df[artifact_field].notna()]
+        if scanner_names is None:
+            scanner_names = pd.unique(df[scanner_field].dropna())
+        scanner_names = list(dict.fromkeys(scanner_names))
+        scanner_codes = pd.Index(scanner_names).get_indexer(df[scanner_field])
+        is_known = scanner_codes >= 0
+
+        artifact_codes, artifacts = pd.factorize(df[artifact_field])
+        if group_by is not None:
+            group_codes, groups = pd.factorize(df[group_by], use_na_sentinel=False)
+        else:
+            group_codes, groups = np.zeros(len(df), dtype=np.int64), None
+
+        # One row per (group, artifact), OR-ing the bits of all its scanners
+        row_keys = group_codes.astype(np.int64) * len(artifacts) + artifact_codes
+        row_keys, inverse = np.unique(row_keys[is_known], return_inverse=True)
+        masks = np.zeros(len(row_keys), dtype=np.uint64)
+        bits = np.left_shift(np.uint64(1), scanner_codes[is_known].astype(np.uint64))
+        np.bitwise_or.at(masks, inverse, bits)
+
+        return cls(np.asarray(artifacts, dtype=object), scanner_names,
+                   row_keys % max(len(artifacts), 1), masks,
+                   None if groups is None else np.asarray(groups, dtype=object),
+                   None if groups is None else row_keys // max(len(artifacts), 1))
+
+    def __len__(self):
+        return len(self.masks)
+
+    def bits(self, scanners):
+        """
+        Returns the mask with the bits of the given scanners.
+
+        Args:
+            scanners (str or iterable): One or several scanner names.
+
+        Returns:
+            numpy.uint64: The mask.
+
+        Raises:
+            ValueError: If a scanner is not part of the matrix.
+        """
+        if isinstance(scanners, str):
+            scanners = [scanners]
+        mask = 0
+        for scanner in scanners:
+            if scanner not in self.scanner_names:
+                raise ValueError(f"Unknown scanner '{scanner}', expected one of "
+                                 f"{self.scanner_names}")
+            mask |= 1 << self.scanner_names.index(scanner)
+        return np.uint64(mask)
+
+    def has(self, scanner):
+        """
+        Returns a boolean array telling which rows were reported by a scanner.
+        """
+        return (self.masks & self.bits(scanner)) != 0
+
+    def votes(self, scanners=None):
+        """
+        Counts for every row how many of the given scanners reported it.
+
+        Args:
+            scanners (iterable, optional): The voting scanners. Defaults to all.
+
+        Returns:
+            numpy.ndarray: The number of votes per row.
+        """
+        if scanners is None:
+            return _popcount(self.masks)
+        return _popcount(self.masks & self.bits(scanners))
+
+    def select(self, include=(), exclude=()):
+        """
+        Selects the rows reported by all scanners in include and none in exclude.
+
+        Args:
+            include (iterable): Scanners that must have reported the artifact.
+            exclude (iterable): Scanners that must not have reported the artifact.
+
+        Returns:
+            numpy.ndarray: Boolean array with one value per row.
+        """
+        include_bits = self.bits(include)
+        return (((self.masks & include_bits) == include_bits) &
+                ((self.masks & self.bits(exclude)) == 0))
+
+    def artifact_names(self, rows=None):
+        """
+        Returns the artifact names of the selected rows.
+
+        Args:
+            rows (array, optional): Boolean array or row positions. Defaults to all.
+
+        Returns:
+            numpy.ndarray: The artifact names.
+        """
+        artifact_ids = self.artifact_ids if rows is None else self.artifact_ids[rows]
+        return self.artifacts.to_numpy()[artifact_ids]
+
+    def union(self, *scanners):
+        """
+        Returns the artifacts reported by any of the scanners.
+        """
+        return self.artifact_names((self.masks & self.bits(scanners)) != 0)
+
+    def intersection(self, *scanners):
+        """
+        Returns the artifacts reported by all of the scanners.
+        """
+        return self.artifact_names(self.select(include=scanners))
+
+    def difference(self, scanner, *others):
+        """
+        Returns the artifacts reported by scanner but by none of the others.
+        """
+        return self.artifact_names(self.select(include=[scanner], exclude=others))
+
+    def difference_counts(self, scanners=None, by_group=False):
+        """
+        Counts the rows of every ordered pair of scanners that only the first one of
+        the pair reported.
+
+        Args:
+            scanners (list, optional): The scanners. Defaults to all scanners.
+            by_group (bool): Count the rows of every group separately.
+
+        Returns:
+            numpy.ndarray: Array whose value [i, j] is the number of rows reported by
+                           scanners[i] but not by scanners[j], or one such array per
+                           group with by_group.
+        """
+        scanners = self.scanner_names if scanners is None else list(scanners)
+        bits = np.stack([self.has(scanner) for scanner in scanners], axis=1).astype(
+            np.int64).reshape(len(self.masks), len(scanners))
+        if by_group:
+            n_groups = len(self.groups)
+            order = np.argsort(self.group_ids, kind='stable')
+            starts = np.searchsorted(self.group_ids[order], np.arange(n_groups + 1))
+        else:
+            n_groups = 1
+            order = np.arange(len(self.masks))
+            starts = [0, len(self.masks)]
+
+        # Rows of i minus the rows of both i and j
+        counts = np.empty((n_groups, len(scanners), len(scanners)), dtype=np.int64)
+        for group in range(n_groups):
+            group_bits = bits[order[starts[group]:starts[group + 1]]]
+            counts[group] = group_bits.sum(axis=0)[:, np.newaxis] - group_bits.T @ group_bits
+        return counts if by_group else counts[0]
+
+    def region_counts(self, scanners=None, by_group=False):
+        """
+        Counts the rows of every exclusive region of the given scanners.
+
+        The region of a row is the number whose bit j is set if scanners[j]
+        reported it, e.g. with scanners ['A', 'B'] position 1 counts the rows only
+        reported by A and position 3 the rows reported by both. Position 0 counts
+        the rows that none of the scanners reported.
+
+        All regions are counted in one pass over the masks; regions of a subset of
+        the scanners are derived from these counts.
+
+        Args:
+            scanners (list, optional): The scanners. Defaults to all scanners.
+            by_group (bool): Count the regions of every group separately.
+
+        Returns:
+            numpy.ndarray: Array of length 2**len(scanners) with the row counts, or
+                           one such row per group with by_group.
+        """
+        scanners = self.scanner_names if scanners is None else list(scanners)
+        n_groups = len(self.groups) if by_group else 1
+        group_ids = self.group_ids if by_group else np.zeros(len(self.masks), 
+                                                              dtype=np.int64)
+
+        if len(self.scanner_names) > MAX_REGION_SCANNERS:
+            # Too many regions to count all of them, count the requested ones
+            patterns = np.zeros(len(self.masks), dtype=np.int64)
+            for j, scanner in enumerate(scanners):
+                patterns |= self.has(scanner).astype(np.int64) << j
+            n_regions = 2**len(scanners)
+            counts = np.bincount(group_ids * n_regions + patterns, 
+                                 minlength=n_groups * n_regions)
+            counts = counts.reshape(n_groups, n_regions)
+        else:
+            n_regions = 2**len(self.scanner_names)
+            counts = np.bincount(group_ids * n_regions + self.masks.astype(np.int64), 
+                                 minlength=n_groups * n_regions)
+            counts = counts.reshape(n_groups, n_regions)
+            if scanners != self.scanner_names:
+                counts = marginalize_regions(counts, [self.scanner_names.index(scanner) 
+                                                      for scanner in scanners])
+        return counts if by_group else counts[0]
+
+    def overlap_regions(self, scanners=None, drop_empty=False):
+        """
+        Returns the sizes of all exclusive regions of the scanners as a tidy frame.
+
+        Every region is a combination of scanners: its artifacts were reported by
+        exactly the scanners whose column is True. With groups, the regions are
+        counted per group.
+
+        Args:
+            scanners (list, optional): The scanners. Defaults to all scanners.
+            drop_empty (bool): Drop the regions without artifacts.
+
+        Returns:
+            DataFrame: One row per region (and group) with one boolean column per
+                       scanner, 'degree' (number of scanners) and 'size', sorted by
+                       descending size.
+        """
+        scanners = self.scanner_names if scanners is None else list(scanners)
+        n_regions = 2**len(scanners)
+        if self.groups is None:
+            counts = self.region_counts(scanners)[np.newaxis, :]
+        else:
+            counts = self.region_counts(scanners, by_group=True)
+
+        # Region 0 holds the artifacts of none of the scanners
+        patterns = np.arange(1, n_regions)
+        data = {}
+        if self.groups is not None:
+            data['group'] = np.repeat(self.groups.to_numpy(), len(patterns))
+        for j, scanner in enumerate(scanners):
+            data[scanner] = np.tile((patterns >> j) & 1, len(counts)).astype(bool)
+        data['degree'] = np.tile(_popcount(patterns.astype(np.uint64)), len(counts))
+        data['size'] = counts[:, 1:].ravel()
+
+        regions_df = pd.DataFrame(data)
+        if drop_empty:
+            regions_df = regions_df[regions_df['size'] > 0]
+        sort_columns = (['group'] if self.groups is not None else []) + ['size']
+        return regions_df.sort_values(sort_columns, ascending=[True] * (
+            len(sort_columns) - 1) + [False], kind='stable', ignore_index=True)
+
+    def subset(self, group):
+        """
+        Returns the matrix of one group.
+
+        Args:
+            group: A value of the group_by column.
+
+        Returns:
+            PresenceMatrix: The rows of the group (without groups).
+        """
+        if self.groups is None:
+            raise ValueError("The matrix has no groups")
+        positions = np.flatnonzero(self.groups.isin([group]))
+        rows = np.isin(self.group_ids, positions)
+        return PresenceMatrix(self.artifacts, self.scanner_names,
+                              self.artifact_ids[rows], self.masks[rows])
+
+    def confusion_counts(self, reference_scanners, threshold, scanners=None):
+        """
+        Counts the TP, FP, FN and TN of every scanner against a majority vote.
+
+        A row is a true artifact if at least threshold of the reference scanners
+        reported it.
+
+        Args:
+            reference_scanners (iterable): The voting scanners.
+            threshold (int): Minimum number of votes of a true artifact.
+            scanners (list, optional): The scanners to count. Defaults to all.
+
+        Returns:
+            DataFrame: One row per scanner with the columns 'TP', 'FP', 'FN', 'TN'.
+        """
+        scanners = self.scanner_names if scanners is None else list(scanners)
+        is_false = self.votes(reference_scanners) < threshold
+        counts = [np.bincount(2 * ~self.has(scanner) + is_false, minlength=len(LABELS))
+                  for scanner in scanners]
+        return pd.DataFrame(np.array(counts, dtype=np.int64).reshape(-1, len(LABELS)),
+                            index=pd.Index(scanners, name='scanner_name'),
+                            columns=LABELS)
+
+    def to_frame(self, artifact_field='name_version', group_by='group'):
+        """
+        Returns the matrix as a DataFrame with one boolean column per scanner.
+
+        Args:
+            artifact_field (str): The name of the artifact column.
+            group_by (str): The name of the group column (if the matrix has groups).
+
+        Returns:
+            DataFrame: One row per matrix row.
+        """
+        data = {}
+        if self.groups is not None:
+            data[group_by] = self.groups.to_numpy()[self.group_ids]
+        data[artifact_field] = self.artifact_names()
+        for scanner in self.scanner_names:
+            data[scanner] = self.has(scanner)
+        return pd.DataFrame(data)
+
+    def save(self, path):
+        """
+        Saves the matrix to a compressed .npz file.
+
+        Args:
+            path (str): The file path.
+        """
+        arrays = {'artifacts': self.artifacts.astype(str).to_numpy(dtype=str),
+                  'scanner_names': np.array(self.scanner_names, dtype=str),
+                  'artifact_ids': self.artifact_ids,
+                  'masks': self.masks}
+        if self.groups is not None:
+            arrays['groups'] = self.groups.astype(str).to_numpy(dtype=str)
+            arrays['groups_isna'] = self.groups.isna()
+            arrays['group_ids'] = self.group_ids
+        np.savez_compressed(path, **arrays)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Loads a matrix saved with save().
+
+        Args:
+            path (str): The file path.
+
+        Returns:
+            PresenceMatrix: The matrix.
+        """
+        with np.load(path, allow_pickle=False) as arrays:
+            groups = group_ids = None
+            if 'groups' in arrays:
+                groups = arrays['groups'].astype(object)
+                groups[arrays['groups_isna']] = None
+                group_ids = arrays['group_ids']
+            return cls(arrays['artifacts'].astype(object), arrays['scanner_names'].tolist(),
+                       arrays['artifact_ids'], arrays['masks'], groups, group_ids)
@@ -0,0 +1,155 @@
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import matplotlib
+import pandas as pd
+from config import RENDER_MANIFEST_PATH
+from visualization import (_output_folder, create_SBOM_confusion_matrix,
+                           create_SBOM_similarity_plot)
+
+# Columns the plots depend on, only these are hashed and sent to the workers
+SIMILARITY_COLUMNS = ['scanner_name', 'name_version', 'version']
+CONFUSION_COLUMNS = ['scanner_name', 'flag', 'label']
+
+
+def render_project_reports(scanner_data_agg_df=None, confusion_matrix_agg_df=None, 
+                           max_workers=None, force=False, 
+                           manifest_path=RENDER_MANIFEST_PATH):
+    """
+    Renders the SBOM similarity plot and the confusion matrix of every project.
+
+    The figures are rendered in worker processes on the headless Agg backend and
+    saved to the output folder of the project like the notebooks do. The hash of
+    the data of every plot is recorded in a manifest; a plot is skipped if its
+    data did not change since it was rendered and the file still exists.
+
+    Args:
+        scanner_data_agg_df (DataFrame, optional): The aggregated scanner data with
+                                                   'project_name' and
+                                                   'project_version'.
+        confusion_matrix_agg_df (DataFrame, optional): The result of
+                                                       evaluate_confusion_matrix.
+        max_workers (int, optional): Number of worker processes. Defaults to the
+                                     number of CPUs.
+        force (bool): Render all plots, even if their data did not change.
+        manifest_path (str): The file with the data hashes of the rendered plots.
+
+    Returns:
+        DataFrame: One row per plot with the columns 'project', 'output_file' and
+                   'status' ('rendered', 'unchanged' or 'failed').
+    """
+    jobs = []
+    if scanner_data_agg_df is not None:
+        jobs += _similarity_jobs(scanner_data_agg_df)
+    if confusion_matrix_agg_df is not None:
+        jobs += _confusion_jobs(confusion_matrix_agg_df)
+
+    manifest = _load_manifest(manifest_path)
+    results = []
+    pending = []
+    for job in jobs:
+        project, output_path, data_hash, _, _ = job
+        if (not force and manifest.get(output_path) == data_hash 
+                and os.path.exists(output_path)):
+            results.append((project, output_path, 'unchanged'))
+        else:
+            pending.append(job)
+
+    if pending:
+        # Spawned workers start without the backend and threads of the notebook
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=context, 
+                                 initializer=_init_worker) as executor:
+            futures = {executor.submit(_render, *job[3:]): job for job in pending}
+            for future in as_completed(futures):
+                project, output_path, data_hash, _, _ = futures[future]
+                try:
+                    future.result()
+                except Exception as e:
+                    print(f"Error: Failed to render {output_path}: {e}")
+                    logging.error(f"Failed to render {output_path}: {e}")
+                    manifest.pop(output_path, None)
+                    results.append((project, output_path, 'failed'))
+                    continue
+                manifest[output_path] = data_hash
+                results.append((project, output_path, 'rendered'))
+        _save_manifest(manifest_path, manifest)
+
+    return pd.DataFrame(results, columns=['project', 'output_file', 'status'])
+
+
+def _similarity_jobs(scanner_data_agg_df):
+    # One SBOM similarity plot per project name and version
+    jobs = []
+    columns = ['project_name', 'project_version'] + SIMILARITY_COLUMNS
+    for (project_name, project_version), scanner_data_df in scanner_data_agg_df[
+            columns].groupby(['project_name', 'project_version'], dropna=False, 
+                             observed=True, sort=False):
+        if pd.isna(project_version):
+            project = project_name
+            output_file = f"SBOM_comparison_{project_name}.png"
+        else:
+            project = f"{project_name}_{project_version}"
+            output_file = f"SBOM_comparison_{project_name}_{project_version}.png"
+        scanner_data_df = scanner_data_df[SIMILARITY_COLUMNS].reset_index(drop=True)
+        output_path = os.path.join(_output_folder(project_name, project_version), 
+                                   output_file)
+        jobs.append((project, output_path, _data_hash(scanner_data_df), 
+                     create_SBOM_similarity_plot, 
+                     (project_name, project_version, scanner_data_df, output_file)))
+    return jobs
+
+
+def _confusion_jobs(confusion_matrix_agg_df):
+    # One confusion matrix plot per project
+    jobs = []
+    columns = ['project_name_version'] + CONFUSION_COLUMNS
+    for project_name_version, scanner_data_df in confusion_matrix_agg_df[
+            columns].groupby('project_name_version', observed=True, sort=False):
+        output_file = f"SBOM_confusion_matrix_{project_name_version}.png"
+        scanner_data_df = scanner_data_df[CONFUSION_COLUMNS].reset_index(drop=True)
+        output_path = os.path.join(_output_folder(project_name_version, None), 
+                                   output_file)
+        jobs.append((project_name_version, output_path, _data_hash(scanner_data_df), 
+                     create_SBOM_confusion_matrix, 
+                     (project_name_version, scanner_data_df, output_file)))
+    return jobs
+
+
+def _data_hash(df):
+    # Hash of the values and the column names of the plot data
+    digest = hashlib.sha256(','.join(map(str, df.columns)).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def _load_manifest(manifest_path):
+    try:
+        with open(manifest_path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_manifest(manifest_path, manifest):
+    # Write to a temporary file first, an interrupted write keeps the old manifest
+    directory = os.path.dirname(manifest_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp_path = f"{manifest_path}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(temp_path, manifest_path)
+
+
+def _init_worker():
+    # Render without a display
+    matplotlib.use('Agg', force=True)
+
+
+def _render(function, args):
+    function(*args, show=False)
@@ -0,0 +1,222 @@
+import gzip
+import json
+import logging
+import os
+import threading
+
+import pandas as pd
+
+
+class SBOMCache:
+    """
+    Persistent on-disk cache of raw CycloneDX BOM payloads.
+
+    Every project UUID is stored as a gzip compressed payload (<uuid>.json.gz) and a
+    small metadata file (<uuid>.meta.json) holding the lastBomImport timestamp and
+    ETag of the cached BOM. An entry is valid as long as the lastBomImport of the
+    project did not change. The least recently used entries are evicted once the
+    compressed payloads exceed max_size_bytes. The project catalogue is kept next to
+    the BOMs, so the cache can be used in offline mode.
+
+    The cache directory is created on the first write.
+    """
+
+    PAYLOAD_SUFFIX = ".json.gz"
+    META_SUFFIX = ".meta.json"
+    CATALOGUE_FILE = "_catalogue.json"
+
+    def __init__(self, cache_dir, max_size_bytes=2 * 1024**3):
+        self.cache_dir = cache_dir
+        self.max_size_bytes = max_size_bytes
+        self._lock = threading.Lock()
+
+    def _payload_path(self, project_uuid):
+        return os.path.join(self.cache_dir, f"{project_uuid}{self.PAYLOAD_SUFFIX}")
+
+    def _meta_path(self, project_uuid):
+        return os.path.join(self.cache_dir, f"{project_uuid}{self.META_SUFFIX}")
+
+    def get_metadata(self, project_uuid):
+        """
+        Returns the metadata of a cached BOM.
+
+        Args:
+            project_uuid (str): The UUID of the project.
+
+        Returns:
+            dict or None: Dictionary with 'last_bom_import' and 'etag' or None if
+                          the project is not cached.
+        """
+        try:
+            with open(self._meta_path(project_uuid), encoding='utf-8') as f:
+                metadata = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if not os.path.exists(self._payload_path(project_uuid)):
+            return None
+        return metadata
+
+    def is_valid(self, project_uuid, last_bom_import):
+        """
+        Checks whether the cached BOM of a project is still up to date.
+
+        Args:
+            project_uuid (str): The UUID of the project.
+            last_bom_import: The current lastBomImport timestamp of the project or
+                             None if unknown.
+
+        Returns:
+            bool: True if the cached BOM was stored for the same lastBomImport.
+        """
+        metadata = self.get_metadata(project_uuid)
+        if metadata is None or last_bom_import is None:
+            return False
+        return metadata.get('last_bom_import') == last_bom_import
+
+    def iter_chunks(self, project_uuid, chunk_size=64 * 1024):
+        """
+        Returns an iterator over the raw BOM payload of a project in the cache.
+
+        Args:
+            project_uuid (str): The UUID of the project.
+            chunk_size (int): Number of uncompressed bytes per chunk.
+
+        Returns:
+            iterator or None: Iterator of bytes or None if the project is not cached.
+        """
+        path = self._payload_path(project_uuid)
+        try:
+            f = gzip.open(path, 'rb')
+        except OSError as e:
+            logging.error(f"Failed to read cached SBOM of project uuid {project_uuid}: {e}")
+            return None
+
+        # Mark the entry as recently used for the eviction
+        os.utime(path)
+        return self._read_chunks(f, chunk_size)
+
+    @staticmethod
+    def _read_chunks(f, chunk_size):
+        with f:
+            while chunk := f.read(chunk_size):
+                yield chunk
+
+    def store_stream(self, project_uuid, chunks, last_bom_import=None, etag=None):
+        """
+        Passes through a stream of BOM chunks and stores it in the cache.
+
+        The entry is only written once the stream is exhausted, so a partially
+        consumed or failed download never ends up in the cache.
+
+        Args:
+            project_uuid (str): The UUID of the project.
+            chunks (iterable): Iterable of bytes with the BOM payload.
+            last_bom_import: The lastBomImport timestamp of the project.
+            etag (str): The ETag returned by Dependency Track.
+
+        Yields:
+            bytes: The chunks of the payload.
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._payload_path(project_uuid)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        complete = False
+        try:
+            with gzip.open(tmp_path, 'wb', compresslevel=6) as f:
+                for chunk in chunks:
+                    f.write(chunk)
+                    yield chunk
+            complete = True
+        finally:
+            if complete:
+                os.replace(tmp_path, path)
+                self.update_metadata(project_uuid, last_bom_import, etag)
+                self._evict()
+            elif os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def store(self, project_uuid, payload, last_bom_import=None, etag=None):
+        """
+        Stores the raw BOM payload of a project in the cache.
+
+        Args:
+            project_uuid (str): The UUID of the project.
+            payload (bytes): The uncompressed BOM payload.
+            last_bom_import: The lastBomImport timestamp of the project.
+            etag (str): The ETag returned by Dependency Track.
+        """
+        for _ in self.store_stream(project_uuid, [payload], last_bom_import, etag):
+            pass
+
+    def update_metadata(self, project_uuid, last_bom_import=None, etag=None):
+        """
+        Updates the metadata of a cached BOM, e.g. after a successful revalidation.
+
+        Args:
+            project_uuid (str): The UUID of the project.
+            last_bom_import: The lastBomImport timestamp of the project.
+            etag (str): The ETag returned by Dependency Track.
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        metadata = {'last_bom_import': last_bom_import, 'etag': etag}
+        path = self._meta_path(project_uuid)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(metadata, f)
+        os.replace(tmp_path, path)
+
+    def store_catalogue(self, project_info):
+        """
+        Stores the project catalogue next to the cached BOMs.
+
+        Args:
+            project_info (DataFrame): The catalogue (Name, Version, UUID, 
+                                      LastBomImport).
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = os.path.join(self.cache_dir, self.CATALOGUE_FILE)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        project_info.to_json(tmp_path, orient='records')
+        os.replace(tmp_path, path)
+
+    def load_catalogue(self):
+        """
+        Loads the project catalogue stored with store_catalogue.
+
+        Returns:
+            DataFrame or None: The catalogue or None if none is stored.
+        """
+        path = os.path.join(self.cache_dir, self.CATALOGUE_FILE)
+        try:
+            return pd.read_json(path, orient='records', dtype=False, 
+                                convert_dates=False)
+        except (OSError, ValueError) as e:
+            logging.error(f"Failed to read the cached project catalogue: {e}")
+            return None
+
+    def _evict(self):
+        # Remove least recently used payloads until the cache fits into max_size_bytes
+        with self._lock:
+            entries = []
+            for file_name in os.listdir(self.cache_dir):
+                if not file_name.endswith(self.PAYLOAD_SUFFIX):
+                    continue
+                try:
+                    stat = os.stat(os.path.join(self.cache_dir, file_name))
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size,
+                                file_name[:-len(self.PAYLOAD_SUFFIX)]))
+
+            total_size = sum(size for _, size, _ in entries)
+            for _, size, project_uuid in sorted(entries):
+                if total_size <= self.max_size_bytes:
+                    break
+                for path in (self._payload_path(project_uuid),
+                             self._meta_path(project_uuid)):
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+                total_size -= size
@@ -0,0 +1,308 @@
+import logging
+import warnings
+from functools import lru_cache
+from itertools import chain
+
+import numpy as np
+import pandas as pd
+from packageurl import PackageURL
+
+# Components of a package URL and the columns they are stored in
+PURL_COMPONENTS = ('type', 'namespace', 'name', 'version', 'qualifiers', 'subpath')
+PURL_COLUMNS = [f'p_{key}' for key in PURL_COMPONENTS]
+
+# Maximum number of distinct PURLs kept in the process-wide parse cache
+PURL_CACHE_SIZE = 2**18
+
+# Package types whose namespace, name and version are not rewritten by the
+# PackageURL normalization as long as they only contain the characters matched by
+# _SIMPLE_PURL_PATTERN. Only these types use the vectorized fast path.
+_FAST_PATH_TYPES = ('maven', 'golang', 'deb', 'rpm', 'generic', 'gem', 'nuget',
+                    'cargo', 'conan', 'conda', 'cocoapods', 'swift', 'npm', 'pypi')
+
+# Types that lowercase namespace and name; for them the fast path is restricted to
+# lowercase PURLs (pypi also replaces '_' which is excluded below)
+_LOWERCASE_TYPES = ('npm', 'pypi')
+
+# pkg:<type>/<namespace>/<name>@<version> without qualifiers, subpath or escapes
+_SIMPLE_PURL_PATTERN = (
+    r'pkg:(?P<type>[a-z][a-z0-9.-]*)/'
+    r'(?:(?P<namespace>@?[A-Za-z0-9._~-]+(?:/[A-Za-z0-9._~-]+)*)/)?'
+    r'(?P<name>[A-Za-z0-9._~-]+)'
+    r'@(?P<version>[A-Za-z0-9._~+-]+)'
+)
+
+
+@lru_cache(maxsize=PURL_CACHE_SIZE)
+def _parse_purl_string(purl_string):
+    # Parse a single PURL with PackageURL (raises ValueError for invalid PURLs)
+    purl_components = PackageURL.from_string(purl_string).to_dict()
+    return tuple(purl_components[key] for key in PURL_COMPONENTS)
+
+
+def _parse_simple_purls(purls):
+    # Vectorized split of the well-formed PURLs; returns a frame with one column per
+    # component and NaN rows for PURLs that have to go through PackageURL
+    is_simple = purls.str.fullmatch(_SIMPLE_PURL_PATTERN)
+    extracted = purls[is_simple].str.extract(_SIMPLE_PURL_PATTERN)
+
+    supported = extracted['type'].isin(_FAST_PATH_TYPES)
+    is_lowercase_type = extracted['type'].isin(_LOWERCASE_TYPES)
+    has_upper = (extracted['name'].str.contains(r'[A-Z_]', regex=True) |
+                 extracted['namespace'].fillna('').str.contains(r'[A-Z]', regex=True))
+    extracted = extracted[supported & ~(is_lowercase_type & has_upper)]
+    return extracted
+
+
+def parse_purls(purls):
+    """
+    Parses a Series of package URLs into the p_type, p_namespace, p_name, p_version,
+    p_qualifiers and p_subpath columns.
+
+    Every distinct PURL is parsed only once. Simple PURLs of common package types
+    are split with vectorized string operations, all other PURLs are parsed with
+    PackageURL through a process-wide bounded cache. PURLs that cannot be parsed
+    get None in all columns and are reported in one aggregated warning.
+
+    Args:
+        purls (Series): The package URLs.
+
+    Returns:
+        DataFrame: The PURL components with the same index as purls.
+    """
+    codes, uniques = pd.factorize(purls, use_na_sentinel=True)
+    uniques = pd.Series(np.asarray(uniques, dtype=object), dtype=object)
+
+    # One row per distinct PURL, plus a last row of None for missing PURLs
+    values = np.full((len(uniques) + 1, len(PURL_COMPONENTS)), None, dtype=object)
+
+    simple = _parse_simple_purls(uniques.astype(str))
+    for i, key in enumerate(PURL_COMPONENTS[:4]):
+        values[simple.index, i] = simple[key].astype(object).where(
+            simple[key].notna(), None).to_numpy()
+
+    failed = []
+    remaining = np.setdiff1d(np.arange(len(uniques)), simple.index.to_numpy())
+    for position in remaining:
+        try:
+            values[position] = _parse_purl_string(uniques.iat[position])
+        except (ValueError, TypeError) as e:
+            failed.append(position)
+            logging.debug(f"Error parsing PURL {uniques.iat[position]!r}: {e}")
+
+    codes = np.where(codes < 0, len(uniques), codes)
+    n_failed = int(np.isin(codes, failed).sum()) + int((codes == len(uniques)).sum())
+    if n_failed:
+        warnings.warn(f"Error parsing PURL: {n_failed} of {len(codes)} PURLs are "
+                      f"missing or invalid ({len(failed)} distinct invalid values)")
+
+    return pd.DataFrame(values[codes], index=purls.index, columns=PURL_COLUMNS)
+
+
+def explode_hashes(hashes):
+    """
+    Explodes the CycloneDX hashes of all components into one long table.
+
+    Args:
+        hashes (Series): Lists of {'alg': ..., 'content': ...} dictionaries, one per
+                         component.
+
+    Returns:
+        DataFrame: One row per hash entry with the columns 'component' (position of
+                   the component in hashes), 'entry' (position of the hash in the
+                   list of the component), 'alg' and 'content'.
+    """
+    values = hashes.to_numpy()
+    is_list = np.fromiter((isinstance(x, list) for x in values), dtype=bool, 
+                          count=len(values))
+    lists = values[is_list]
+    lengths = np.fromiter(map(len, lists), dtype=np.int64, count=len(lists))
+
+    # Flatten all entries once and number them within their component
+    entries = np.empty(lengths.sum(), dtype=object)
+    entries[:] = list(chain.from_iterable(lists))
+    component = np.repeat(np.flatnonzero(is_list), lengths)
+    entry = np.arange(len(entries)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+
+    is_dict = np.fromiter((isinstance(x, dict) for x in entries), dtype=bool, 
+                          count=len(entries))
+    entries = entries[is_dict]
+    return pd.DataFrame({'component': component[is_dict],
+                         'entry': entry[is_dict],
+                         'alg': pd.Series([x.get('alg') for x in entries], dtype=object),
+                         'content': pd.Series([x.get('content') for x in entries], 
+                                              dtype=object)})
+
+
+def _hash_column_name(alg):
+    # 'SHA-256' -> 'hash_sha256'
+    return 'hash_' + ''.join(c for c in str(alg).lower() if c.isalnum())
+
+
+def normalize_hashes(hashes):
+    """
+    Derives the hash columns of the components from their CycloneDX hashes.
+
+    'hash_sum' and 'hash_algo' hold the first hash of every component. In addition
+    there is one 'hash_<alg>' column per algorithm (e.g. 'hash_sha1' and
+    'hash_sha256'), so components with several digests can be compared by any of
+    them.
+
+    Args:
+        hashes (Series): Lists of {'alg': ..., 'content': ...} dictionaries, one per
+                         component.
+
+    Returns:
+        DataFrame: The hash columns with the same index as hashes.
+    """
+    long_df = explode_hashes(hashes)
+
+    hash_df = pd.DataFrame(index=pd.RangeIndex(len(hashes)))
+    first_df = long_df[long_df['entry'] == 0].set_index('component')
+    hash_df['hash_sum'] = first_df['content'].reindex(hash_df.index)
+    hash_df['hash_algo'] = first_df['alg'].reindex(hash_df.index)
+
+    long_df = long_df.dropna(subset=['alg'])
+    if not long_df.empty:
+        # Algorithms that only differ in spelling end up in the same column
+        column_names = {alg: _hash_column_name(alg) for alg in long_df['alg'].unique()}
+        long_df = long_df.assign(column=long_df['alg'].map(column_names))
+        wide_df = (long_df.drop_duplicates(subset=['component', 'column'])
+                          .pivot(index='component', columns='column', values='content'))
+        hash_df = hash_df.join(wide_df)
+
+    hash_df.index = hashes.index
+    return hash_df
+
+
+def build_name_version(names, versions):
+    """
+    Builds the 'name_version' artifact key '<last part of name>:<version>'.
+
+    Only the part of the name after the last ':' is used, missing versions are
+    replaced by an empty string. Every distinct name, version and pair of both is
+    processed only once.
+
+    Args:
+        names (Series): The component names.
+        versions (Series): The component versions.
+
+    Returns:
+        Series: The artifact keys.
+    """
+    if len(names) == 0:
+        return pd.Series(index=names.index, dtype=str)
+    name_codes, name_uniques = pd.factorize(names, use_na_sentinel=False)
+    version_codes, version_uniques = pd.factorize(versions, use_na_sentinel=False)
+    pair_codes, pairs = pd.factorize(name_codes.astype(np.int64) * len(version_uniques) 
+                                     + version_codes)
+    name_codes, version_codes = np.divmod(pairs, max(len(version_uniques), 1))
+
+    short_names = pd.Series(name_uniques, dtype=names.dtype).astype(str).str.rsplit(
+        ':', n=1).str[-1]
+    versions_str = pd.Series(version_uniques, dtype=versions.dtype).fillna('').astype(str)
+    keys = (short_names.iloc[name_codes].reset_index(drop=True) + ':' + 
+            versions_str.iloc[version_codes].reset_index(drop=True))
+    return pd.Series(keys.to_numpy()[pair_codes], index=names.index, dtype=keys.dtype)
+
+
+# '<name>-<version>' where the version starts with the first '-' separated part
+# that only consists of digits, '.' and '_' (e.g. 'spring-core-5.3.20' or
+# 'log4j-api-2.17.1-SNAPSHOT')
+_JAR_NAME_PATTERN = r'(?P<name>.*?)-(?P<version>[._]*\d[\d._]*(?:-.*)?)'
+
+
+def split_jar_names(names):
+    """
+    Splits JFrog file names like 'commons-io-2.11.0.jar' into name and version.
+
+    The '.jar' suffix is removed and the version starts with the first '-'
+    separated part that only consists of digits, '.' and '_'. Every distinct name
+    is split only once.
+
+    Args:
+        names (Series): The component names.
+
+    Returns:
+        DataFrame: The columns 'new_name' and 'new_version' with the same index as
+                   names. Both are None for names that are not '.jar' files,
+                   'new_version' is None for '.jar' files without a version.
+    """
+    codes, uniques = pd.factorize(names)
+    uniques = pd.Series(np.asarray(uniques, dtype=object), dtype=object).astype(str)
+
+    is_jar = uniques.str.endswith('.jar')
+    stems = uniques[is_jar].str[:-len('.jar')]
+    parts = stems.str.extract(f'^{_JAR_NAME_PATTERN}$')
+
+    # One row per distinct name, plus a last row of None for missing names
+    new_names = np.full(len(uniques) + 1, None, dtype=object)
+    new_versions = np.full(len(uniques) + 1, None, dtype=object)
+    new_names[stems.index] = parts['name'].where(parts['name'].notna(), stems).to_numpy()
+    new_versions[stems.index] = parts['version'].astype(object).where(
+        parts['version'].notna(), None).to_numpy()
+
+    codes = np.where(codes < 0, len(uniques), codes)
+    return pd.DataFrame({'new_name': new_names[codes], 'new_version': new_versions[codes]},
+                        index=names.index, dtype=object)
+
+
+def normalize_jar_names(df):
+    """
+    Replaces the name and version of '.jar' components by the parts of their name.
+
+    Args:
+        df (DataFrame): Component data with the columns 'name' and 'version'.
+
+    Returns:
+        DataFrame: A copy of df with the normalized 'name' and 'version'.
+    """
+    split_df = split_jar_names(df['name'])
+    return df.assign(
+        name=df['name'].astype(object).mask(split_df['new_name'].notna(), 
+                                            split_df['new_name']),
+        version=df['version'].astype(object).mask(split_df['new_version'].notna(), 
+                                                  split_df['new_version']))
+
+
+# Normalization rules of every scanner, applied in order by normalize_artifact_names
+SCANNER_RULES = {
+    'jfrog_advanced_security_cont': (normalize_jar_names,),
+    'jfrog_cont': (normalize_jar_names,),
+}
+
+
+def normalize_artifact_names(df, rules=None, scanner_field='scanner_name'):
+    """
+    Applies the name and version normalization rules of the scanners.
+
+    A rule is a function that takes the component data of one scanner and returns
+    it with normalized 'name' and 'version' columns, e.g. normalize_jar_names.
+
+    Args:
+        df (DataFrame): Component data of one or several scanners.
+        rules (dict, optional): The rules of every scanner name. Defaults to
+                                SCANNER_RULES.
+        scanner_field (str): The column with the scanner names.
+
+    Returns:
+        DataFrame: df with the normalized 'name' and 'version' of the scanners that
+                   have rules.
+    """
+    rules = SCANNER_RULES if rules is None else rules
+    scanners = [scanner for scanner in rules if rules[scanner]]
+    is_ruled = df[scanner_field].isin(scanners).to_numpy()
+    if not is_ruled.any():
+        return df
+
+    df = df.assign(name=df['name'].astype(object), version=df['version'].astype(object))
+    for scanner in scanners:
+        mask = (df[scanner_field] == scanner).to_numpy()
+        if not mask.any():
+            continue
+        scanner_df = df.loc[mask]
+        for rule in rules[scanner]:
+            scanner_df = rule(scanner_df)
+        df.loc[mask, 'name'] = scanner_df['name'].to_numpy()
+        df.loc[mask, 'version'] = scanner_df['version'].to_numpy()
+    return df
@@ -0,0 +1,229 @@
+import base64
+import json
+import os
+import shutil
+from datetime import datetime, timezone
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+from config import SNAPSHOT_DIR
+from pyarrow import fs
+
+# Version of the snapshot layout, snapshots of other versions are not loaded
+SNAPSHOT_SCHEMA_VERSION = 2
+
+# Column with the position of every row in the saved frame
+ROW_COLUMN = '__row'
+
+# Columns the snapshots are partitioned by (if the frame has them)
+PARTITION_COLUMNS = ('project_name_version', 'scanner_name')
+
+
+class SnapshotStore:
+    """
+    Local Parquet snapshots of the aggregated frames, e.g. scanner_data_agg_df and
+    confusion_matrix_agg_df.
+
+    Every snapshot is a directory <root>/<name> with one Parquet file per project
+    and scanner (hive partitioning project_name_version=.../scanner_name=...) and a
+    file '_snapshot.json' with the schema version, the Arrow schema and the pandas
+    dtypes. Dictionary columns such as 'p_qualifiers' are stored as map<string,
+    string>, lists such as 'hashes' as lists of structs, so they are loaded as
+    dictionaries and lists again. Object columns that mix other types (e.g. numbers
+    and strings) are stored as strings. The position of every row is stored as well,
+    the rows are loaded in the order they were saved.
+
+    The files are read memory mapped, only the requested columns are read and
+    filters on the partition columns skip the files of the other projects and
+    scanners, so one project can be analysed without loading the portfolio.
+    """
+
+    METADATA_FILE = '_snapshot.json'
+
+    def __init__(self, root=SNAPSHOT_DIR):
+        self.root = root
+        self._filesystem = fs.LocalFileSystem(use_mmap=True)
+
+    def _path(self, name):
+        return os.path.join(self.root, name)
+
+    def save(self, name, df, partition_cols=PARTITION_COLUMNS):
+        """
+        Saves a DataFrame as a snapshot and replaces an existing one of the same name.
+
+        Args:
+            name (str): The name of the snapshot, e.g. 'scanner_data_agg'.
+            df (DataFrame): The frame to save.
+            partition_cols (tuple): The columns to partition by; columns that df does
+                                    not have are skipped.
+
+        Returns:
+            str: The directory of the snapshot.
+        """
+        partition_cols = [column for column in partition_cols if column in df.columns]
+        df = df.reset_index(drop=True)
+        map_columns = [column for column in df.columns if _holds(df[column], dict)]
+
+        table, string_columns = _to_arrow(df, partition_cols, map_columns)
+        table = table.append_column(ROW_COLUMN, pa.array(range(len(df)), pa.int64()))
+        metadata = {
+            'schema_version': SNAPSHOT_SCHEMA_VERSION,
+            'created': datetime.now(timezone.utc).isoformat(),
+            'rows': len(df),
+            'columns': list(df.columns),
+            'dtypes': {column: str(dtype) for column, dtype in df.dtypes.items()},
+            'partition_cols': partition_cols,
+            'map_columns': map_columns,
+            'string_columns': string_columns,
+            # Arrow schema of the files, an empty snapshot has no file to read it from
+            'arrow_schema': base64.b64encode(table.schema.serialize()).decode('ascii'),
+        }
+
+        # Write to a temporary directory first, an interrupted save keeps the old
+        # snapshot
+        path = self._path(name)
+        temp_path = f"{path}.tmp"
+        shutil.rmtree(temp_path, ignore_errors=True)
+        ds.write_dataset(
+            table, temp_path, format='parquet', filesystem=self._filesystem,
+            partitioning=self._partitioning(partition_cols),
+            existing_data_behavior='overwrite_or_ignore',
+            basename_template='part-{i}.parquet')
+        os.makedirs(temp_path, exist_ok=True)
+        with open(os.path.join(temp_path, self.METADATA_FILE), 'w', encoding='utf-8') as f:
+            json.dump(metadata, f, indent=2)
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(temp_path, path)
+        return path
+
+    def info(self, name):
+        """
+        Returns the metadata of a snapshot.
+
+        Args:
+            name (str): The name of the snapshot.
+
+        Returns:
+            dict or None: The schema version, creation time, number of rows, columns
+                          and dtypes, or None if the snapshot does not exist.
+        """
+        try:
+            with open(os.path.join(self._path(name), self.METADATA_FILE),
+                      encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def load(self, name, columns=None, projects=None, scanners=None, filters=None):
+        """
+        Loads a snapshot or a part of it.
+
+        Args:
+            name (str): The name of the snapshot.
+            columns (list, optional): The columns to load. Defaults to all columns.
+            projects (list, optional): The values of 'project_name_version' to load.
+            scanners (list, optional): The values of 'scanner_name' to load.
+            filters (pyarrow.compute.Expression, optional): Additional row filter,
+                                                            e.g. ds.field('flag') == 1.
+
+        Returns:
+            DataFrame or None: The rows of the snapshot with the dtypes it was saved
+                               with, or None if the snapshot does not exist.
+
+        Raises:
+            ValueError: If the snapshot has a different schema version.
+        """
+        metadata = self.info(name)
+        if metadata is None:
+            return None
+        if metadata['schema_version'] != SNAPSHOT_SCHEMA_VERSION:
+            raise ValueError(f"Snapshot '{name}' has schema version "
+                             f"{metadata['schema_version']}, expected "
+                             f"{SNAPSHOT_SCHEMA_VERSION}")
+
+        schema = pa.ipc.read_schema(pa.py_buffer(
+            base64.b64decode(metadata['arrow_schema'])))
+        dataset = ds.dataset(self._path(name), format='parquet', schema=schema,
+                             filesystem=self._filesystem,
+                             partitioning=self._partitioning(metadata['partition_cols']))
+
+        # Filters on the partition columns skip whole files
+        expression = filters
+        for column, values in [('project_name_version', projects),
+                               ('scanner_name', scanners)]:
+            if values is not None:
+                condition = ds.field(column).isin(list(values))
+                expression = condition if expression is None else expression & condition
+
+        columns = [column for column in (columns or metadata['columns'])
+                   if column in metadata['columns']]
+        # Restore the order of the saved rows (the files are read per partition)
+        table = dataset.to_table(columns=columns + [ROW_COLUMN], filter=expression)
+        table = table.sort_by(ROW_COLUMN).drop_columns([ROW_COLUMN])
+        df = table.to_pandas(maps_as_pydicts='strict')
+        # Lists are loaded as numpy arrays, keep them lists like in the saved frame
+        for field in table.schema:
+            if pa.types.is_list(field.type) or pa.types.is_large_list(field.type):
+                df[field.name] = pd.Series(table.column(field.name).to_pylist(), 
+                                           dtype=object)
+
+        for column in columns:
+            dtype = metadata['dtypes'][column]
+            if str(df[column].dtype) == dtype:
+                continue
+            try:
+                df[column] = df[column].astype(dtype)
+            except (TypeError, ValueError):
+                # Keep the column as loaded if it does not fit the recorded dtype
+                pass
+        return df
+
+    @staticmethod
+    def _partitioning(partition_cols):
+        # Hive partitioning with string values (e.g. a project '2023' stays a string)
+        if not partition_cols:
+            return None
+        return ds.partitioning(pa.schema([(column, pa.string()) for column in partition_cols]),
+                               flavor='hive')
+
+
+def _holds(values, value_type):
+    # Whether an object column holds values of the given type
+    return values.dtype == object and values.map(
+        lambda x: isinstance(x, value_type)).any()
+
+
+def _to_arrow(df, partition_cols, map_columns):
+    # Convert the frame, dictionaries become map<string, string> and the partition
+    # columns plain strings. Returns the table and the object columns of mixed types 
+    # that were converted to strings
+    arrays = {}
+    string_columns = []
+    for column in df.columns:
+        values = df[column]
+        if column in partition_cols:
+            arrays[column] = pa.array(values.astype(object).where(values.notna(), None),
+                                      type=pa.string())
+        elif column in map_columns:
+            arrays[column] = pa.array(
+                [{str(key): None if value is None else str(value)
+                  for key, value in x.items()} if isinstance(x, dict) else None
+                 for x in values], type=pa.map_(pa.string(), pa.string()))
+        elif values.dtype == object:
+            # Missing values of lists (e.g. hashes) are NaN in pandas
+            values = [x if isinstance(x, (list, dict)) or not _is_missing(x) else None
+                      for x in values]
+            try:
+                arrays[column] = pa.array(values, from_pandas=True)
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                arrays[column] = pa.array([None if x is None else str(x) for x in values],
+                                          type=pa.string())
+                string_columns.append(column)
+        else:
+            arrays[column] = pa.Array.from_pandas(values)
+    return pa.table(arrays), string_columns
+
+
+def _is_missing(x):
+    return x is None or (isinstance(x, float) and x != x) or x is pd.NA
@@ -0,0 +1,185 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+# Characters that make a pattern a regular expression instead of a literal
+REGEX_METACHARACTERS = set('.^$*+?{}[]\\|()')
+
+
+class TrigramIndex:
+    """
+    Trigram index for substring and regex searches in a text column.
+
+    The values are interned first: every distinct value is stored once together
+    with the positions of its rows, and only the distinct values are indexed and
+    searched. For every trigram (three consecutive characters of the lowercased
+    values) the index holds the sorted ids of the values that contain it.
+
+    A literal search intersects the postings of the pattern's trigrams and only
+    checks the remaining candidates. Patterns shorter than three characters and
+    regular expressions are checked against the distinct values, alternations of
+    literals ('secret|token|password') are searched literal by literal.
+    """
+
+    def __init__(self, values):
+        codes, uniques = pd.factorize(pd.Series(values, dtype=object))
+        self.values = [str(value) for value in uniques]
+        self._lower_values = [value.lower() for value in self.values]
+
+        # Rows of every distinct value (missing values have code -1)
+        self._row_order = np.argsort(codes, kind='stable')
+        self._row_starts = np.searchsorted(codes[self._row_order],
+                                           np.arange(len(self.values) + 1))
+
+        # Posting list of every trigram, the value ids are ascending
+        (self._alphabet, self._gram_keys, self._posting_starts,
+         self._postings) = _trigram_postings(self._lower_values)
+
+    def search(self, pattern, regex=True, case=True):
+        """
+        Returns the rows whose value contains the pattern (like str.contains).
+
+        Args:
+            pattern (str): The string or regular expression to search for.
+            regex (bool): Treat the pattern as a regular expression.
+            case (bool): Search case sensitive.
+
+        Returns:
+            numpy.ndarray: The ascending positions of the matching rows.
+        """
+        return self._rows(self._matching_values(pattern, regex, case))
+
+    def search_many(self, patterns, regex=False, case=True):
+        """
+        Searches several patterns at once.
+
+        Literal patterns are looked up in the index, all other patterns are checked
+        in one pass over the distinct values.
+
+        Args:
+            patterns (list): The strings or regular expressions to search for.
+            regex (bool): Treat the patterns as regular expressions.
+            case (bool): Search case sensitive.
+
+        Returns:
+            dict: The ascending positions of the matching rows for every pattern.
+        """
+        matches = {}
+        expressions = {}
+        for pattern in patterns:
+            literals = _literals(pattern) if regex else [pattern]
+            if literals is None:
+                expressions[pattern] = re.compile(pattern, 0 if case else re.IGNORECASE)
+            else:
+                matches[pattern] = self._literal_values(literals, case)
+
+        if expressions:
+            value_ids = {pattern: [] for pattern in expressions}
+            for value_id, value in enumerate(self.values):
+                for pattern, expression in expressions.items():
+                    if expression.search(value):
+                        value_ids[pattern].append(value_id)
+            matches.update(value_ids)
+
+        return {pattern: self._rows(matches[pattern]) for pattern in patterns}
+
+    def _matching_values(self, pattern, regex, case):
+        # Ids of the distinct values that contain the pattern
+        literals = _literals(pattern) if regex else [pattern]
+        if literals is not None:
+            return self._literal_values(literals, case)
+        expression = re.compile(pattern, 0 if case else re.IGNORECASE)
+        return [value_id for value_id, value in enumerate(self.values)
+                if expression.search(value)]
+
+    def _literal_values(self, literals, case):
+        # Ids of the distinct values that contain any of the literals
+        values = self.values if case else self._lower_values
+        value_ids = set()
+        for literal in literals:
+            literal = literal if case else literal.lower()
+            candidates = self._candidates(literal.lower())
+            value_ids.update(value_id for value_id in candidates
+                             if literal in values[value_id])
+        return sorted(value_ids)
+
+    def _candidates(self, literal):
+        # Values that contain all trigrams of the literal
+        points = _code_points(literal)
+        points = points[points != 0]
+        if len(points) < 3:
+            return range(len(self.values))
+        ranks = np.searchsorted(self._alphabet, points)
+        if (ranks >= len(self._alphabet)).any() or (self._alphabet[ranks] != points).any():
+            return []
+        gram_keys = np.sort(_trigram_keys(ranks, len(self._alphabet)))
+        positions = np.searchsorted(self._gram_keys, gram_keys)
+        if ((positions >= len(self._gram_keys)).any() 
+                or (self._gram_keys[positions] != gram_keys).any()):
+            return []
+        postings = sorted((self._postings[self._posting_starts[position]:
+                                          self._posting_starts[position + 1]]
+                           for position in positions), key=len)
+        candidates = postings[0]
+        for posting in postings[1:]:
+            candidates = np.intersect1d(candidates, posting, assume_unique=True)
+        return candidates.tolist()
+
+    def _rows(self, value_ids):
+        # Row positions of the distinct values in the original order
+        if len(value_ids) == 0:
+            return np.array([], dtype=np.int64)
+        rows = [self._row_order[self._row_starts[value_id]:self._row_starts[value_id + 1]]
+                for value_id in value_ids]
+        return np.sort(np.concatenate(rows))
+
+
+def _code_points(text):
+    # Unicode code points of a string
+    return np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32).astype(np.int64)
+
+
+def _trigram_keys(points, size):
+    # Trigrams of code points (ranks in an alphabet of the given size) as integers
+    return (points[:-2] * size + points[1:-1]) * size + points[2:]
+
+
+def _trigram_postings(values):
+    # Alphabet, trigram keys, posting offsets and value ids of the values, computed
+    # on the code points of all values joined with \0
+    points = _code_points('\0'.join(values) + '\0')
+    lengths = np.array([len(value) + 1 for value in values], dtype=np.int64)
+    value_ids = np.repeat(np.arange(len(values), dtype=np.int64), lengths)
+
+    # Rank of every character in the alphabet of the values, \0 has rank 0
+    is_used = np.bincount(points) > 0
+    is_used[0] = True
+    alphabet = np.flatnonzero(is_used)
+    ranks = (np.cumsum(is_used) - 1)[points]
+    size = len(alphabet)
+    n_values = max(len(values), 1)
+    if size**3 * n_values >= 2**63:
+        raise ValueError("Too many distinct characters and values to index")
+
+    keys = _trigram_keys(ranks, size)
+    is_valid = (ranks[:-2] != 0) & (ranks[1:-1] != 0) & (ranks[2:] != 0)
+
+    # Sort the distinct (trigram, value) pairs as one integer each
+    pairs = np.sort(keys[is_valid] * n_values + value_ids[:-2][is_valid])
+    is_first = np.ones(len(pairs), dtype=bool)
+    is_first[1:] = pairs[1:] != pairs[:-1]
+    keys, value_ids = np.divmod(pairs[is_first], n_values)
+    is_first = np.ones(len(keys), dtype=bool)
+    is_first[1:] = keys[1:] != keys[:-1]
+    starts = np.append(np.flatnonzero(is_first), len(keys))
+    return alphabet, keys[is_first], starts, value_ids
+
+
+def _literals(pattern):
+    # The literals of a regular expression that is a literal or an alternation of
+    # literals, None for all other expressions
+    alternatives = pattern.split('|')
+    if any(REGEX_METACHARACTERS & set(alternative) for alternative in alternatives):
+        return None
+    return alternatives
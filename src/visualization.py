@@ -2,89 +2,62 @@ import copy
 import os
 
 import matplotlib.pyplot as plt
+import numpy as np
 import pandas as pd
 from matplotlib.patches import Patch
 from matplotlib_venn import venn2, venn3
+from presence_matrix import PresenceMatrix, marginalize_regions
 from sklearn import metrics
 
 
-def _create_plot_data(set_values):
+# Scanners of the sets A to E of the SBOM similarity plot
+SIMILARITY_SCANNERS = {
+    'A': 'gitlab_cont',
+    'B': 'jfrog_advanced_security_cont',
+    'C': 'jfrog_cont',
+    'D': 'syft_cont',
+    'E': 'trivy_cont'
+}
 
-    # grab input sets
-    A = set_values['A']
-    B = set_values['B']
-    C = set_values['C']
-    D = set_values['D']
-    E = set_values['E']
+# Legend entries of the known scanners
+SCANNER_LEGENDS = {
+    'gitlab_cont': 'Gitlab',
+    'jfrog_advanced_security_cont': 'JFrog Advanced Security',
+    'jfrog_cont': 'JFrog Xray',
+    'syft_cont': 'Syft',
+    'trivy_cont': 'Trivy'
+}
 
-    # Define the intersection sizes
-    A_not_B = A - B
-    B_not_C = B - C
-    C_not_D = C - D
-    D_not_E = D - E
 
-    B_not_A = B - A
-    C_not_B = C - B
-    D_not_C = D - C
-    E_not_D = E - D
-    
-    A_and_B = A & B
-    B_and_C = B & C
-    C_and_D = C & D
-    D_and_E = D & E
-    A & D 
-    B & D
-
-    A_not_B_union_D = A - (B | D)
-    B_not_A_union_D = B - (A | D)
-    A_and_B_minus_D = (A & B) - D
-    D_not_A_union_B = D - (A | B)
-    A_and_D_minus_B = (A & D) - B
-    B_and_D_minus_A = (B & D) - A
-    A_and_B_and_D = (A & B) & D 
-    
-    # Define the sizes of the datasets
-    len(A)
-    len(B)
-    len(C)
-    len(D)
-    len(E)
-    
-    size_A_not_B = len(A_not_B)
-    size_B_not_C = len(B_not_C)
-    size_C_not_D = len(C_not_D)
-    size_D_not_E = len(D_not_E)
-
-    size_B_not_A = len(B_not_A)
-    size_C_not_B = len(C_not_B)
-    size_D_not_C = len(D_not_C)
-    size_E_not_D = len(E_not_D)
-
-    size_A_and_B = len(A_and_B)
-    size_B_and_C = len(B_and_C)
-    size_C_and_D = len(C_and_D)
-    size_D_and_E = len(D_and_E)
-
-    set_A_not_B_union_D = len(A_not_B_union_D)
-    set_B_not_A_union_D = len(B_not_A_union_D)
-    set_A_and_B_minus_D = len(A_and_B_minus_D)
-    set_D_not_A_union_B = len(D_not_A_union_B)
-    set_A_and_D_minus_B = len(A_and_D_minus_B)
-    set_B_and_D_minus_A = len(B_and_D_minus_A)
-    set_A_and_B_and_D = len(A_and_B_and_D)
-
-    return {
-        'AB':  (size_A_not_B, size_B_not_A, size_A_and_B),
-        'BC':  (size_B_not_C, size_C_not_B, size_B_and_C),
-        'CD':  (size_C_not_D, size_D_not_C, size_C_and_D),
-        'DE':  (size_D_not_E, size_E_not_D, size_D_and_E),
-        'ABD': (set_A_not_B_union_D, set_B_not_A_union_D, set_A_and_B_minus_D,
-                set_D_not_A_union_B, set_A_and_D_minus_B, set_B_and_D_minus_A,
-                set_A_and_B_and_D), 
-    } 
+def _create_plot_data(presence_matrix, set_scanners):
+    """
+    Evaluates the region sizes of the venn2 and venn3 plots.
+
+    The sizes of all regions of the scanners are counted once, the regions of
+    every plot are derived from them.
+
+    Args:
+        presence_matrix (PresenceMatrix): The artifacts of the scanners.
+        set_scanners (dict): The scanner of every set ('A' to 'E').
+
+    Returns:
+        dict: The subset sizes of the plots 'AB', 'BC', 'CD', 'DE' and 'ABD'.
+    """
+    keys = list(set_scanners)
+    counts = presence_matrix.region_counts(list(set_scanners.values()))
+
+    def sizes(sets):
+        # Region i of the sets has bit j set if it is inside sets[j], which is the 
+        # order of the subsets of venn2 ('10', '01', '11') and venn3 ('100', ...)
+        regions = marginalize_regions(counts, [keys.index(key) for key in sets])
+        return tuple(int(size) for size in regions[1:])
+
+    return {plot: sizes(plot) for plot in ('AB', 'BC', 'CD', 'DE', 'ABD')}
+
 
 def _visualize_set_similarities(plot_title, project_name, project_version:None, set_names, 
-                                set_values, set_legends, output_file=None):
+                                presence_matrix, set_scanners, set_legends, 
+                                output_file=None, show=True):
 
     # Create the figure and subplots
     fig, axs = plt.subplots(3, 2, figsize=(10, 12))
@@ -96,7 +69,7 @@ def _visualize_set_similarities(plot_title, project_name, project_version:None,
     plt.subplots_adjust(top=0.9)
 
     # Evaluate the values for the venn2 and venn3 plots and return them in a dictionary
-    dic_values = _create_plot_data(set_values)  
+    dic_values = _create_plot_data(presence_matrix, set_scanners)  
 
     # Create Venn diagrams and add to subplots
 
@@ -189,25 +162,37 @@ def _visualize_set_similarities(plot_title, project_name, project_version:None,
     plt.tight_layout()
 
     if output_file:
-        # Check if output folder exists
-        if not pd.isna(project_version):
-            print(f"debug: {type(project_version)}")
-            output_folder = f"../output/{project_name}_{project_version}"
-        else:
-            output_folder = f"../output/{project_name}"
-        if not os.path.exists(output_folder):
-            os.makedirs(output_folder)
-
-        # Save the plot to a file
-        plt.savefig(os.path.join(output_folder, output_file), 
-                    dpi=300, bbox_inches='tight')      
-
-    # Show the plots
-    plt.show()
+        _save_plot(fig, project_name, project_version, output_file)
+
+    _show_plot(fig, show)
+
+def _output_folder(project_name, project_version):
+    # Folder of the plots of a project version
+    if not pd.isna(project_version):
+        return f"../output/{project_name}_{project_version}"
+    return f"../output/{project_name}"
+
+def _save_plot(fig, project_name, project_version, output_file):
+    # Check if output folder exists
+    output_folder = _output_folder(project_name, project_version)
+    if not os.path.exists(output_folder):
+        os.makedirs(output_folder)
+
+    # Save the plot to a file
+    fig.savefig(os.path.join(output_folder, output_file), 
+                dpi=300, bbox_inches='tight')      
+
+def _show_plot(fig, show):
+    # Show the plot and release the figure, pyplot keeps it alive otherwise
+    if show:
+        plt.show()
+    plt.close(fig)
 
 def create_SBOM_similarity_plot(project_name, project_version:None, scanner_data_df, 
-                                output_file=None):
+                                output_file=None, set_scanners=None, show=True):
     # sourcery skip: identity-comprehension
+    # set_scanners maps the sets 'A' to 'E' to scanners, defaults to SIMILARITY_SCANNERS
+    # show=False only saves the plot (e.g. on the Agg backend of report_renderer)
     # create plot title
     plot_title = f"SBOM similarity plot for project {project_name} version {project_version}"  # noqa: E501
 
@@ -218,9 +203,6 @@ def create_SBOM_similarity_plot(project_name, project_version:None, scanner_data
     # Remove rows with NaN in the "version" field
     df = df.dropna(subset=['version'])
 
-    # Create dictionry
-    modified_dict = {key: group for key, group in df.groupby('scanner_name')}
-
     # define abbreviations for scanners
     scanner_labels = {
         'A': 'A',     # Gitlab
@@ -239,28 +221,89 @@ def create_SBOM_similarity_plot(project_name, project_version:None, scanner_data
         'ABD':(scanner_labels['A'], scanner_labels['B'], scanner_labels['D'])
     }
 
-    set_values = {
-        'A': set(modified_dict['gitlab_cont']['name_version']),
-        'B': set(modified_dict['jfrog_advanced_security_cont']['name_version']),
-        'C': set(modified_dict['jfrog_cont']['name_version']),
-        'D': set(modified_dict['syft_cont']['name_version']),
-        'E': set(modified_dict['trivy_cont']['name_version'])
-    }
+    set_scanners = set_scanners or SIMILARITY_SCANNERS
 
-    set_legends = {
-        'A': 'A: Gitlab',
-        'B': 'B: JFrog Advanced Security',
-        'C': 'C: JFrog Xray',
-        'D': 'D: Syft',
-        'E': 'E: Trivy'
-    }
+    # Which scanner found which artifact (scanners without data have empty sets)
+    presence_matrix = PresenceMatrix.from_frame(
+        df, 'name_version', scanner_names=list(set_scanners.values()))
+
+    set_legends = {key: f"{key}: {SCANNER_LEGENDS.get(scanner, scanner)}" 
+                   for key, scanner in set_scanners.items()}
 
     _visualize_set_similarities(plot_title, project_name, project_version, set_names, 
-                                set_values, set_legends, output_file)
+                                presence_matrix, set_scanners, set_legends, output_file,
+                                show)
     
+def create_SBOM_overlap_plot(project_name, project_version:None, scanner_data_df, 
+                             scanner_names=None, max_regions=20, output_file=None, 
+                             show=True):
+    """
+    Plots the sizes of the exclusive scanner overlaps of a project UpSet-style.
+
+    Unlike the venn diagrams of create_SBOM_similarity_plot, the plot works for any
+    number of scanners: every bar is one combination of scanners, the dots below
+    the bar mark the scanners that found exactly these artifacts.
+
+    Args:
+        project_name (str): The name of the project.
+        project_version (str): The version of the project.
+        scanner_data_df (DataFrame): The scanner data with the columns 'scanner_name',
+                                     'name_version' and 'version'.
+        scanner_names (list, optional): The scanners to compare. Defaults to all
+                                        scanners in scanner_data_df.
+        max_regions (int): The number of largest overlaps to plot.
+        output_file (str, optional): The file name of the saved plot.
+        show (bool): Show the plot, otherwise it is only saved.
+
+    Returns:
+        DataFrame: All non-empty overlaps as returned by
+                   PresenceMatrix.overlap_regions.
+    """
+    # Remove rows with NaN in the "version" field
+    df = scanner_data_df.dropna(subset=['version'])
+    if scanner_names is None:
+        scanner_names = sorted(pd.unique(df['scanner_name'].dropna()))
+    presence_matrix = PresenceMatrix.from_frame(df, 'name_version', 
+                                                scanner_names=scanner_names)
+    regions_df = presence_matrix.overlap_regions(drop_empty=True)
+    plot_df = regions_df.head(max_regions)
+
+    fig, (ax_bars, ax_dots) = plt.subplots(
+        2, 1, figsize=(max(6, 0.5 * len(plot_df) + 3), 3 + 0.4 * len(scanner_names)),
+        sharex=True, gridspec_kw={'height_ratios': [3, 1 + 0.2 * len(scanner_names)]})
+    fig.suptitle(f"SBOM overlap plot for project {project_name} version "
+                 f"{project_version}", fontsize=12)
+
+    # Size of every overlap
+    x = np.arange(len(plot_df))
+    bars = ax_bars.bar(x, plot_df['size'], color='dimgray')
+    ax_bars.bar_label(bars, fontsize=8)
+    ax_bars.set_ylabel('Artifacts')
+
+    # Scanners of every overlap
+    for y, scanner in enumerate(scanner_names):
+        member = plot_df[scanner].to_numpy()
+        ax_dots.scatter(x, np.full(len(x), y), s=60, 
+                        color=np.where(member, 'black', 'lightgray'))
+    for position, (_, row) in zip(x, plot_df.iterrows()):
+        ys = [y for y, scanner in enumerate(scanner_names) if row[scanner]]
+        ax_dots.plot([position, position], [min(ys), max(ys)], color='black')
+    ax_dots.set_yticks(range(len(scanner_names)))
+    ax_dots.set_yticklabels([SCANNER_LEGENDS.get(scanner, scanner) 
+                             for scanner in scanner_names])
+    ax_dots.set_xticks([])
+
+    plt.tight_layout()
+
+    if output_file:
+        _save_plot(fig, project_name, project_version, output_file)
+
+    _show_plot(fig, show)
+    return regions_df
+
 def create_SBOM_confusion_matrix(project_name_version, scanner_data_df, 
-                                 output_file=None):
- 
+                                 output_file=None, show=True):
+    # show=False only saves the plot (e.g. on the Agg backend of report_renderer)
     scanner_names = scanner_data_df['scanner_name'].unique()
 
     plot_title = f"Confusion matrix for project {project_name_version}"
@@ -309,66 +352,74 @@ def create_SBOM_confusion_matrix(project_name_version, scanner_data_df,
     plt.tight_layout()
 
     if output_file:
-        # Check if output folder exists
-        output_folder = f"../output/{project_name_version}"
-        if not os.path.exists(output_folder):
-            os.makedirs(output_folder)
-    
-        # Save the plot to a file
-        plt.savefig(os.path.join(output_folder, output_file), 
-                    dpi=300, bbox_inches='tight')
+        _save_plot(fig, project_name_version, None, output_file)
 
-    # Show the plot
-    plt.show()
+    _show_plot(fig, show)
     
-def evaluate_confusion_matrix(scanner_data_agg_df):
-    columns = ['project_name', 'project_version', 'scanner_name', 'name_version', 'name', 'version']
-    project_version_grouped = scanner_data_agg_df[columns].groupby(['project_name', 'project_version'], dropna=False)
-
-    for key, project_version_group in project_version_grouped:
-
-        project_name, project_version = key  # Unpack the group key
-        if pd.isna(project_version):
-            project_version_str = 'None'
-        else:
-            project_version_str = str(project_version) 
-
-        print(f"Evaluating data for confusion matrix of project: {project_name} - {project_version_str}")
-
-        # Drop all artifacts without version number
-        project_version_group.dropna(subset=['version'], inplace=True)
-
-        # Get all unique artifacts
-        all_artifacts = project_version_group['name_version'].unique()
-
-        # Create an IndexSlice object
-
-        # Initialize an empty list to hold data for the final DataFrame
-        data_final = []
-
-        # Group by 'name' and 'type'
-        scanner_grouped = project_version_group.groupby(['scanner_name'], dropna=False)
-
-        # Iterate through groups
-        for scanner_name, scanner_df in scanner_grouped:
-
-            # Evaluate missing 'name_version'
-            missing_artifacts = set(all_artifacts) - set(scanner['name_version'])
-
-            # Append rows for missing UUIDs
-            data_final.extend(
-                {
-                    'project_name': project_name,
-                    'project_version': project_version,
-                    'scanner_name': scanner_name,
-                    'name_version': artifact,
-                    'flag': 0,
-                }
-                for artifact in missing_artifacts
-            )
-        # Append the original group
-        data_final.extend(scanner_df.to_dict(orient='records'))
-
-
-        # Create the final DataFrame
-        return pd.DataFrame(data_final)
\ No newline at end of file
+def evaluate_confusion_matrix(scanner_data_agg_df, true_threshold=3, 
+                              group_by='project_name_version'):
+    """
+    Expands the scanner results of all projects into confusion matrix data.
+
+    Every scanner of a project gets one row per artifact of the project: 'flag' is 1 
+    if the scanner reported the artifact and 0 if it missed it. 'vote' is the number 
+    of scanners of the project that reported the artifact and 'label' is 1 if the 
+    vote reaches true_threshold. Artifacts without version are dropped.
+
+    All projects are evaluated at once from the presence matrix of the artifacts, 
+    the result is built directly in its final size.
+
+    Args:
+        scanner_data_agg_df (DataFrame): Scanner results with the columns group_by, 
+                                         'scanner_name', 'name_version' and 'version'.
+        true_threshold (int): Minimum number of votes of a true artifact.
+        group_by (str): The column that identifies a project.
+
+    Returns:
+        DataFrame: One row per project, scanner and artifact with the columns 
+                   group_by, 'scanner_name', 'name_version', 'flag', 'vote' and 
+                   'label'.
+    """
+    # Drop all artifacts without version number
+    df = scanner_data_agg_df.dropna(subset=['version'])
+    presence_matrix = PresenceMatrix.from_frame(df, 'name_version', group_by=group_by)
+    masks = presence_matrix.masks
+    group_ids = presence_matrix.group_ids
+
+    # Scanners that reported anything for a project
+    project_masks = np.zeros(len(presence_matrix.groups), dtype=np.uint64)
+    np.bitwise_or.at(project_masks, group_ids, masks)
+    row_project_masks = project_masks[group_ids]
+
+    # One output row per matrix row and scanner of its project
+    rows, scanner_codes = [], []
+    for i, scanner in enumerate(presence_matrix.scanner_names):
+        scanner_rows = np.flatnonzero(row_project_masks & presence_matrix.bits(scanner))
+        rows.append(scanner_rows)
+        scanner_codes.append(np.full(len(scanner_rows), i, dtype=np.int8))
+    rows = np.concatenate(rows)
+    scanner_codes = np.concatenate(scanner_codes)
+
+    # Order by project, scanner and artifact
+    order = np.lexsort((rows, scanner_codes, group_ids[rows]))
+    rows = rows[order]
+    scanner_codes = scanner_codes[order]
+
+    bits = np.left_shift(np.uint64(1), scanner_codes.astype(np.uint64))
+    flags = ((masks[rows] & bits) != 0).astype(np.int8)
+    votes = presence_matrix.votes()[rows]
+
+    # Project codes of the categorical (missing projects get the code -1)
+    groups = presence_matrix.groups
+    group_codes = np.where(groups.isna(), -1, np.cumsum(groups.notna()) - 1)
+
+    return pd.DataFrame({
+        group_by: pd.Categorical.from_codes(group_codes[group_ids[rows]], 
+                                            categories=groups.dropna()),
+        'scanner_name': pd.Categorical.from_codes(
+            scanner_codes, categories=presence_matrix.scanner_names),
+        'name_version': presence_matrix.artifact_names(rows),
+        'flag': flags,
+        'vote': votes,
+        'label': (votes >= true_threshold).astype(np.int8),
+    })
@@ -0,0 +1,114 @@
+import asyncio
+import threading
+import time
+
+import pandas as pd
+from async_clients import AsyncDefectDojoAnalyzer, AsyncDependencyTrack
+from defectdojo import DefectDojoAnalyzer
+from dependency_track import DependencyTrack
+from http_session import RequestGate
+
+
+class _SlowSession:
+    # Answers every request with one empty page after a delay and records the 
+    # number of requests in flight
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.n_requests = 0
+        self._lock = threading.Lock()
+
+    def request(self, method, url, **kwargs):
+        with self._lock:
+            self.in_flight += 1
+            self.n_requests += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(self.delay)
+        with self._lock:
+            self.in_flight -= 1
+
+        class Response:
+            status_code = 200
+
+            def raise_for_status(self):
+                pass
+
+            def json(self):
+                return {'count': 0, 'results': []}
+        return Response()
+
+
+def _defect_dojo(session, gate):
+    client = DefectDojoAnalyzer(session=session, api_key='test', max_workers=8,
+                                product_info=pd.DataFrame(), store_path=None)
+    return AsyncDefectDojoAnalyzer(client, gate=gate)
+
+def test_clients_share_the_connection_limit():
+    session = _SlowSession()
+    gate = RequestGate(limit=3)
+    first, second = _defect_dojo(session, gate), _defect_dojo(session, gate)
+
+    async def crawl():
+        return await asyncio.gather(first.get_findings_for_tests(range(8)),
+                                    second.get_findings_for_tests(range(100, 108)))
+
+    first.client.BULK_FILTERS = second.client.BULK_FILTERS = {}
+    results = asyncio.run(crawl())
+    assert [len(findings_df) for findings_df in results] == [0, 0]
+    assert session.n_requests == 16
+    assert session.max_in_flight == 3
+
+def test_cancelled_call_stops_sending_requests():
+    session = _SlowSession()
+    defect_dojo = _defect_dojo(session, RequestGate(limit=1))
+    defect_dojo.client.BULK_FILTERS = {}
+
+    async def crawl():
+        cancelled = asyncio.ensure_future(defect_dojo.get_findings_for_tests(range(50)))
+        other = asyncio.ensure_future(defect_dojo.get_findings_for_tests(range(100, 104)))
+        await asyncio.sleep(0.12)
+        cancelled.cancel()
+        try:
+            await cancelled
+        except asyncio.CancelledError:
+            pass
+        else:
+            return None
+        return await other
+
+    # The other call of the same client is not cancelled
+    findings_df = asyncio.run(crawl())
+    assert findings_df is not None and len(findings_df) == 0
+    assert defect_dojo.fetch_errors == {}
+    assert session.n_requests < 15
+
+def test_wrapped_client_keeps_its_session():
+    session = _SlowSession(delay=0)
+    client = DefectDojoAnalyzer(session=session, api_key='test', 
+                                product_info=pd.DataFrame(), store_path=None)
+    defect_dojo = AsyncDefectDojoAnalyzer(client)
+    assert client.session is session
+    assert defect_dojo.client.session.session is session
+
+def test_wrapped_client_receives_a_running_warm_up(monkeypatch):
+    release = threading.Event()
+    calls = []
+
+    def get_all_projects(self):
+        calls.append(1)
+        release.wait(5)
+        self.project_info = pd.DataFrame({'Name': ['App_syft_cont'], 'Version': ['None'],
+                                          'UUID': ['u1'], 'LastBomImport': [1]})
+
+    monkeypatch.setattr(DependencyTrack, '_get_all_projects', get_all_projects)
+    client = DependencyTrack(api_key='test', cache_dir=None, prefetch=True)
+    dt_instance = AsyncDependencyTrack(client)
+    # Reading the catalogue does not block the event loop
+    assert dt_instance.project_info is None
+
+    release.set()
+    project_info = asyncio.run(dt_instance.warm_up())
+    assert project_info['UUID'].tolist() == ['u1']
+    assert dt_instance.project_info is project_info
+    assert calls == [1]
@@ -0,0 +1,35 @@
+import json
+
+import pytest
+from cyclonedx_stream import read_cyclonedx_components
+
+
+def _chunks(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+def test_read_cyclonedx_components_in_small_chunks():
+    bom = {
+        'metadata': {'component': {'name': 'app ]}', 'components': [{'name': 'inner'}]}},
+        'components': [
+            {'name': 'a', 'version': '1.0', 'purl': 'pkg:npm/a@1.0', 
+             'hashes': [{'alg': 'SHA-1', 'content': 'abc'}], 
+             'components': [{'name': 'nested'}]},
+            {'name': 'bü', 'bom-ref': 'ref-b', 'licenses': []},
+        ],
+        'dependencies': [{'ref': 'ref-b'}]
+    }
+    data = json.dumps(bom, ensure_ascii=False).encode('utf-8')
+
+    df = read_cyclonedx_components(_chunks(data, 3))
+    assert list(df.columns) == ['name', 'version', 'purl', 'bom-ref', 'hashes']
+    assert df['name'].tolist() == ['a', 'bü']
+    assert df['bom-ref'].values[1] == 'ref-b'
+    assert df['hashes'].values[0] == [{'alg': 'SHA-1', 'content': 'abc'}]
+
+def test_read_cyclonedx_components_without_components():
+    assert read_cyclonedx_components([b'{"bomFormat": "CycloneDX"}']) is None
+    assert read_cyclonedx_components([b'{"components": []}']).empty
+
+def test_read_cyclonedx_components_truncated():
+    with pytest.raises(ValueError):
+        read_cyclonedx_components([b'{"components": [{"name": "a"}, {"na'])
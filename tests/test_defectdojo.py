@@ -0,0 +1,216 @@
+import pandas as pd
+from defectdojo import DefectDojoAnalyzer
+
+
+class _FakeResponse:
+    status_code = 200
+
+    def __init__(self, payload):
+        self.payload = payload
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.payload
+
+
+class _FakeSession:
+    # Serves limit/offset paginated list endpoints from in-memory records; list 
+    # filters are ignored unless supports_list_filters is set
+    def __init__(self, records, supports_list_filters=True):
+        self.records = records
+        self.supports_list_filters = supports_list_filters
+        self.requests = []
+
+    def _value(self, record, field):
+        if field == 'test__engagement':
+            tests = {test['id']: test for test in self.records['tests']}
+            return tests[record['test']]['engagement']
+        return record[field.removesuffix('__in')]
+
+    def request(self, method, url, params=None, **kwargs):
+        self.requests.append((url, dict(params)))
+        endpoint = url.rstrip('/').rsplit('/', 1)[-1]
+        params = dict(params)
+        limit = params.pop('limit')
+        offset = params.pop('offset')
+        modified_since = params.pop('last_status_update__gte', None)
+        filters = {}
+        for field, value in params.items():
+            values = {int(v) for v in str(value).split(',')}
+            if len(values) == 1 or self.supports_list_filters:
+                filters[field] = values
+        results = [record for record in self.records[endpoint]
+                   if all(self._value(record, field) in values 
+                          for field, values in filters.items()) and
+                   (modified_since is None or 
+                    record['last_status_update'] >= modified_since)]
+        return _FakeResponse({'count': len(results), 
+                              'results': results[offset:offset + limit]})
+
+
+def test_collect_findings_follows_pagination():
+    records = {
+        'engagements': [{'id': 10, 'name': 'Pilot', 'product': 1},
+                        {'id': 11, 'name': 'Other', 'product': 1},
+                        {'id': 20, 'name': 'Pilot', 'product': 2}],
+        'tests': [{'id': 100 + i, 'engagement': 10 if i < 5 else 20, 'test_type': 3}
+                  for i in range(7)],
+        'findings': [{'id': i, 'title': f'CVE-{i}', 'test': 100 + i % 7} 
+                     for i in range(50)],
+    }
+    session = _FakeSession(records)
+    product_info = pd.DataFrame({'Name': ['A', 'B'], 'ID': [1, 2]})
+    defect_dojo = DefectDojoAnalyzer(session=session, api_key='test', 
+                                     product_info=product_info)
+    defect_dojo.PAGE_SIZE = 2
+
+    engagement_df, tests_df, findings_df = defect_dojo.collect_findings(
+        in_scope={'A': ['Pilot'], 'B': ['Pilot']})
+
+    assert engagement_df['engagement_id'].tolist() == [10, 20]
+    assert engagement_df['product_name'].tolist() == ['A', 'B']
+    assert sorted(tests_df['test_id']) == list(range(100, 107))
+    assert sorted(findings_df['finding_id']) == list(range(50))
+    assert findings_df.groupby('test_id').size().tolist() == [8] * 1 + [7] * 6
+    assert defect_dojo.fetch_errors == {}
+
+def test_get_findings_for_test_reports_failed_pages():
+    session = _FakeSession({'findings': [{'id': i, 'title': 't', 'test': 1} 
+                                         for i in range(5)]})
+    defect_dojo = DefectDojoAnalyzer(session=session, api_key='test', 
+                                     product_info=pd.DataFrame())
+    defect_dojo.PAGE_SIZE = 2
+    assert defect_dojo.get_findings_for_test(1)['finding_id'].tolist() == [0, 1, 2, 3, 4]
+
+    defect_dojo._make_request = lambda **kwargs: None
+    assert defect_dojo.get_findings_for_test(1) is None
+    assert ('findings', 1) in defect_dojo.fetch_errors
+
+def test_get_findings_for_tests_uses_list_filter():
+    findings = [{'id': i, 'title': 't', 'test': i % 30} for i in range(90)]
+    session = _FakeSession({'findings': findings})
+    defect_dojo = DefectDojoAnalyzer(session=session, api_key='test', 
+                                     product_info=pd.DataFrame())
+    defect_dojo.PAGE_SIZE = 50
+
+    findings_df = defect_dojo.get_findings_for_tests(range(30))
+    assert len(session.requests) == 2
+    assert (findings_df['test_id'] == findings_df['finding_id'] % 30).all()
+    assert sorted(findings_df['finding_id']) == list(range(90))
+
+def test_get_findings_for_tests_falls_back_to_single_queries():
+    findings = [{'id': i, 'title': 't', 'test': i % 30} for i in range(90)]
+    session = _FakeSession({'findings': findings}, supports_list_filters=False)
+    defect_dojo = DefectDojoAnalyzer(session=session, api_key='test', 
+                                     product_info=pd.DataFrame())
+
+    findings_df = defect_dojo.get_findings_for_tests([1, 2])
+    assert sorted(findings_df['finding_id']) == [1, 2, 31, 32, 61, 62]
+    assert 'test__in' in defect_dojo._unsupported_bulk_filters
+
+def test_sync_findings_only_requests_modified_findings(tmp_path):
+    records = {
+        'engagements': [{'id': 10, 'name': 'Pilot', 'product': 1}],
+        'tests': [{'id': 100, 'engagement': 10, 'test_type': 3}],
+        'findings': [{'id': i, 'title': 't', 'test': 100, 'line': i, 
+                      'tags': ['a'], 'last_status_update': f'2024-01-0{i + 1}T00:00:00Z'}
+                     for i in range(3)],
+    }
+    session = _FakeSession(records)
+    defect_dojo = DefectDojoAnalyzer(session=session, api_key='test', 
+                                     product_info=pd.DataFrame({'Name': ['A'], 'ID': [1]}),
+                                     store_path=str(tmp_path / 'findings.sqlite'))
+    _, _, findings_df = defect_dojo.sync_findings()
+    assert sorted(findings_df['finding_id']) == [0, 1, 2]
+
+    # Update one finding, the next sync only receives this one
+    records['findings'][0].update(title='updated', 
+                                  last_status_update='2024-02-01T00:00:00Z')
+    session.requests.clear()
+    engagement_df, tests_df, findings_df = defect_dojo.sync_findings()
+    findings_requests = [params for url, params in session.requests 
+                         if url.endswith('/findings/')]
+    assert findings_requests[0]['last_status_update__gte'].startswith('2024-01-03')
+    assert findings_df.set_index('finding_id').loc[0, 'finding_title'] == 'updated'
+    assert findings_df['tags'].tolist() == [['a']] * 3
+    assert findings_df['line'].dtype == 'Int32'
+    assert defect_dojo.findings_store.get_state('engagement_watermarks')['10'].startswith(
+        '2024-02-01')
+
+def test_sync_findings_keeps_findings_of_other_scopes(tmp_path):
+    records = {
+        'engagements': [{'id': 10, 'name': 'Pilot', 'product': 1},
+                        {'id': 20, 'name': 'Pilot', 'product': 2}],
+        'tests': [{'id': 100, 'engagement': 10, 'test_type': 3},
+                  {'id': 200, 'engagement': 20, 'test_type': 3}],
+        'findings': [{'id': 1, 'title': 'a', 'test': 100, 
+                      'last_status_update': '2024-03-01T00:00:00Z'},
+                     {'id': 2, 'title': 'b', 'test': 200, 
+                      'last_status_update': '2024-01-01T00:00:00Z'}],
+    }
+    session = _FakeSession(records)
+    product_info = pd.DataFrame({'Name': ['A', 'B'], 'ID': [1, 2]})
+    defect_dojo = DefectDojoAnalyzer(session=session, api_key='test', 
+                                     product_info=product_info,
+                                     store_path=str(tmp_path / 'findings.sqlite'))
+
+    defect_dojo.sync_findings(in_scope={'A': ['Pilot']})
+    # Product B is synced after A, its older findings are crawled completely
+    engagement_df, tests_df, findings_df = defect_dojo.sync_findings(
+        in_scope={'B': ['Pilot']})
+    assert engagement_df['engagement_id'].tolist() == [20]
+    assert findings_df['finding_id'].tolist() == [2]
+
+    _, tests_df, findings_df = defect_dojo.load_findings()
+    assert sorted(tests_df['test_id']) == [100, 200]
+    assert sorted(findings_df['finding_id']) == [1, 2]
+    watermarks = defect_dojo.findings_store.get_state('engagement_watermarks')
+    assert watermarks['10'].startswith('2024-03-01')
+    assert watermarks['20'].startswith('2024-01-01')
+
+    # A full sync of product B keeps the findings of product A
+    records['findings'].pop()
+    defect_dojo.sync_findings(in_scope={'B': ['Pilot']}, full=True)
+    assert defect_dojo.load_findings()[2]['finding_id'].tolist() == [1]
+
+def test_findings_frames_use_schema_and_projection():
+    findings = [{'id': 1, 'title': 't', 'test': 100, 'severity': 'High', 'line': '12', 
+                 'description': 'long text'},
+                {'id': 2, 'title': 't', 'test': 100, 'severity': 'Low', 'line': None}]
+    defect_dojo = DefectDojoAnalyzer(session=_FakeSession({'findings': findings}), 
+                                     api_key='test', product_info=pd.DataFrame())
+
+    findings_df = defect_dojo.get_findings_for_test(100, columns=['severity', 'line'])
+    assert list(findings_df.columns) == ['finding_id', 'test_id', 'severity', 'line']
+    assert isinstance(findings_df['severity'].dtype, pd.CategoricalDtype)
+    assert findings_df['line'].tolist() == [12, pd.NA]
+    assert findings_df['finding_id'].dtype == 'Int64'
+
+def test_findings_frames_keep_fields_outside_the_schema():
+    findings = [{'id': 1, 'title': 't', 'test': 100, 'risk_accepted': True, 
+                 'sast_source_line': '7', 'planned_remediation_date': '2024-05-01', 
+                 'notes': [{'id': 3}]},
+                {'id': 2, 'title': 't', 'test': 100, 'risk_accepted': False}]
+    defect_dojo = DefectDojoAnalyzer(session=_FakeSession({'findings': findings}), 
+                                     api_key='test', product_info=pd.DataFrame())
+
+    findings_df = defect_dojo.get_findings_for_test(100)
+    assert list(findings_df.columns[-2:]) == ['planned_remediation_date', 'notes']
+    assert findings_df['notes'].tolist() == [[{'id': 3}], None]
+    assert findings_df['risk_accepted'].dtype == 'boolean'
+    assert findings_df['sast_source_line'].tolist() == [7, pd.NA]
+
+    findings_df = defect_dojo.get_findings_for_test(100, columns=['notes'])
+    assert list(findings_df.columns) == ['finding_id', 'test_id', 'notes']
+
+def test_failed_catalogue_fetch_is_retried():
+    defect_dojo = DefectDojoAnalyzer(session=_FakeSession({'products': []}), 
+                                     api_key='test', store_path=None)
+    defect_dojo._make_request = lambda **kwargs: None
+    assert defect_dojo.warm_up() is None
+    assert defect_dojo._catalogue_future is None
+
+    del defect_dojo._make_request
+    assert defect_dojo.warm_up()['Name'].tolist() == []
@@ -0,0 +1,253 @@
+import json
+import time
+
+import pandas as pd
+import requests
+from dependency_track import DependencyTrack
+
+
+class _FakeBOMResponse:
+    status_code = 200
+    headers = {}
+
+    def __init__(self, payload):
+        self.payload = payload
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size):
+        yield self.payload
+
+    def close(self):
+        pass
+
+
+class _FakeBOMSession:
+    # Serves the BOM of every project UUID; UUIDs without a BOM fail like a
+    # connection error
+    def __init__(self, boms):
+        self.boms = boms
+        self.requests = []
+
+    def request(self, method, url, **kwargs):
+        project_uuid = url.rsplit('/', 1)[-1]
+        self.requests.append(project_uuid)
+        if project_uuid not in self.boms:
+            raise requests.exceptions.ConnectionError('connection reset')
+        components = [{'name': name, 'version': '1.0', 
+                       'purl': f'pkg:maven/org/{name}@1.0'} 
+                      for name in self.boms[project_uuid]]
+        return _FakeBOMResponse(json.dumps({'components': components}).encode())
+
+
+class _FakeProjectResponse:
+    status_code = 200
+
+    def __init__(self, projects, total_count):
+        self.projects = projects
+        self.headers = {} if total_count is None else {'X-Total-Count': str(total_count)}
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.projects
+
+
+class _FakeProjectSession:
+    # Serves the paginated project list; later pages are answered faster, so the 
+    # concurrent pages complete out of order
+    def __init__(self, projects, total_header=True):
+        self.projects = projects
+        self.total_header = total_header
+        self.pages = []
+
+    def request(self, method, url, params=None, **kwargs):
+        page_number, page_size = params['pageNumber'], params['pageSize']
+        self.pages.append(page_number)
+        projects = self.projects
+        if params.get('sortName') == 'lastBomImport':
+            projects = sorted(projects, key=lambda project: project['lastBomImport'] 
+                              or 0, reverse=params['sortOrder'] == 'desc')
+        time.sleep(0.01 / page_number)
+        start = (page_number - 1) * page_size
+        return _FakeProjectResponse(projects[start:start + page_size], 
+                                    len(projects) if self.total_header else None)
+
+
+def _projects(n):
+    return [{'name': f'P{i}_syft_cont', 'version': '1.0', 'uuid': f'u{i}', 
+             'lastBomImport': 100 + i} for i in range(n)]
+
+
+def _dependency_track(project_info, session=None):
+    # Build an instance from a pre-loaded catalogue without connecting
+    return DependencyTrack(api_key='test', project_info=project_info, cache_dir=None,
+                           session=session)
+
+def test_get_scanner_uuids_uses_project_naming_convention():
+    project_info = pd.DataFrame({
+        'Name': ['App_trivy_cont', 'App_jfrog_cont', 'App_jfrog_advanced_security_cont', 
+                 'App_trivy_cont', 'Other'],
+        'Version': ['1.0', '1.0', '1.0', '2.0', 'None'],
+        'UUID': ['u1', 'u2', 'u3', 'u4', 'u5'],
+    })
+    dt_instance = _dependency_track(project_info)
+
+    assert dt_instance._get_scanner_uuids('App', 1.0) == [
+        ('jfrog_advanced_security_cont', 'u3'), ('jfrog_cont', 'u2'), ('trivy_cont', 'u1')]
+    assert dt_instance._get_scanner_uuids('App', '2.0') == [('trivy_cont', 'u4')]
+    assert dt_instance.get_project_uuid('Other') == 'u5'
+
+def test_get_scanner_uuids_suggests_similar_projects(capsys):
+    project_info = pd.DataFrame({'Name': ['WebGoat_syft_cont'], 'Version': ['None'], 
+                                 'UUID': ['u1']})
+    dt_instance = _dependency_track(project_info)
+
+    assert dt_instance._get_scanner_uuids('Webgoat', None) is None
+    assert 'Did you mean: WebGoat?' in capsys.readouterr().out
+
+def test_catalogue_is_fetched_lazily_once(monkeypatch):
+    calls = []
+
+    def get_all_projects(self):
+        calls.append(1)
+        self.project_info = pd.DataFrame({'Name': ['App_syft_cont'], 'Version': ['None'],
+                                          'UUID': ['u1'], 'LastBomImport': [1]})
+
+    monkeypatch.setattr(DependencyTrack, '_get_all_projects', get_all_projects)
+    dt_instance = DependencyTrack(api_key='test', cache_dir=None)
+    assert calls == []
+
+    assert dt_instance._get_scanner_uuids('App', None) == [('syft_cont', 'u1')]
+    assert dt_instance.project_info is dt_instance.warm_up()
+    assert calls == [1]
+
+def test_failed_catalogue_fetch_is_retried(monkeypatch):
+    results = [None, pd.DataFrame({'Name': ['App_syft_cont'], 'Version': ['None'],
+                                   'UUID': ['u1'], 'LastBomImport': [1]})]
+
+    def get_all_projects(self):
+        self.project_info = results.pop(0)
+        if self._project_info is None:
+            raise ConnectionError('unreachable')
+
+    monkeypatch.setattr(DependencyTrack, '_get_all_projects', get_all_projects)
+    dt_instance = DependencyTrack(api_key='test', cache_dir=None)
+    try:
+        dt_instance.warm_up()
+    except ConnectionError:
+        pass
+    assert dt_instance._catalogue_future is None
+
+    assert dt_instance.warm_up()['UUID'].tolist() == ['u1']
+    assert results == []
+
+def test_failed_sbom_download_is_reported_per_project():
+    project_info = pd.DataFrame({
+        'Name': ['App_syft_cont', 'App_trivy_cont', 'App_gitlab_cont'],
+        'Version': ['1.0'] * 3, 'UUID': ['u1', 'u2', 'u3'], 'LastBomImport': [1] * 3})
+    session = _FakeBOMSession({'u1': ['a', 'b'], 'u3': ['c']})
+    dt_instance = _dependency_track(project_info, session)
+
+    scanner_data = dt_instance.collect_all_scanner_data('App', '1.0', max_workers=3)
+    assert sorted(session.requests) == ['u1', 'u2', 'u3']
+    assert scanner_data['syft_cont']['name'].tolist() == ['a', 'b']
+    assert scanner_data['gitlab_cont']['name'].tolist() == ['c']
+    assert scanner_data['trivy_cont'].empty
+    assert list(dt_instance.fetch_errors) == ['u2']
+
+def test_get_all_projects_fetches_the_pages_concurrently():
+    session = _FakeProjectSession(_projects(7))
+    dt_instance = DependencyTrack(api_key='test', session=session, cache_dir=None)
+    dt_instance.PROJECT_PAGE_SIZE = 2
+
+    # Four pages from the total count of 7, the last page is short
+    project_info = dt_instance._get_all_projects()
+    assert sorted(session.pages) == [1, 2, 3, 4]
+    assert project_info['UUID'].tolist() == [f'u{i}' for i in range(7)]
+    assert dt_instance.last_project_sync == 106
+
+    # Without a total count the pages are read until a page is not full
+    session = _FakeProjectSession(_projects(4), total_header=False)
+    dt_instance = DependencyTrack(api_key='test', session=session, cache_dir=None)
+    dt_instance.PROJECT_PAGE_SIZE = 2
+    assert dt_instance._get_all_projects()['UUID'].tolist() == ['u0', 'u1', 'u2', 'u3']
+    assert session.pages == [1, 2, 3]
+
+def test_refresh_projects_adds_changed_and_new_projects():
+    projects = _projects(5)
+    session = _FakeProjectSession(projects)
+    dt_instance = DependencyTrack(api_key='test', session=session, cache_dir=None)
+    dt_instance.PROJECT_PAGE_SIZE = 2
+    dt_instance._get_all_projects()
+    assert dt_instance._get_scanner_uuids('P1', '1.0') == [('syft_cont', 'u1')]
+
+    # u1 received a new BOM, only the first page is newer than the last sync
+    projects[1].update(name='Renamed_syft_cont', lastBomImport=200)
+    session.pages.clear()
+    assert dt_instance.refresh_projects()['UUID'].tolist() == ['u1']
+    assert session.pages == [1]
+    assert dt_instance.last_project_sync == 200
+    # The project index is rebuilt from the refreshed catalogue
+    assert dt_instance._get_scanner_uuids('Renamed', '1.0') == [('syft_cont', 'u1')]
+    assert dt_instance._get_scanner_uuids('P1', '1.0') is None
+
+    # u5 is new and has no BOM yet, it is sorted last and found by a reload
+    projects.append({'name': 'New_syft_cont', 'version': '1.0', 'uuid': 'u5', 
+                     'lastBomImport': None})
+    assert dt_instance.refresh_projects()['UUID'].tolist() == ['u5']
+    assert dt_instance._get_scanner_uuids('New', '1.0') == [('syft_cont', 'u5')]
+    assert len(dt_instance.project_info) == 6
+
+def test_collect_portfolio_scanner_data_downloads_every_bom_once(monkeypatch):
+    project_info = pd.DataFrame({
+        'Name': ['App_syft_cont', 'App_jfrog_cont', 'Lib_syft_cont'],
+        'Version': ['1.0', '1.0', 'None'], 'UUID': ['u1', 'u2', 'u3'], 
+        'LastBomImport': [1] * 3})
+    boms = {
+        'u1': {'name': ['commons-io'], 'version': ['2.11.0'], 
+               'purl': ['pkg:maven/commons-io/commons-io@2.11.0']},
+        'u2': {'name': ['commons-io-2.11.0.jar'], 'version': [None], 
+               'purl': ['pkg:generic/commons-io-2.11.0.jar']},
+        'u3': {'name': ['left-pad'], 'version': ['1.3.0'], 
+               'purl': ['pkg:npm/left-pad@1.3.0']},
+    }
+    requested = []
+
+    def get_project_components(project_uuid):
+        requested.append(project_uuid)
+        return pd.DataFrame({**boms[project_uuid], 'bom-ref': [None], 'hashes': [None]})
+
+    dt_instance = _dependency_track(project_info)
+    monkeypatch.setattr(dt_instance, '_get_project_components', get_project_components)
+
+    data_df = dt_instance.collect_portfolio_scanner_data(
+        [('App', '1.0'), ('App', 1.0), ('Lib', None)])
+    assert sorted(requested) == ['u1', 'u2', 'u3']
+    assert data_df['project_name_version'].tolist() == ['App_1.0', 'App_1.0', 'Lib']
+    assert data_df['scanner_name'].tolist() == ['jfrog_cont', 'syft_cont', 'syft_cont']
+    # The JFrog jar name is split by the default SCANNER_RULES
+    assert data_df['name_version'].tolist() == [
+        'commons-io:2.11.0', 'commons-io:2.11.0', 'left-pad:1.3.0']
+    for column in ['project_name', 'project_name_version', 'scanner_name']:
+        assert isinstance(data_df[column].dtype, pd.CategoricalDtype)
+    assert data_df['project_version'].dtype == 'string'
+    assert data_df['project_version'].isna().tolist() == [False, False, True]
+
+    # rules={} keeps the names as reported
+    data_df = dt_instance.collect_portfolio_scanner_data([('App', '1.0')], rules={})
+    assert data_df['name_version'].tolist() == [
+        'commons-io-2.11.0.jar:', 'commons-io:2.11.0']
+
+def test_collect_all_scanner_data_applies_the_scanner_rules():
+    project_info = pd.DataFrame({'Name': ['App_jfrog_cont'], 'Version': ['1.0'], 
+                                 'UUID': ['u1'], 'LastBomImport': [1]})
+    dt_instance = _dependency_track(project_info, 
+                                    _FakeBOMSession({'u1': ['guava-32.1.2-jre.jar']}))
+
+    jfrog_df = dt_instance.collect_all_scanner_data('App', '1.0')['jfrog_cont']
+    assert jfrog_df[['name', 'version']].values.tolist() == [['guava', '32.1.2-jre']]
+    jfrog_df = dt_instance.collect_all_scanner_data('App', '1.0', rules={})['jfrog_cont']
+    assert jfrog_df['name'].tolist() == ['guava-32.1.2-jre.jar']
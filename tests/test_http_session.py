@@ -0,0 +1,59 @@
+import pandas as pd
+from config import (
+    HTTP_BACKOFF_FACTOR,
+    HTTP_POOL_SIZE,
+    HTTP_RETRIES,
+    HTTP_RETRY_STATUS_CODES,
+    REQUEST_TIMEOUT,
+)
+from defectdojo import DefectDojoAnalyzer
+from dependency_track import DependencyTrack
+from http_session import TimeoutHTTPAdapter, create_session, get_shared_session
+from requests.adapters import HTTPAdapter
+
+
+def test_session_mounts_the_pooled_retrying_adapter():
+    session = create_session()
+    for prefix in ('https://', 'http://'):
+        adapter = session.get_adapter(f'{prefix}example.com')
+        assert isinstance(adapter, TimeoutHTTPAdapter)
+        assert adapter._pool_maxsize == HTTP_POOL_SIZE
+        assert adapter.timeout == REQUEST_TIMEOUT
+        assert adapter.max_retries.total == HTTP_RETRIES
+        assert adapter.max_retries.backoff_factor == HTTP_BACKOFF_FACTOR
+        assert set(adapter.max_retries.status_forcelist) == set(HTTP_RETRY_STATUS_CODES)
+        assert adapter.max_retries.respect_retry_after_header
+
+    adapter = create_session(pool_size=4, retries=2).get_adapter('https://example.com')
+    assert adapter._pool_maxsize == 4
+    assert adapter.max_retries.total == 2
+
+def test_timeout_adapter_applies_the_default_timeout(monkeypatch):
+    timeouts = []
+
+    def send(self, request, **kwargs):
+        timeouts.append(kwargs.get('timeout'))
+
+    monkeypatch.setattr(HTTPAdapter, 'send', send)
+    adapter = TimeoutHTTPAdapter(timeout=(1, 2))
+    adapter.send(None)
+    adapter.send(None, timeout=None)
+    adapter.send(None, timeout=5)
+    assert timeouts == [(1, 2), (1, 2), 5]
+
+def test_clients_reuse_the_session():
+    session = create_session()
+    dependency_track = DependencyTrack(api_key='test', session=session, cache_dir=None, 
+                                       project_info=pd.DataFrame())
+    defect_dojo = DefectDojoAnalyzer(api_key='test', session=session, store_path=None,
+                                     product_info=pd.DataFrame())
+    assert dependency_track.session is session
+    assert defect_dojo.session is session
+
+    # Without a session both clients share the process-wide session
+    shared_session = get_shared_session()
+    assert shared_session is get_shared_session()
+    assert DependencyTrack(api_key='test', cache_dir=None, 
+                           project_info=pd.DataFrame()).session is shared_session
+    assert DefectDojoAnalyzer(api_key='test', store_path=None, 
+                              product_info=pd.DataFrame()).session is shared_session
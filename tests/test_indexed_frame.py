@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+from dataframe_filters import (
+    filter_by_flag_and_label,
+    filter_by_project_name_version_and_scanner,
+    get_difference_between_scanners,
+    get_differences_between_all_scanners,
+)
+from indexed_frame import IndexedFrame
+
+
+def _confusion_matrix_data():
+    rng = np.random.default_rng(0)
+    n = 500
+    return pd.DataFrame({
+        'project_name_version': pd.Categorical(rng.choice(['P1', 'P2', 'P3', None], n)),
+        'scanner_name': rng.choice(['gitlab_cont', 'syft_cont', 'trivy_cont'], n),
+        'name_version': [f'a{i}:1' for i in rng.integers(0, 40, n)],
+        'flag': rng.integers(0, 2, n),
+        'label': rng.integers(0, 2, n),
+    }, index=rng.permutation(n))
+
+def test_indexed_filters_match_boolean_masks():
+    df = _confusion_matrix_data()
+    indexed_df = IndexedFrame(df)
+
+    for project in ['P1', 'P3', 'P4']:
+        for scanner in ['gitlab_cont', 'syft_cont']:
+            pd.testing.assert_frame_equal(
+                filter_by_project_name_version_and_scanner(indexed_df, project, scanner),
+                filter_by_project_name_version_and_scanner(df, project, scanner))
+    pd.testing.assert_frame_equal(filter_by_flag_and_label(indexed_df, 1, 0),
+                                  filter_by_flag_and_label(df, 1, 0))
+    pd.testing.assert_frame_equal(
+        get_difference_between_scanners(indexed_df, 'P2', 'syft_cont', 'trivy_cont', 1, 1),
+        get_difference_between_scanners(df, 'P2', 'syft_cont', 'trivy_cont', 1, 1))
+    assert indexed_df.select(project_name_version='P1', flag=2).empty
+
+def test_differences_between_all_scanners_match_pairwise_calls():
+    df = _confusion_matrix_data().dropna(subset=['project_name_version'])
+    differences = get_differences_between_all_scanners(IndexedFrame(df))
+    counts_df = differences.counts
+
+    scanners = ['gitlab_cont', 'syft_cont', 'trivy_cont']
+    assert len(counts_df) == 3 * 2 * 2 * len(scanners) * (len(scanners) - 1)
+    for row in counts_df.itertuples(index=False):
+        expected = get_difference_between_scanners(
+            df, row.project_name_version, row.scanner_name1, row.scanner_name2, 
+            int(row.flag), int(row.label))
+        artifacts = differences.artifacts(row.project_name_version, row.scanner_name1, 
+                                          row.scanner_name2, int(row.flag), int(row.label))
+        assert row.count == len(expected)
+        assert sorted(artifacts['artifacts']) == sorted(expected['artifacts'])
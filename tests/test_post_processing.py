@@ -0,0 +1,28 @@
+import pandas as pd
+from post_processing import count_labels, label_sbom_data
+
+
+def _scanner_data():
+    return pd.DataFrame({
+        'scanner_name': ['gitlab_cont', 'syft_cont', 'jfrog_advanced_security_cont',
+                         'gitlab_cont', 'trivy_cont', 'trivy_cont', 'syft_cont'],
+        'name_version': ['a:1', 'a:1', 'a:1', 'b:1', 'b:1', 'c:1', 'b:1'],
+    })
+
+def test_label_sbom_data_uses_majority_vote():
+    labeled_df = label_sbom_data(_scanner_data()).set_index('name_version')
+
+    assert labeled_df['votes'].to_dict() == {'a:1': 3, 'b:1': 2, 'c:1': 0}
+    assert labeled_df['labeling'].to_dict() == {'a:1': 'TP', 'b:1': 'TP', 'c:1': 'FP'}
+    assert labeled_df['label_trivy_cont'].tolist() == ['FN', 'TP', 'FP']
+    assert labeled_df['label_jfrog_advanced_security_cont'].tolist() == ['TP', 'FN', 'TN']
+
+    counts = count_labels(labeled_df)
+    assert counts.loc['trivy_cont'].tolist() == [1, 1, 1, 0]
+
+def test_label_sbom_data_threshold_and_reference_scanners():
+    labeled_df = label_sbom_data(_scanner_data(), threshold=1, 
+                                 reference_scanners=['trivy_cont'])
+
+    assert labeled_df.set_index('name_version')['labeling'].to_dict() == {
+        'a:1': 'FP', 'b:1': 'TP', 'c:1': 'TP'}
@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+from presence_matrix import PresenceMatrix
+
+
+def _scanner_data():
+    return pd.DataFrame({
+        'project_name_version': ['P1'] * 6 + ['P2'] * 2,
+        'scanner_name': ['A', 'B', 'C', 'A', 'B', 'B', 'A', 'C'],
+        'name_version': ['x:1', 'x:1', 'x:1', 'y:1', 'y:1', 'z:1', 'x:1', None],
+    })
+
+def test_set_algebra_matches_python_sets():
+    presence_matrix = PresenceMatrix.from_frame(_scanner_data().iloc[:6])
+
+    assert set(presence_matrix.union('A', 'C')) == {'x:1', 'y:1'}
+    assert set(presence_matrix.intersection('A', 'B')) == {'x:1', 'y:1'}
+    assert set(presence_matrix.difference('B', 'A')) == {'z:1'}
+    assert presence_matrix.votes(['A', 'C']).tolist() == [2, 1, 0]
+    # Combinations of (A, B): only B -> 2, A and B -> 3
+    assert presence_matrix.region_counts(['A', 'B']).tolist() == [0, 0, 1, 2]
+
+def test_confusion_counts_and_groups(tmp_path):
+    presence_matrix = PresenceMatrix.from_frame(_scanner_data(), scanner_names=['A', 'B', 'C'],
+                                                group_by='project_name_version')
+    assert len(presence_matrix) == 4
+    assert presence_matrix.subset('P2').artifact_names().tolist() == ['x:1']
+
+    counts = presence_matrix.subset('P1').confusion_counts(['A', 'B', 'C'], 2)
+    assert counts.loc['C'].tolist() == [1, 0, 1, 1]
+
+    path = tmp_path / 'presence.npz'
+    presence_matrix.save(path)
+    loaded = PresenceMatrix.load(path)
+    pd.testing.assert_frame_equal(loaded.to_frame(), presence_matrix.to_frame())
+    assert np.array_equal(loaded.masks, presence_matrix.masks)
+
+def test_overlap_regions_match_python_sets():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        'project_name_version': rng.choice(['P1', 'P2'], 300),
+        'scanner_name': rng.choice(['A', 'B', 'C', 'D'], 300),
+        'name_version': [f'a{i}:1' for i in rng.integers(0, 50, 300)],
+    })
+    presence_matrix = PresenceMatrix.from_frame(df, scanner_names=['A', 'B', 'C', 'D'],
+                                                group_by='project_name_version')
+    regions_df = presence_matrix.overlap_regions(['C', 'A', 'B'])
+
+    for project, project_df in df.groupby('project_name_version'):
+        found = {artifact: set(artifact_df['scanner_name'])
+                 for artifact, artifact_df in project_df.groupby('name_version')}
+        for _, row in regions_df[regions_df['group'] == project].iterrows():
+            scanners = {scanner for scanner in 'CAB' if row[scanner]}
+            expected = sum(1 for names in found.values() if names & set('CAB') == scanners)
+            assert row['size'] == expected
+            assert row['degree'] == len(scanners)
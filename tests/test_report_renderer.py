@@ -0,0 +1,32 @@
+import numpy as np
+import pandas as pd
+from report_renderer import render_project_reports
+from visualization import evaluate_confusion_matrix
+
+
+def test_render_project_reports_skips_unchanged_projects(tmp_path, monkeypatch):
+    # The plots are saved to ../output like from the notebooks folder
+    (tmp_path / 'notebooks').mkdir()
+    monkeypatch.chdir(tmp_path / 'notebooks')
+
+    rng = np.random.default_rng(0)
+    n = 200
+    df = pd.DataFrame({
+        'project_name': rng.choice(['P1', 'P2'], n),
+        'project_version': '1.0',
+        'scanner_name': rng.choice(['gitlab_cont', 'syft_cont', 'trivy_cont'], n),
+        'name_version': [f'a{i}:1' for i in rng.integers(0, 30, n)],
+        'version': '1',
+    })
+    df['project_name_version'] = df['project_name'] + '_' + df['project_version']
+    confusion_matrix_df = evaluate_confusion_matrix(df, true_threshold=2)
+
+    result = render_project_reports(df, confusion_matrix_df, max_workers=2)
+    assert sorted(result['status']) == ['rendered'] * 4
+    assert all((tmp_path / 'notebooks' / path).exists() for path in result['output_file'])
+
+    df.loc[df['project_name'] == 'P2', 'version'] = '2'
+    result = render_project_reports(df, confusion_matrix_df, max_workers=2)
+    status = dict(zip(result['output_file'], result['status']))
+    assert status['../output/P2_1.0/SBOM_comparison_P2_1.0.png'] == 'rendered'
+    assert sorted(status.values()) == ['rendered'] + ['unchanged'] * 3
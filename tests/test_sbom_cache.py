@@ -0,0 +1,108 @@
+import pandas as pd
+import pytest
+from dependency_track import DependencyTrack
+from sbom_cache import SBOMCache
+
+
+class _FakeBOMResponse:
+    def __init__(self, status_code, payload=b'', etag=None):
+        self.status_code = status_code
+        self.payload = payload
+        self.headers = {'ETag': etag} if etag else {}
+        self.closed = False
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size):
+        for start in range(0, len(self.payload), chunk_size):
+            yield self.payload[start:start + chunk_size]
+
+    def close(self):
+        self.closed = True
+
+
+class _FakeBOMSession:
+    # Answers every request with the given response and records the headers
+    def __init__(self, response):
+        self.response = response
+        self.headers = []
+
+    def request(self, method, url, headers=None, **kwargs):
+        self.headers.append(headers)
+        return self.response
+
+
+def test_store_stream_round_trip_and_partial_download(tmp_path):
+    cache = SBOMCache(str(tmp_path / 'sbom'))
+    assert not (tmp_path / 'sbom').exists()
+
+    chunks = list(cache.store_stream('u1', [b'{"a": ', b'1}'], 5, 'e1'))
+    assert chunks == [b'{"a": ', b'1}']
+    assert b''.join(cache.iter_chunks('u1', chunk_size=2)) == b'{"a": 1}'
+    assert cache.get_metadata('u1') == {'last_bom_import': 5, 'etag': 'e1'}
+
+    def failing_download():
+        yield b'{"a"'
+        raise ConnectionError('reset')
+
+    with pytest.raises(ConnectionError):
+        list(cache.store_stream('u2', failing_download(), 5))
+    assert cache.get_metadata('u2') is None
+    assert sorted(path.name for path in (tmp_path / 'sbom').iterdir()) == [
+        'u1.json.gz', 'u1.meta.json']
+
+def test_is_valid_compares_last_bom_import(tmp_path):
+    cache = SBOMCache(str(tmp_path))
+    cache.store('u1', b'{}', last_bom_import=5)
+    assert cache.is_valid('u1', 5)
+    assert not cache.is_valid('u1', 6)
+    assert not cache.is_valid('u1', None)
+    assert not cache.is_valid('u2', 5)
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = SBOMCache(str(tmp_path), max_size_bytes=10**6)
+    payload = bytes(range(256)) * 800
+    cache.store('u1', payload)
+    cache.store('u2', payload)
+    size = (tmp_path / 'u1.json.gz').stat().st_size
+    cache.max_size_bytes = 2 * size
+
+    # u1 is read again, so u2 is the least recently used entry
+    list(cache.iter_chunks('u1'))
+    cache.store('u3', payload)
+    assert cache.get_metadata('u1') is not None
+    assert cache.get_metadata('u2') is None
+    assert cache.get_metadata('u3') is not None
+
+def test_not_modified_response_serves_the_cached_bom(tmp_path):
+    cache_dir = str(tmp_path)
+    SBOMCache(cache_dir).store('u1', b'cached', last_bom_import=1, etag='"e1"')
+    session = _FakeBOMSession(_FakeBOMResponse(304))
+    project_info = pd.DataFrame({'Name': ['App_syft_cont'], 'Version': ['None'], 
+                                 'UUID': ['u1'], 'LastBomImport': [2]})
+    dt_instance = DependencyTrack(api_key='test', session=session, cache_dir=cache_dir,
+                                  project_info=project_info)
+
+    assert b''.join(dt_instance._get_project_bom('u1')) == b'cached'
+    assert session.headers[0]['If-None-Match'] == '"e1"'
+    assert session.response.closed
+    # The new lastBomImport is recorded, the next call needs no request
+    assert dt_instance.sbom_cache.is_valid('u1', 2)
+    assert b''.join(dt_instance._get_project_bom('u1')) == b'cached'
+    assert len(session.headers) == 1
+
+def test_offline_mode_uses_the_cached_catalogue(tmp_path):
+    cache_dir = str(tmp_path)
+    session = _FakeBOMSession(_FakeBOMResponse(200, b'downloaded', etag='"e1"'))
+    project_info = pd.DataFrame({'Name': ['App_syft_cont'], 'Version': ['1.0'], 
+                                 'UUID': ['u1'], 'LastBomImport': [2]})
+    dt_instance = DependencyTrack(api_key='test', session=session, cache_dir=cache_dir,
+                                  project_info=project_info)
+    assert b''.join(dt_instance._get_project_bom('u1')) == b'downloaded'
+
+    offline_instance = DependencyTrack(api_key='test', session=_FakeBOMSession(None), 
+                                       cache_dir=cache_dir, offline=True)
+    assert offline_instance._get_scanner_uuids('App', '1.0') == [('syft_cont', 'u1')]
+    assert b''.join(offline_instance._get_project_bom('u1')) == b'downloaded'
+    assert offline_instance.session.headers == []
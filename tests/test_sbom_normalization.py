@@ -0,0 +1,99 @@
+import numpy as np
+import pandas as pd
+import pytest
+from packageurl import PackageURL
+from sbom_normalization import (
+    PURL_COLUMNS,
+    normalize_artifact_names,
+    normalize_hashes,
+    parse_purls,
+    split_jar_names,
+)
+
+
+def test_parse_purls_matches_packageurl():
+    purls = pd.Series([
+        'pkg:maven/org.apache.commons/commons-io@2.11.0',
+        'pkg:npm/@angular/core@15.0.0',
+        'pkg:npm/Foo@1.0',
+        'pkg:pypi/Django_Rest@3.0',
+        'pkg:deb/debian/libc6@2.31-13?arch=amd64&distro=debian-11',
+        'pkg:golang/github.com/Sirupsen/logrus@v1.9.0',
+        'pkg:generic/openssl',
+        'pkg:rpm/redhat/bash@0:5.1',
+        'pkg:maven/org.apache.commons/commons-io@2.11.0',
+    ], index=range(10, 19))
+
+    parsed_df = parse_purls(purls)
+    assert list(parsed_df.columns) == PURL_COLUMNS
+    assert list(parsed_df.index) == list(purls.index)
+
+    for purl, (_, row) in zip(purls, parsed_df.iterrows()):
+        expected = PackageURL.from_string(purl).to_dict()
+        for key, value in expected.items():
+            actual = row[f'p_{key}']
+            assert actual == value or (value is None and pd.isna(actual))
+
+def test_parse_purls_reports_invalid_purls_once():
+    purls = pd.Series(['pkg:npm/a@1', 'not a purl', 'not a purl', np.nan])
+
+    with pytest.warns(UserWarning, match='3 of 4 PURLs') as record:
+        parsed_df = parse_purls(purls)
+
+    assert len(record) == 1
+    assert parsed_df['p_name'].values[0] == 'a'
+    assert parsed_df.iloc[1:].isna().all().all()
+
+def test_normalize_hashes_keeps_every_algorithm():
+    hashes = pd.Series([
+        [{'alg': 'SHA-1', 'content': 'aaa'}, {'alg': 'SHA-256', 'content': 'bbb'}],
+        np.nan,
+        [{'alg': 'SHA-256', 'content': 'ccc'}],
+    ], index=['x', 'y', 'z'])
+
+    hash_df = normalize_hashes(hashes)
+    assert list(hash_df.index) == ['x', 'y', 'z']
+    assert hash_df['hash_sum'].tolist()[::2] == ['aaa', 'ccc']
+    assert hash_df['hash_algo'].tolist()[::2] == ['SHA-1', 'SHA-256']
+    assert hash_df['hash_sha1'].values[0] == 'aaa'
+    assert hash_df['hash_sha256'].tolist()[::2] == ['bbb', 'ccc']
+    assert hash_df.loc['y'].isna().all()
+
+def _process_string(s):
+    # Row-wise split of the SoftwareCompositionAnalysis notebook
+    if s.endswith(".jar"):
+        s = s[:-4]  # Remove ".jar"
+        parts = s.split("-")
+        new_name = "-".join(parts[:])
+        new_version = None 
+        for i in range(0, len(parts) - 1, 1):
+            if parts[i+1].replace(".", "").replace("_","").isdigit():
+                new_version = "-".join(parts[i+1:])
+                new_name = "-".join(parts[:i+1])   
+                break
+        return new_name, new_version 
+    else:
+        return None, None
+
+def test_split_jar_names_matches_row_wise_split():
+    rng = np.random.default_rng(0)
+    parts = ['commons', 'io', '2.11.0', '1_2', 'SNAPSHOT', '', 'v1', '._', '3a', '17']
+    names = ['-'.join(rng.choice(parts, rng.integers(1, 5))) + 
+             rng.choice(['.jar', '.jar', '.so', '']) for _ in range(1000)]
+    names = pd.Series(names + ['.jar', 'a-1.jar.jar'])
+
+    split_df = split_jar_names(names)
+    assert list(split_df.itertuples(index=False, name=None)) == [
+        _process_string(name) for name in names]
+
+def test_normalize_artifact_names_applies_the_rules_of_the_scanner():
+    df = pd.DataFrame({
+        'scanner_name': ['jfrog_cont', 'syft_cont', 'jfrog_advanced_security_cont'],
+        'name': ['commons-io-2.11.0.jar', 'guava-1.0.jar', 'tools.jar'],
+        'version': [None, '1.0', '9'],
+    })
+
+    normalized_df = normalize_artifact_names(df)
+    assert normalized_df['name'].tolist() == ['commons-io', 'guava-1.0.jar', 'tools']
+    assert normalized_df['version'].tolist() == ['2.11.0', '1.0', '9']
+    assert normalize_artifact_names(df, rules={})['name'].equals(df['name'])
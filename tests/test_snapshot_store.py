@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+import pyarrow.dataset as ds
+import pytest
+from snapshot_store import SnapshotStore
+
+
+def _scanner_data():
+    return pd.DataFrame({
+        'project_name_version': pd.Categorical(['P1', 'P1', '2023', 'P1']),
+        'scanner_name': pd.Categorical(['syft_cont', 'jfrog_cont', 'syft_cont', 'syft_cont']),
+        'name_version': ['a:1', 'b:2', 'a:1', 'c:'],
+        'version': ['1', '2', '1', None],
+        'p_qualifiers': [{'arch': 'amd64'}, None, {}, {'type': 'jar', 'os': 'linux'}],
+        'hashes': [[{'alg': 'SHA-1', 'content': 'aaa'}], np.nan, [], 
+                   [{'alg': 'SHA-256', 'content': 'bbb'}]],
+        'flag': pd.array([1, 0, 1, None], dtype='Int32'),
+    })
+
+def test_snapshot_roundtrip_keeps_dtypes_and_nested_values(tmp_path):
+    store = SnapshotStore(tmp_path)
+    df = _scanner_data()
+    store.save('scanner_data_agg', df)
+
+    # The rows are loaded in the saved order, although they span several files
+    loaded_df = store.load('scanner_data_agg')
+    assert list(loaded_df.columns) == list(df.columns)
+    assert loaded_df.dtypes.astype(str).tolist() == df.dtypes.astype(str).tolist()
+    for column in df.columns:
+        assert loaded_df[column].isna().tolist() == df[column].isna().tolist()
+        assert loaded_df[column].dropna().tolist() == df[column].dropna().tolist()
+    assert store.info('scanner_data_agg')['rows'] == 4
+
+def test_snapshot_of_an_empty_frame_and_mixed_columns(tmp_path):
+    store = SnapshotStore(tmp_path)
+    empty_df = _scanner_data().iloc[:0]
+    store.save('empty', empty_df)
+    loaded_df = store.load('empty')
+    assert len(loaded_df) == 0
+    assert list(loaded_df.columns) == list(empty_df.columns)
+    assert str(loaded_df['flag'].dtype) == 'Int32'
+
+    # Object columns of mixed types are stored as strings
+    mixed_df = pd.DataFrame({'cwe': pd.Series([79, 'CWE-89', None], dtype=object)})
+    store.save('mixed', mixed_df)
+    cwe = store.load('mixed')['cwe']
+    assert cwe.dropna().tolist() == ['79', 'CWE-89'] and cwe.isna().tolist()[2]
+    assert store.info('mixed')['string_columns'] == ['cwe']
+
+def test_snapshot_reads_one_project_and_checks_the_schema_version(tmp_path):
+    store = SnapshotStore(tmp_path)
+    store.save('scanner_data_agg', _scanner_data())
+
+    project_df = store.load('scanner_data_agg', columns=['scanner_name', 'name_version'],
+                            projects=['P1'], filters=ds.field('flag') == 1)
+    assert list(project_df.columns) == ['scanner_name', 'name_version']
+    assert project_df['name_version'].tolist() == ['a:1']
+    assert store.load('scanner_data_agg', projects=['2023'])['name_version'].tolist() == ['a:1']
+    assert store.load('missing') is None
+
+    (tmp_path / 'scanner_data_agg' / '_snapshot.json').write_text(
+        '{"schema_version": 0}')
+    with pytest.raises(ValueError, match='schema version 0'):
+        store.load('scanner_data_agg')
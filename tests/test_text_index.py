@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+from dataframe_filters import (
+    filter_rows_with_string_in_column,
+    filter_rows_with_strings_in_column,
+)
+from indexed_frame import IndexedFrame
+from text_index import TrigramIndex
+
+
+def _titles():
+    rng = np.random.default_rng(0)
+    words = ['weblogic', 'Secret', 'token', 'jar', 'spring-core', 'API_KEY', 'log4j', 'x']
+    titles = [' '.join(rng.choice(words, rng.integers(1, 4))) for _ in range(300)]
+    return pd.Series(titles, dtype=object).where(rng.random(300) > 0.05, None)
+
+def test_search_matches_str_contains():
+    titles = _titles()
+    index = TrigramIndex(titles)
+
+    for pattern, regex, case in [('weblogic', True, True), ('secret', True, False),
+                                 ('secret|token', True, True), ('log4j', False, True),
+                                 ('x', True, True), ('spring-c.re', True, True),
+                                 ('API_KEY|jar$', True, False), ('missing', True, True)]:
+        expected = np.flatnonzero(titles.str.contains(pattern, regex=regex, case=case)
+                                  .fillna(False).to_numpy(dtype=bool))
+        assert index.search(pattern, regex=regex, case=case).tolist() == expected.tolist()
+
+def test_filter_rows_with_strings_in_column_on_indexed_frame():
+    df = pd.DataFrame({'finding_title': _titles(), 'data': np.arange(300)})
+    df = df.dropna(subset=['finding_title'])
+    indexed_df = IndexedFrame(df)
+
+    pd.testing.assert_frame_equal(
+        filter_rows_with_string_in_column(indexed_df, 'finding_title', 'web.ogic'),
+        filter_rows_with_string_in_column(df, 'finding_title', 'web.ogic'))
+    results = filter_rows_with_strings_in_column(indexed_df, 'finding_title', 
+                                                 ['Secret', 'token', 'API_KEY'])
+    for string, result_df in results.items():
+        pd.testing.assert_frame_equal(
+            result_df, filter_rows_with_string_in_column(df, 'finding_title', string))
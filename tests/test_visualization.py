@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+from visualization import evaluate_confusion_matrix
+
+
+def _expected_confusion_matrix(df, true_threshold):
+    # Per-project loop of the SoftwareCompositionAnalysis notebook
+    rows = []
+    for project, project_df in df.dropna(subset=['version']).groupby('project_name_version'):
+        artifacts = set(project_df['name_version'])
+        scanners = set(project_df['scanner_name'])
+        votes = project_df.drop_duplicates(['name_version', 'scanner_name'])[
+            'name_version'].value_counts()
+        for scanner in scanners:
+            found = set(project_df.loc[project_df['scanner_name'] == scanner, 'name_version'])
+            for artifact in artifacts:
+                rows.append((project, scanner, artifact, int(artifact in found), 
+                             votes[artifact], int(votes[artifact] >= true_threshold)))
+    return sorted(rows)
+
+def test_evaluate_confusion_matrix_expands_missing_artifacts():
+    rng = np.random.default_rng(0)
+    n = 400
+    df = pd.DataFrame({
+        'project_name_version': rng.choice(['P1', 'P2', 'P3'], n),
+        'scanner_name': rng.choice(['gitlab_cont', 'syft_cont', 'trivy_cont', 'jfrog_cont'], n),
+        'name_version': [f'a{i}:1' for i in rng.integers(0, 60, n)],
+        'version': np.where(rng.random(n) < 0.1, None, '1'),
+    })
+    df.loc[(df['project_name_version'] == 'P3') & (df['scanner_name'] == 'trivy_cont'), 
+           'scanner_name'] = 'syft_cont'
+
+    confusion_matrix_df = evaluate_confusion_matrix(df, true_threshold=2)
+    result = sorted(confusion_matrix_df.astype(object).itertuples(index=False, name=None))
+
+    assert result == _expected_confusion_matrix(df, true_threshold=2)